@@ -0,0 +1,165 @@
+# ==============================================================================
+# -- BufferedLogger ------------------------------------------------------------
+# ==============================================================================
+
+import atexit
+import csv
+import json
+import os
+import threading
+
+import numpy as np
+
+
+class BufferedLogger(object):
+    """
+    Logger that buffers the records of several log files in memory, and writes them
+    from a background thread, in batches. A batch is written once flush_size records
+    are pending, or every flush_interval seconds. The files are kept open until close().
+
+    Text logs receive lines. Tables receive rows of values, and are either written
+    as CSV, or in a compact binary format: little-endian float64 records, described
+    by a "<file>.json" header (see read_binary_table).
+
+    A batch that can't be written (I/O error, or records not matching the format of the
+    file) is reported and dropped, so the logger keeps writing the other ones.
+    dropped counts the records lost this way.
+    """
+
+    def __init__(self, flush_size=256, flush_interval=1.0):
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+
+        self._files = {}
+        self._pending = []
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._running = True
+        self.dropped = 0
+
+        self._thread = threading.Thread(target=self._run, name="BufferedLogger")
+        self._thread.daemon = True
+        self._thread.start()
+
+        # Don't lose the last records if the agent isn't destroyed
+        atexit.register(self.close)
+
+    def open_text(self, path, append=True):
+        """
+        Registers a text log file
+        """
+        self._open(path, 'text', append)
+
+    def open_table(self, path, fieldnames, binary=False, append=False):
+        """
+        Registers a table log file with the given fields. Its header is written unless appending
+        """
+        self._open(path, 'binary' if binary else 'csv', append, fieldnames)
+
+    def _open(self, path, kind, append, fieldnames=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._write_lock:
+            if path in self._files:
+                self._files[path][1].close()
+
+            if kind == 'binary':
+                with open(path + ".json", 'w') as header_file:
+                    json.dump({'fields': list(fieldnames), 'dtype': '<f8'}, header_file)
+                file = open(path, 'ab' if append else 'wb')
+                writer = None
+            else:
+                file = open(path, 'a' if append else 'w', newline='' if kind == 'csv' else None)
+                writer = None
+                if kind == 'csv':
+                    writer = csv.writer(file)
+                    if not append:
+                        writer.writerow(fieldnames)
+
+            self._files[path] = (kind, file, writer)
+
+    def write(self, path, record):
+        """
+        Queues a record, a line for text logs or a sequence of values for tables
+        """
+        with self._condition:
+            if not self._running:
+                return
+            self._pending.append((path, record))
+            if len(self._pending) >= self._flush_size:
+                self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self._pending) >= self._flush_size or not self._running,
+                                         self._flush_interval)
+                running = self._running
+            self.flush()
+            if not running:
+                return
+
+    def flush(self):
+        """
+        Writes all the pending records
+        """
+        with self._write_lock:
+            with self._condition:
+                pending = self._pending
+                self._pending = []
+
+            batches = {}
+            for path, record in pending:
+                batches.setdefault(path, []).append(record)
+
+            for path, records in batches.items():
+                if path not in self._files:
+                    continue
+                kind, file, writer = self._files[path]
+                try:
+                    if kind == 'text':
+                        file.write('\n'.join(records) + '\n')
+                    elif kind == 'csv':
+                        writer.writerows(records)
+                    else:
+                        file.write(np.asarray(records, dtype='<f8').tobytes())
+                    file.flush()
+                except (IOError, TypeError, ValueError) as e:
+                    self.dropped += len(records)
+                    print("BufferedLogger: Dropped {} records of {}: {}".format(len(records), path, e))
+
+    def close(self):
+        """
+        Writes all the pending records and closes the files
+        """
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+
+        with self._write_lock:
+            for path, (_, file, _) in self._files.items():
+                try:
+                    file.close()
+                except IOError as e:
+                    print("BufferedLogger: Couldn't close {}: {}".format(path, e))
+            self._files = {}
+
+        atexit.unregister(self.close)
+
+
+def read_binary_table(path):
+    """
+    Reads a table written in binary format, as a NumPy structured array
+    """
+    with open(path + ".json") as header_file:
+        header = json.load(header_file)
+    dtype = np.dtype([(field, header['dtype']) for field in header['fields']])
+    return np.fromfile(path, dtype=dtype)
@@ -41,20 +41,30 @@ class HumanInterface(object):
             font, (self._width, 40), (0, self._height - 40))
 
     @staticmethod
-    def get_nearby_actors_info(t_camera, ego_vehicle_id):
-        def distance(transform1, transform2):
-            return math.sqrt((transform1.x - transform2.location.x)**2 + (transform1.y - transform2.location.y)**2 + (transform1.z - transform2.location.z)**2)
-
+    def get_nearby_actors_info(t_camera, ego_vehicle_id, max_distance=200.0):
+        """
+        Lists the alive actors of the actor pool sorted by their distance to the camera,
+        up to max_distance [m] (None for all of them). The location buffered at the start
+        of the tick is used for registered actors, the current one for the others
+        """
         actors_exception = ["controller.ai.walker"]
         info_text = ["Nearby actors (camera):"]
 
-        actors = CarlaDataProvider.get_actors()
-        actors = [(id, actor) for id, actor in actors if actor is not None and actor.is_alive and
-                    actor.type_id not in actors_exception and id != ego_vehicle_id]
-        vehicles = [(distance(actor.get_location(), t_camera), actor)
-                    for id, actor in actors]
-        for d, vehicle in sorted(vehicles, key=lambda vehicles: vehicles[0]):
-            if d > 200.0:
+        vehicles = []
+        for actor_id, actor in CarlaDataProvider.get_actors():
+            if actor is None or actor_id == ego_vehicle_id or actor.type_id in actors_exception:
+                continue
+            state = CarlaDataProvider.get_actor_state(actor_id)
+            if state is not None and state.alive and state.location is not None:
+                location = state.location
+            elif actor.is_alive:
+                location = actor.get_location()
+            else:
+                continue
+            vehicles.append((location.distance(t_camera.location), actor))
+
+        for d, vehicle in sorted(vehicles, key=lambda vehicle: vehicle[0]):
+            if max_distance is not None and d > max_distance:
                 break
             vehicle_type = get_actor_display_name(vehicle, truncate=22)
             info_text.append(f'{d:>9.2f} m {vehicle_type}')
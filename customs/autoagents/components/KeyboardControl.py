@@ -54,6 +54,13 @@ class KeyboardControl(object):
             self._mode = "normal"
             self._endpoint = None
 
+    @property
+    def is_playback(self):
+        """
+        True if the controls are played back from a file, so no keyboard is needed
+        """
+        return self._mode == "playback"
+
     def _json_to_control(self):
         """
         Parses the json file into a list of carla.VehicleControl
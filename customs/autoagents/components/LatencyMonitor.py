@@ -0,0 +1,135 @@
+# ==============================================================================
+# -- LatencyMonitor ------------------------------------------------------------
+# ==============================================================================
+
+import json
+import threading
+import time
+
+import numpy as np
+
+
+class LatencyMonitor(object):
+    """
+    Measures the round-trip latency between publishing the sensor data to an external
+    module, and receiving its response, as well as how long each tick waits for it.
+
+    mark_publish() and mark_response() can be called from any thread (sensor callbacks,
+    ZMQ receivers), record_tick() is called once per tick after waiting for the response.
+    The latencies are kept in a histogram with the given bin edges [s], and the raw samples
+    for the percentiles of the summary.
+    """
+
+    DEFAULT_BINS = (0.0, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+
+    def __init__(self, name, bins=DEFAULT_BINS):
+        self.name = name
+        self._bins = np.asarray(bins, dtype=np.float64)
+        self._lock = threading.Lock()
+
+        self._publish_time = None
+        self._response_time = None
+
+        self._round_trip_histogram = np.zeros(len(self._bins), dtype=np.int64)
+        self._wait_histogram = np.zeros(len(self._bins), dtype=np.int64)
+        self._round_trips = []
+        self._waits = []
+
+        self.ticks = 0
+        self.timeouts = 0
+        self.max_consecutive_timeouts = 0
+        self._consecutive_timeouts = 0
+
+    def mark_publish(self):
+        """
+        Stamps the sending of the data. Only the first publish after a response counts,
+        so that the round trip starts with the oldest data not yet answered
+        """
+        with self._lock:
+            if self._publish_time is None:
+                self._publish_time = time.perf_counter()
+
+    def mark_response(self):
+        """
+        Stamps the reception of the response
+        """
+        with self._lock:
+            self._response_time = time.perf_counter()
+
+    def record_tick(self, wait_time, timed_out):
+        """
+        Records the result of a tick, given how long it waited [s] for the response
+        and whether the wait timed out
+        """
+        with self._lock:
+            self.ticks += 1
+            self._add_sample(self._waits, self._wait_histogram, wait_time)
+
+            if timed_out:
+                self.timeouts += 1
+                self._consecutive_timeouts += 1
+                self.max_consecutive_timeouts = max(self.max_consecutive_timeouts, self._consecutive_timeouts)
+                return
+            self._consecutive_timeouts = 0
+
+            if (self._publish_time is not None and self._response_time is not None
+                    and self._response_time >= self._publish_time):
+                self._add_sample(self._round_trips, self._round_trip_histogram,
+                                 self._response_time - self._publish_time)
+            self._publish_time = None
+            self._response_time = None
+
+    def _add_sample(self, samples, histogram, value):
+        samples.append(value)
+        histogram[max(np.searchsorted(self._bins, value, side='right') - 1, 0)] += 1
+
+    @staticmethod
+    def _get_percentiles(samples):
+        if not samples:
+            return {'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+        values = np.asarray(samples)
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {'mean': float(values.mean()), 'p50': float(p50), 'p95': float(p95),
+                'p99': float(p99), 'max': float(values.max())}
+
+    def get_summary(self):
+        """
+        Returns a dictionary with the tick and timeout counts, and the statistics [s]
+        and histograms of the round trips and waits
+        """
+        with self._lock:
+            return {
+                'name': self.name,
+                'ticks': self.ticks,
+                'timeouts': self.timeouts,
+                'max_consecutive_timeouts': self.max_consecutive_timeouts,
+                'round_trip': self._get_percentiles(self._round_trips),
+                'wait': self._get_percentiles(self._waits),
+                'histogram_bins': self._bins.tolist(),
+                'round_trip_histogram': self._round_trip_histogram.tolist(),
+                'wait_histogram': self._wait_histogram.tolist(),
+            }
+
+    def write_summary(self, path):
+        """
+        Writes the summary as JSON
+        """
+        with open(path, 'w') as summary_file:
+            json.dump(self.get_summary(), summary_file, indent=2)
+
+    def print_summary(self):
+        """
+        Prints a short summary of the run
+        """
+        def to_ms(value):
+            return "-" if value is None else "{:.1f}".format(1000 * value)
+
+        summary = self.get_summary()
+        round_trip = summary['round_trip']
+        print("{}: {} ticks, {} timeouts (max {} consecutive)".format(
+            self.name, summary['ticks'], summary['timeouts'], summary['max_consecutive_timeouts']))
+        print("{}: round trip [ms] mean {} p50 {} p95 {} p99 {} max {}".format(
+            self.name, to_ms(round_trip['mean']), to_ms(round_trip['p50']), to_ms(round_trip['p95']),
+            to_ms(round_trip['p99']), to_ms(round_trip['max'])))
+        print("{}: wait [ms] mean {} max {}".format(
+            self.name, to_ms(summary['wait']['mean']), to_ms(summary['wait']['max'])))
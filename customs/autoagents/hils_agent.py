@@ -13,7 +13,7 @@ from typing import Callable, Tuple
 import zmq
 import os
 import math
-import csv
+import time
 from hils_connector.carla_handlers.outbound import (
     GnssHandler,
     LidarHandler,
@@ -21,12 +21,16 @@ from hils_connector.carla_handlers.outbound import (
 )
 from hils_connector.carla_handlers.inbound import ControlHandler
 # from hils_connector.dm import Controller2D, LocMap
-from threading import Event
+from threading import Condition, Event
 from carla import VehicleControl
 import logging
+from customs.autoagents.components.BufferedLogger import BufferedLogger
 from customs.autoagents.components.HumanInterface import HumanInterface
+from customs.autoagents.components.LatencyMonitor import LatencyMonitor
 from customs.helpers.config import OUT_DIR
+from customs.helpers.json2dict import json2dict
 
+from srunner.autoagents.sensor_worker import SensorWorker
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
 from customs.autoagents.human_tram_agent import HumanTramAgent
 
@@ -50,6 +54,7 @@ class HilsAgent(HumanTramAgent):
     prev_timestamp = 0
     ego_vehicle = None
     dm_command_wait_timeout = 1       # (s) timeout of wait control from DM, None to wait indefinitely
+    dm_command_deadline = 0.02        # (s) time each tick waits for a new DM command, in "deadline" control mode
 
     _log = logging.getLogger("HILS agent")
 
@@ -60,10 +65,37 @@ class HilsAgent(HumanTramAgent):
 
         super().setup(path_to_conf_file)
 
+        # Logs are written by a background thread, in batches, and the speed profile
+        # can be written as CSV or as binary float64 records ("log": {"binary": true})
+        configs = json2dict(path_to_conf_file)
+        log_config = configs.get("log", {})
+        self._logger = BufferedLogger(log_config.get("flush_size", 256), log_config.get("flush_interval", 1.0))
+        self._command_log_dir = os.path.join(OUT_DIR, "command_logs")
+        self._command_log_files = set()
+        self._speed_profile_binary = log_config.get("binary", False)
+
+        # "blocking": each tick waits for a new DM command, up to dm_command_wait_timeout.
+        # "deadline": each tick waits up to dm_command_deadline, and otherwise applies the latest
+        # (stale) command, while the sensor data is published by background workers.
+        control_config = configs.get("control", {})
+        self._control_mode = control_config.get("mode", "blocking")
+        if self._control_mode not in ("blocking", "deadline"):
+            raise ValueError("Unknown control mode [{}]".format(self._control_mode))
+        self.dm_command_deadline = control_config.get("deadline", self.dm_command_deadline)
+        self._stale_ticks = 0
+        self._publish_workers = []
+
         self._vehicle_control_event = Event()
+        # In "deadline" mode, a command is new if its sequence number wasn't applied yet
+        self._dm_command_condition = Condition()
+        self._dm_command_seq = 0
+        self._applied_dm_command_seq = 0
 
         self._dm_command = Integer(0)
 
+        # Round trip between publishing the sensor data and receiving the DM command
+        self._dm_latency = LatencyMonitor("DM latency")
+
         self._setup_sensors()
 
         self._is_first_run = True
@@ -122,10 +154,11 @@ class HilsAgent(HumanTramAgent):
         )
 
         fieldnames = ["Time", "Forward Speed", "powering"]
-
-        with open('speed_profile.csv', 'w') as csv_file:
-            csv_writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-            csv_writer.writeheader()
+        if self._speed_profile_binary:
+            self._speed_profile_file = 'speed_profile.bin'
+        else:
+            self._speed_profile_file = 'speed_profile.csv'
+        self._logger.open_table(self._speed_profile_file, fieldnames, binary=self._speed_profile_binary)
 
     def _log_actors_and_speed(self, timestamp):
         t_camera = None
@@ -168,8 +201,23 @@ class HilsAgent(HumanTramAgent):
             )
 
         # log timestamp, command, distance
-        self._vehicle_control_event.wait(timeout=self.dm_command_wait_timeout)
-        self._command_log(self._dm_command.val, timestamp, filename="command_log.txt")
+        is_deadline_mode = self._control_mode == "deadline"
+        wait_start = time.perf_counter()
+        if is_deadline_mode:
+            with self._dm_command_condition:
+                is_command_received = self._dm_command_condition.wait_for(
+                    lambda: self._dm_command_seq != self._applied_dm_command_seq, self.dm_command_deadline)
+                # commands received from now on are new for the next tick
+                self._applied_dm_command_seq = self._dm_command_seq
+        else:
+            is_command_received = self._vehicle_control_event.wait(timeout=self.dm_command_wait_timeout)
+        self._dm_latency.record_tick(time.perf_counter() - wait_start, not is_command_received)
+
+        if is_deadline_mode and not is_command_received:
+            self._stale_ticks += 1
+            self._command_log(self._dm_command.val, timestamp, filename="command_log.txt", stale=True)
+        else:
+            self._command_log(self._dm_command.val, timestamp, filename="command_log.txt")
         self._log_actors_and_speed(timestamp)
 
         throttle, brake = 0, 0
@@ -202,9 +250,11 @@ class HilsAgent(HumanTramAgent):
 
         self.prev_timestamp = timestamp
 
-        speed_profile_plotter(timestamp, self._locmap.speed, self._dm_controller.curCommand, self._is_first_run)
+        speed_profile_plotter(self._logger, self._speed_profile_file,
+                              timestamp, self._locmap.speed, self._dm_controller.curCommand)
 
-        self._vehicle_control_event.clear()
+        if not is_deadline_mode:
+            self._vehicle_control_event.clear()
 
         return control
 
@@ -221,25 +271,29 @@ class HilsAgent(HumanTramAgent):
         return dm.get_commands()
     
     def _command_log(self, command, timestamp=None, filename: str="logs.txt", **kwargs):
-        fullfilename = os.path.join(OUT_DIR, "command_logs")
-        os.makedirs(fullfilename, exist_ok=True)
-        fullfilename = os.path.join(fullfilename, filename)
+        fullfilename = os.path.join(self._command_log_dir, filename)
+        if fullfilename not in self._command_log_files:
+            self._logger.open_text(fullfilename)
+            self._command_log_files.add(fullfilename)
 
         logstrings = [f"timestamp: {timestamp} | command: {command}"]
 
         for key, value in kwargs.items():
             logstrings.append(f"{key}: {value}")
 
-        with open(fullfilename, "a") as logfile:
-            logfile.write('\n'.join(logstrings) + '\n')
+        self._logger.write(fullfilename, '\n'.join(logstrings))
 
     def _on_vehicle_control(self, data: int):
-        if self._vehicle_control_event.is_set():
+        if self._vehicle_control_event.is_set() and self._control_mode == "blocking":
             # throw away data if previous data is not yet processed
             return
 
+        self._dm_latency.mark_response()
         self._command_log(self._dm_command.val, GameTime.get_time(), filename="command_log_on_vehicle_control.txt")
         self._dm_command.val = data
+        with self._dm_command_condition:
+            self._dm_command_seq += 1
+            self._dm_command_condition.notify_all()
         self._vehicle_control_event.set()
 
     def set_egovehicle(self, ego_vehicle):
@@ -248,22 +302,48 @@ class HilsAgent(HumanTramAgent):
 
     def get_sensor_listener(self, sensor_type: str) -> Callable[[int], None]:
         if sensor_type == "sensor.camera.rgb":
-            return self._camera_handler.process_camera_sensor
+            return self._get_publishing_listener(self._camera_handler.process_camera_sensor)
 
         if sensor_type == "sensor.lidar.ray_cast":
-            return self._lidar_handler.process_lidar_sensor
+            return self._get_publishing_listener(self._lidar_handler.process_lidar_sensor)
 
         if sensor_type == "sensor.other.gnss":
-            return self._gnss_handler.process_gnss_sensor
+            return self._get_publishing_listener(self._gnss_handler.process_gnss_sensor)
 
         self._log.warn("Sensor of type %s is not supported. Will be ignored.", sensor_type)
         return self._nop
 
+    def _get_publishing_listener(self, process: Callable[[int], None]) -> Callable[[int], None]:
+        def listener(data):
+            process(data)
+            self._dm_latency.mark_publish()
+
+        if self._control_mode == "deadline":
+            # Publish at a background thread, only the newest data if the DM link falls behind
+            worker = SensorWorker(listener, name="HilsPublisher", queue_size=1)
+            self._publish_workers.append(worker)
+            return worker.submit
+        return listener
+
     def _nop(self, _: int):
         pass
 
     def destroy(self):
         super().destroy()
+        try:
+            self._dm_latency.print_summary()
+            os.makedirs(self._command_log_dir, exist_ok=True)
+            self._dm_latency.write_summary(os.path.join(self._command_log_dir, "dm_latency.json"))
+            if self._control_mode == "deadline":
+                print("{}: {} ticks applied a stale command".format(self._dm_latency.name, self._stale_ticks))
+        except (AttributeError, IOError):
+            pass
+        for worker in getattr(self, "_publish_workers", []):
+            worker.stop()
+        try:
+            self._logger.close()
+        except (AttributeError, IOError):
+            pass
         try:
             self._camera_handler.destroy()
         except AttributeError:
@@ -281,24 +361,8 @@ class HilsAgent(HumanTramAgent):
         except AttributeError:
             pass
 
-def speed_profile_plotter(time, current_speed, powering, start_simulation=True):
-    fieldnames = ["Time", "Forward Speed", "powering"]
-
-    # if not start_simulation:
-    #     with open('speed_profile.csv', 'w') as csv_file:
-    #         csv_writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-    #         csv_writer.writeheader()
-
-    with open('speed_profile.csv', 'a') as csv_file:
-        csv_writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-
-        Times = time
-        Forward_Speed = current_speed
-
-        info = {
-            "Time": Times,
-            "Forward Speed": Forward_Speed,
-            "powering":powering
-        }
-
-        csv_writer.writerow(info)
+def speed_profile_plotter(logger, filename, timestamps, current_speed, powering):
+    """
+    Queues a row of the speed profile, read by speed_plotter.py
+    """
+    logger.write(filename, (timestamps, current_speed, powering))
@@ -10,6 +10,7 @@ Steering is done automatically by the vehicle to follow the route that's been se
 
 from __future__ import print_function
 
+import carla
 import pygame
 import py_trees
 
@@ -24,7 +25,7 @@ class HumanTramAgent(TramAgent):
     """
 
     agent_engaged = False
-    with_gui = True
+    with_gui = True               # set to False to run headless, regardless of the configuration
     prev_timestamp = 0
 
     def setup(self, path_to_conf_file=None):
@@ -34,11 +35,11 @@ class HumanTramAgent(TramAgent):
 
         super().setup(path_to_conf_file)
         configs = json2dict(path_to_conf_file)
-        self.with_gui = configs.get("with_gui", self.with_gui)
+        self.with_gui = self.with_gui and configs.get("with_gui", True)
         keyboard_config = configs.get("keyboard", None)
 
-        pygame.init()
         if self.with_gui:
+            pygame.init()
             self._hic = HumanInterface(title=self.__class__.__name__)
         self._controller = KeyboardControl(keyboard_config)
 
@@ -48,7 +49,11 @@ class HumanTramAgent(TramAgent):
         """
         # Change steering: Steering from NPC Agent
         control_super = super().run_step(input_data, timestamp)
-        self.is_keyboard_control, control = self._controller.parse_events(timestamp - self.prev_timestamp)
+        if self.with_gui or self._controller.is_playback:
+            self.is_keyboard_control, control = self._controller.parse_events(timestamp - self.prev_timestamp)
+        else:
+            # No keyboard without the pygame window
+            self.is_keyboard_control, control = False, carla.VehicleControl()
         is_horn = self._controller._horn
         other_data = {
             'is_horn': is_horn
@@ -69,7 +74,8 @@ class HumanTramAgent(TramAgent):
             self._hic.set_egovehicle(egovehicle)
 
     def _on_world_tick(self, timestamp):
-        self._hic._on_world_tick(timestamp)
+        if self.with_gui:
+            self._hic._on_world_tick(timestamp)
 
     def destroy(self):
         """
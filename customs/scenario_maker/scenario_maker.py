@@ -16,7 +16,8 @@ sys.path.append(os.getcwd())
 from customs.scenario_maker.available_scenarios import AvailableScenarios
 
 from srunner.tools.route_parser import RouteParser
-from srunner.tools.route_manipulation import interpolate_trajectory
+from srunner.tools.route_cache import RouteCache
+from srunner.tools.route_manipulation import interpolate_trajectory, set_route_cache
 
 OUT_DIR = os.path.dirname(os.path.realpath(__file__))
 OUT_DIR = os.path.join(OUT_DIR, "out")
@@ -459,6 +460,11 @@ if __name__ == "__main__":
         type=str,
     )
     parser.add_argument("--filename", help="Result scenario filename", default=None)
+    parser.add_argument(
+        "--route-cache",
+        help="Directory used to cache the interpolated routes between runs (default: disabled)",
+        default=None,
+    )
     parser.add_argument(
         "--outdir",
         help="Result scenario filename (default to the same directory as this file)",
@@ -475,5 +481,7 @@ if __name__ == "__main__":
     arguments.background_selection_method = background_selection_mapper(
         arguments.no_init, arguments.background_all
     )
+    if arguments.route_cache:
+        set_route_cache(RouteCache(arguments.route_cache))
     scenario_maker = ScenarioMaker(MAP_NAME, arguments)
     scenario_maker.generate_scenario()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Local stand-in of the decision module (DM) the HilsAgent talks to, to run and benchmark
+the HILS pipeline on a single machine.
+
+It subscribes to one of the sensor streams published by the HilsAgent and, after a
+configurable delay, answers each received message with a DM command, at the control port.
+Run it, and then the HILS agent with ZMQ_SRC=127.0.0.1:
+
+    python loopback_dm.py --delay 0.05
+    ZMQ_SRC=127.0.0.1 ./runtram.sh
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import random
+import struct
+import time
+
+import zmq
+
+
+def encode_command(command, command_format):
+    """
+    Encodes a DM command for the ControlHandler of the HilsAgent
+    """
+    if command_format == 'int32':
+        return struct.pack('<i', command)
+    return str(command).encode('utf-8')
+
+
+def main():
+    """
+    main function
+    """
+    description = "Local stand-in of the decision module used by the HILS agent"
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='IP of the host publishing the sensor data (default: 127.0.0.1)')
+    parser.add_argument('--trigger-port', default=os.getenv("ZMQ_GNSS_PORT", 5557),
+                        help='Port of the sensor stream answered by the DM (default: the GNSS one)')
+    parser.add_argument('--control-port', default=os.getenv("ZMQ_CONTROL_PORT", 5556),
+                        help='Port the DM commands are published at')
+    parser.add_argument('--delay', default=0.05, type=float,
+                        help='Time [s] the DM takes to answer (default: 0.05)')
+    parser.add_argument('--jitter', default=0.0, type=float,
+                        help='Maximum random time [s] added to the delay (default: 0)')
+    parser.add_argument('--command', default=1, type=int,
+                        help='DM command answered to each message (default: 1)')
+    parser.add_argument('--format', default='string', choices=['string', 'int32'],
+                        help='Encoding of the DM command (default: string)')
+    args = parser.parse_args()
+
+    context = zmq.Context()
+
+    trigger_socket = context.socket(zmq.SUB)
+    # Only answer the newest data, as the real DM would if it falls behind
+    trigger_socket.setsockopt(zmq.CONFLATE, 1)
+    trigger_socket.setsockopt(zmq.SUBSCRIBE, b"")
+    trigger_socket.connect("tcp://{}:{}".format(args.host, args.trigger_port))
+
+    control_socket = context.socket(zmq.PUB)
+    control_socket.bind("tcp://*:{}".format(args.control_port))
+
+    message = encode_command(args.command, args.format)
+    print("Loopback DM: answering tcp://{}:{} at port {} after {:.3f} s (+{:.3f} s jitter)".format(
+        args.host, args.trigger_port, args.control_port, args.delay, args.jitter))
+
+    answered = 0
+    try:
+        while True:
+            trigger_socket.recv()
+            time.sleep(args.delay + random.uniform(0.0, args.jitter))
+            control_socket.send(message)
+            answered += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("Loopback DM: answered {} messages".format(answered))
+        trigger_socket.close(linger=0)
+        control_socket.close(linger=0)
+        context.term()
+
+
+if __name__ == '__main__':
+    main()
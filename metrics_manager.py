@@ -14,18 +14,31 @@ Welcome to the ScenarioRunner's metric module
 This is the main script to be executed when running a metric.
 It is responsible of parsing all the information and executing
 the metric specified by the user.
+
+It can also evaluate a set of metrics over many recorder files at once (batch mode),
+in parallel, aggregating all the results into a summary.
 """
 
+from __future__ import print_function
+
 import os
 import sys
+import csv
+import glob
 import importlib
 import inspect
 import json
+import multiprocessing
+import threading
+import time
+import traceback
 import argparse
 from argparse import RawTextHelpFormatter
 
 import carla
 from srunner.metrics.tools.metrics_log import MetricsLog
+from srunner.metrics.tools.metrics_parser import MetricsParser
+from srunner.metrics.tools.recorder_cache import RecorderCache
 
 
 class MetricsManager(object):
@@ -34,36 +47,92 @@ class MetricsManager(object):
     the metrics.
     """
 
-    def __init__(self, args):
+    def __init__(self, args, server_lock=None):
         """
-        Initialization of the metrics manager. This creates the client, needed to parse
-        the information from the recorder, extract the metrics class, and runs it
+        Initialization of the metrics manager.
+
+        Args:
+            args: arguments of the metrics manager
+            server_lock: lock held while using the server, shared by all the batch workers
         """
         self._args = args
+        self._client = None
+        self._server_lock = server_lock if server_lock is not None else threading.Lock()
 
+    def run(self):
+        """
+        Creates the client, needed to parse the information from the recorder,
+        extract the metrics class, and runs it.
+
+        If a cache is given and the recorder has already been parsed, its information
+        and map are taken from the cache instead, without connecting to the server.
+        """
         # Parse the arguments
-        recorder_str = self._get_recorder(self._args.log)
+        recorder_file = self._get_recorder_file(self._args.log)
         criteria_dict = self._get_criteria(self._args.criteria)
 
-        # Get the correct world and load it
-        map_name = self._get_recorder_map(recorder_str)
-        world = self._client.load_world(map_name)
-        town_map = world.get_map()
+        # Get the parsed recorder and the map the simulation took place in
+        recorder_log, town_map = self._get_recorder_log(recorder_file)
 
         # Instanciate the MetricsLog, used to querry the needed information
-        log = MetricsLog(recorder_str)
+        log = MetricsLog(recorder_log)
 
         # Read and run the metric class
-        metric_class = self._get_metric_class(self._args.metric)
-        metric_class(town_map, log, criteria_dict)
+        for metric_file in self._args.metric:
+            metric_class = self._get_metric_class(metric_file)
+            metric_class(town_map, log, criteria_dict)
 
-    def _get_recorder(self, log):
-        """
-        Parses the log argument into readable information
+    def evaluate(self, recorder_file, metric_files, criteria_file):
         """
+        Runs the metrics over a recorder file, returning a list with the result of each of them.
+        Errors are reported as part of the results instead of being raised.
 
-        # Get the log information.
-        self._client = carla.Client(self._args.host, int(self._args.port))
+        Args:
+            recorder_file (str): path to the recorder file
+            metric_files (list): paths to the .py files defining the metrics
+            criteria_file (str): path to the .json file with the criteria information, if any
+        """
+        results = []
+
+        def add_result(metric_file, start_time, status, error=None, metric_results=None):
+            results.append({
+                "log": recorder_file,
+                "metric": metric_file,
+                "status": status,
+                "duration": round(time.time() - start_time, 3),
+                "error": error,
+                "results": metric_results
+            })
+
+        start_time = time.time()
+        try:
+            criteria_dict = self._get_criteria(criteria_file)
+            recorder_log, town_map = self._get_recorder_log(recorder_file)
+            log = MetricsLog(recorder_log)
+        except (Exception, SystemExit):  # pylint: disable=broad-except
+            error = traceback.format_exc()
+            for metric_file in metric_files:
+                add_result(metric_file, start_time, "error", error)
+            return results
+
+        for metric_file in metric_files:
+            start_time = time.time()
+            try:
+                metric_class = self._get_metric_class(metric_file)
+                metric = metric_class(town_map, log, criteria_dict)
+
+                # Keep only the JSON serializable information of the results
+                metric_results = json.loads(json.dumps(metric.results, default=str))
+                add_result(metric_file, start_time, "success", metric_results=metric_results)
+            except (Exception, SystemExit):  # pylint: disable=broad-except
+                add_result(metric_file, start_time, "error", traceback.format_exc())
+
+        return results
+
+    def _get_recorder_file(self, log):
+        """
+        Returns the path to the recorder file given by the log argument
+        """
         recorder_file = "{}/{}".format(os.getenv('SCENARIO_RUNNER_ROOT', "./"), log)
 
         # Check that the file is correct
@@ -74,6 +143,47 @@ class MetricsManager(object):
             print("ERROR: The specified log file does not exist")
             sys.exit(-1)
 
+        return recorder_file
+
+    def _get_recorder_log(self, recorder_file):
+        """
+        Returns the parsed recorder (RecorderLog) and the carla.Map of the simulation,
+        either from the cache or from the server
+        """
+        cache = None
+        if self._args.cache:
+            cache = RecorderCache(os.path.join(os.getenv('SCENARIO_RUNNER_ROOT', "./"), self._args.cache))
+            key = cache.get_key(recorder_file)
+
+            if self._args.rebuild_cache:
+                cache.invalidate(key)
+            else:
+                entry = cache.load(key)
+                if entry is not None:
+                    recorder_log, opendrive = entry
+                    town_map = carla.Map(recorder_log.simulation["map"], opendrive)
+                    return recorder_log, town_map
+
+        with self._server_lock:
+            recorder_str = self._get_recorder(recorder_file)
+
+            # Get the correct world and load it
+            map_name = self._get_recorder_map(recorder_str)
+            world = self._client.load_world(map_name)
+            town_map = world.get_map()
+
+        recorder_log = MetricsParser(recorder_str).parse()
+
+        if cache is not None:
+            cache.store(key, recorder_log, town_map.to_opendrive())
+
+        return recorder_log, town_map
+
+    def _get_recorder(self, recorder_file):
+        """
+        Gets the information of the recorder file from the server
+        """
+        self._client = carla.Client(self._args.host, int(self._args.port))
         recorder_str = self._client.show_recorder_file_info(recorder_file, True)
 
         return recorder_str
@@ -124,6 +234,150 @@ class MetricsManager(object):
         return sim_map
 
 
+class BatchMetricsManager(object):
+    """
+    Evaluates a set of metrics over many recorder files, distributing the recorder files
+    among a pool of worker processes. The results are aggregated into a JSON summary
+    (and a CSV one next to it), which is updated as soon as each recorder file is done.
+
+    Metrics that already succeeded in a previous summary are not evaluated again.
+    """
+
+    def __init__(self, args):
+        self._args = args
+        self._summary_file = args.summary
+        self._csv_file = os.path.splitext(args.summary)[0] + ".csv"
+        self._results = self._load_summary()
+
+    def _load_summary(self):
+        """
+        Returns the results of a previous summary, if any
+        """
+        if not os.path.exists(self._summary_file):
+            return []
+
+        with open(self._summary_file) as fd:
+            return json.load(fd)["results"]
+
+    def _get_criteria_file(self, recorder_file):
+        """
+        Returns the criteria of a recorder file. By default, the .json file
+        with the same name, created alongside it by ScenarioRunner's recorder.
+        """
+        if self._args.criteria:
+            return self._args.criteria
+
+        criteria_file = recorder_file[:-4] + ".json"
+        if os.path.exists(criteria_file):
+            return criteria_file
+
+        return ""
+
+    def run(self):
+        """
+        Evaluates all the pending (recorder file, metric) pairs
+        """
+        done = set((result["log"], result["metric"]) for result in self._results
+                   if result["status"] == "success")
+        self._results = [result for result in self._results if (result["log"], result["metric"]) in done]
+
+        jobs = []
+        for recorder_file in get_recorder_files(self._args.log):
+            metric_files = [metric for metric in self._args.metric if (recorder_file, metric) not in done]
+            if metric_files:
+                jobs.append((recorder_file, metric_files, self._get_criteria_file(recorder_file)))
+
+        print("Evaluating {} recorder files ({} already done)".format(
+            len(jobs), len(set(log for log, _ in done))))
+        if not jobs:
+            self._write_summary()
+            return
+
+        workers = max(1, min(self._args.workers, len(jobs)))
+        server_lock = multiprocessing.Lock()
+        pool = multiprocessing.Pool(workers, initializer=_init_batch_worker, initargs=(self._args, server_lock))
+        try:
+            for i, results in enumerate(pool.imap_unordered(_evaluate_batch_job, jobs)):
+                for result in results:
+                    print("[{}/{}] {} - {}: {}".format(
+                        i + 1, len(jobs), result["log"], os.path.basename(result["metric"]), result["status"]))
+                self._results.extend(results)
+                self._write_summary()
+        finally:
+            pool.close()
+            pool.join()
+
+        failed = [result for result in self._results if result["status"] != "success"]
+        print("Done. {} results, {} failed. Summary at {}".format(
+            len(self._results), len(failed), self._summary_file))
+
+    def _write_summary(self):
+        """
+        Writes the aggregated results into the JSON and CSV summaries
+        """
+        summary_dir = os.path.dirname(self._summary_file)
+        if summary_dir and not os.path.exists(summary_dir):
+            os.makedirs(summary_dir)
+
+        results = sorted(self._results, key=lambda result: (result["log"], result["metric"]))
+
+        # Write to a temporary file first, so that an interrupted run never leaves a partial summary
+        temp_file = self._summary_file + ".tmp"
+        with open(temp_file, 'w') as fd:
+            json.dump({"results": results}, fd, sort_keys=False, indent=4)
+        os.replace(temp_file, self._summary_file)
+
+        # The CSV only has the scalar values of the metric results
+        result_keys = set()
+        for result in results:
+            if isinstance(result["results"], dict):
+                result_keys.update(k for k, v in result["results"].items() if not isinstance(v, (dict, list)))
+        result_keys = sorted(result_keys)
+
+        with open(self._csv_file, 'w') as fd:
+            writer = csv.writer(fd)
+            writer.writerow(["log", "metric", "status", "duration"] + result_keys)
+            for result in results:
+                metric_results = result["results"] if isinstance(result["results"], dict) else {}
+                writer.writerow([result["log"], result["metric"], result["status"], result["duration"]] +
+                                [metric_results.get(key, "") for key in result_keys])
+
+
+_BATCH_MANAGER = None
+
+
+def _init_batch_worker(args, server_lock):
+    """
+    Initializes the MetricsManager of a batch worker process
+    """
+    global _BATCH_MANAGER  # pylint: disable=global-statement
+
+    # Metrics plotting their results shouldn't block the workers
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    _BATCH_MANAGER = MetricsManager(args, server_lock)
+
+
+def _evaluate_batch_job(job):
+    """
+    Evaluates the metrics of a recorder file at a batch worker process
+    """
+    recorder_file, metric_files, criteria_file = job
+    return _BATCH_MANAGER.evaluate(recorder_file, metric_files, criteria_file)
+
+
+def get_recorder_files(log):
+    """
+    Returns the sorted list of recorder files given by the log argument, which can be
+    a .log file, a directory with .log files or a glob pattern
+    """
+    path = "{}/{}".format(os.getenv('SCENARIO_RUNNER_ROOT', "./"), log)
+
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.log")))
+
+    return sorted(recorder_file for recorder_file in glob.glob(path) if recorder_file.endswith('.log'))
+
+
 def main():
     """
     main function
@@ -139,16 +393,28 @@ def main():
     parser.add_argument('--port', '-p', default=2000,
                         help='TCP port to listen to (default: 2000)')
     parser.add_argument('--log', required=True,
-                        help='Path to the CARLA recorder .log file (relative to SCENARIO_RUNNER_ROOT).\nThis file is created by the record functionality at ScenarioRunner')
-    parser.add_argument('--metric', required=True,
-                        help='Path to the .py file defining the used metric.\nSome examples at srunner/metrics')
+                        help='Path to the CARLA recorder .log file (relative to SCENARIO_RUNNER_ROOT).\nThis file is created by the record functionality at ScenarioRunner.\nA directory or a glob pattern evaluates all the matching .log files (batch mode)')
+    parser.add_argument('--metric', required=True, nargs='+',
+                        help='Path to the .py file(s) defining the used metric(s).\nSome examples at srunner/metrics')
     parser.add_argument('--criteria', default="",
-                        help='Path to the .json file with the criteria information.\nThis file is created by the record functionality at ScenarioRunner')
+                        help='Path to the .json file with the criteria information.\nThis file is created by the record functionality at ScenarioRunner.\nIn batch mode, defaults to the .json file next to each .log file')
+    parser.add_argument('--cache', default='',
+                        help='Directory (relative to SCENARIO_RUNNER_ROOT) where the parsed recorder files are cached, e.g. out/metrics_cache.\nThis allows the metrics to be re-run without a server (default: disabled)')
+    parser.add_argument('--rebuild-cache', action="store_true",
+                        help='Parse the recorder file again, even if it is already cached')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                        help='Batch mode: Maximum number of parallel worker processes (default: number of CPUs)')
+    parser.add_argument('--summary', default='srunner/metrics/data/summary.json',
+                        help='Batch mode: JSON file aggregating the results, also written as a .csv file next to it.\nMetrics that already succeeded in it are not evaluated again (default: srunner/metrics/data/summary.json)')
     # pylint: enable=line-too-long
 
     args = parser.parse_args()
 
-    MetricsManager(args)
+    recorder_path = "{}/{}".format(os.getenv('SCENARIO_RUNNER_ROOT', "./"), args.log)
+    if os.path.isdir(recorder_path) or any(char in args.log for char in "*?["):
+        BatchMetricsManager(args).run()
+    else:
+        MetricsManager(args).run()
 
 if __name__ == "__main__":
     sys.exit(main())
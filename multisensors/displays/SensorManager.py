@@ -13,10 +13,12 @@ from typing import Union, Tuple
 from multisensors.sensors.GnssSensor import GnssSensor
 from multisensors.sensors.RadarSensor import RadarSensor
 from multisensors.utils.CustomTimer import CustomTimer
+from srunner.autoagents.sensor_worker import SensorWorker
 
 
 class SensorManager:
-    def __init__(self, world, hud, sensor_type, name, transform_dict, attached, sensor_options, display_pos):
+    def __init__(self, world, hud, sensor_type, name, transform_dict, attached, sensor_options, display_pos,
+                 worker_options=None):
         self.surface = None
         self.world = world
         self.hud = hud
@@ -26,6 +28,8 @@ class SensorManager:
         self.attached = attached
         self.sensor_options = sensor_options
         self.display_pos = display_pos
+        self.worker_options = worker_options
+        self.worker = None
         print(f"Spawning {sensor_type}: {name}...", end="")
         self.sensor = self.init_sensor(sensor_type, transform_dict, attached, sensor_options)
         if self.sensor is not None:
@@ -102,7 +106,7 @@ class SensorManager:
                 camera_bp.set_attribute(key, sensor_options[key])
 
             camera = self.world.spawn_actor(camera_bp, transform, attach_to=attached)
-            camera.listen(self.save_rgb_image)
+            camera.listen(self._get_listener(self.save_rgb_image))
 
             return camera
 
@@ -121,7 +125,7 @@ class SensorManager:
 
             lidar = self.world.spawn_actor(lidar_bp, transform, attach_to=attached)
 
-            lidar.listen(self.save_lidar_image)
+            lidar.listen(self._get_listener(self.save_lidar_image))
 
             return lidar
 
@@ -134,7 +138,7 @@ class SensorManager:
 
             lidar = self.world.spawn_actor(lidar_bp, transform, attach_to=attached)
 
-            lidar.listen(self.save_semanticlidar_image)
+            lidar.listen(self._get_listener(self.save_semanticlidar_image))
 
             return lidar
 
@@ -148,9 +152,25 @@ class SensorManager:
             print(f"Sensor type: {sensor_type} is not known.")
             return None
 
+    def _get_listener(self, process):
+        """
+        Returns the sensor callback. If worker options are given, the data is processed
+        by a SensorWorker instead of at the CARLA sensor thread
+        """
+        if self.worker_options is None:
+            return process
+        self.worker = SensorWorker(process, name=self.name, **self.worker_options)
+        return self.worker.submit
+
+    def _stop_worker(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+
     def flip(self):
         self.sensor.stop()
         self.sensor.destroy()
+        self._stop_worker()
         self.transform_dict['yaw'] = self.transform_dict.get('yaw', 00) + 180
         self.sensor = self.init_sensor(self.type, self.transform_dict, self.attached, self.sensor_options)
 
@@ -245,6 +265,7 @@ class SensorManager:
             print("already destroyed")
             return
         self.sensor.stop()
+        self._stop_worker()
         print("done")
 
     def destroy(self):
@@ -253,4 +274,5 @@ class SensorManager:
             print("already destroyed")
             return
         self.sensor.destroy()
+        self._stop_worker()
         print("done")
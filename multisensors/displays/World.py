@@ -78,7 +78,8 @@ class World(object):
                 sensor.get('transform', None),
                 self.player,
                 sensor.get('options', None),
-                sensor.get('grid', None)
+                sensor.get('grid', None),
+                sensor.get('worker', None)
             )
             if sensor['type'] == "GNSS":
                 self.gnss_sensor = sensor_man.sensor
@@ -33,6 +33,7 @@ import logging, logging.config
 
 import carla
 
+from srunner.autoagents.sensor_recorder import SensorRecorder
 from srunner.scenarioconfigs.openscenario_configuration import OpenScenarioConfiguration
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
 from srunner.scenariomanager.scenario_manager import ScenarioManager
@@ -41,6 +42,8 @@ from srunner.scenarios.route_scenario import RouteScenario
 from srunner.tools.custom_scenario_parser import CustomScenarioConfigurationParser
 from srunner.tools.scenario_parser import ScenarioConfigurationParser
 from srunner.tools.route_parser import RouteParser
+from srunner.tools.route_cache import RouteCache
+from srunner.tools.route_manipulation import set_route_cache, get_route_cache
 
 # Version of scenario_runner
 VERSION = '0.9.12'
@@ -84,6 +87,7 @@ class ScenarioRunner(object):
 
     agent_instance = None
     module_agent = None
+    sensor_recorder = None
     target_dir = None
 
     def __init__(self, args):
@@ -113,8 +117,21 @@ class ScenarioRunner(object):
             sys.path.insert(0, os.path.dirname(args.agent))
             self.module_agent = importlib.import_module(module_name)
 
+        # Reuse already interpolated routes if requested
+        if self._args.routeCache:
+            route_cache = RouteCache(self._args.routeCache)
+            if self._args.clearRouteCache:
+                route_cache.invalidate()
+            set_route_cache(route_cache)
+
         # Create the ScenarioManager
-        self.manager = ScenarioManager(self._args.debug, self._args.sync, self._args.timeout)
+        self.manager = ScenarioManager(self._args.debug, self._args.sync, self._args.timeout,
+                                       bool(self._args.profileTicks), self._args.profileBehaviors,
+                                       self._args.headless)
+
+        # Simulated and wall time of all the scenarios, reported in headless mode
+        self._simulated_time = 0.0
+        self._wall_time = 0.0
 
         # Create signal handler for SIGINT
         self._shutdown_requested = False
@@ -200,6 +217,14 @@ class ScenarioRunner(object):
 
         self.manager.cleanup()
 
+        if self.sensor_recorder is not None:
+            self.sensor_recorder.close()
+            print("Recorded {} sensor frames ({} dropped)".format(
+                self.sensor_recorder.recorded, self.sensor_recorder.dropped))
+            if self.agent_instance is not None:
+                self.agent_instance.sensor_interface.set_recorder(None)
+            self.sensor_recorder = None
+
         CarlaDataProvider.cleanup()
 
         for i, _ in enumerate(self.ego_vehicles):
@@ -277,6 +302,12 @@ class ScenarioRunner(object):
             os.makedirs(result_dir, exist_ok=True)
             filename = os.path.join(result_dir, filename)
 
+        if self._args.profileTicks and self.manager.tick_profiler is not None:
+            self.manager.tick_profiler.export(
+                config_name + current_time + "_ticks." + self._args.profileTicks)
+        if self._args.profileBehaviors and self.manager.behavior_profiler is not None:
+            self.manager.behavior_profiler.write_collapsed(config_name + current_time + "_behaviors.folded")
+
         if not self.manager.analyze_scenario(self._args.output, filename, junit_filename, json_filename):
             print("All scenario tests were passed successfully!")
         else:
@@ -380,8 +411,8 @@ class ScenarioRunner(object):
                 # don't print Agent's log if debug scenario
                 is_print_log = False if self._args.debug_scenario else True
                 agent_class = getattr(self.module_agent, agent_class_name)
-                if hasattr(agent_class, "with_gui"):
-                    pass
+                if self._args.headless and hasattr(agent_class, "with_gui"):
+                    agent_class.with_gui = False
                 self.agent_instance = agent_class(self._args.agentConfig, is_print_log=is_print_log)
 
                 config.agent = self.agent_instance
@@ -435,11 +466,20 @@ class ScenarioRunner(object):
                     os.getenv('SCENARIO_RUNNER_ROOT', "./"), self._args.record, config.name)
                 self.client.start_recorder(recorder_name, True)
 
+            if self._args.recordSensors and self.agent_instance is not None:
+                # One recording per run, so that repetitions don't overwrite each other
+                current_time = str(datetime.now().strftime('%Y-%m-%d-%H-%M-%S'))
+                self.sensor_recorder = SensorRecorder(os.path.join(
+                    os.getenv('SCENARIO_RUNNER_ROOT', "./"), self._args.recordSensors, config.name + current_time))
+                self.agent_instance.sensor_interface.set_recorder(self.sensor_recorder)
+
             # Load scenario and run it
             if hasattr(self.agent_instance, "set_egovehicle"):
                 self.agent_instance.set_egovehicle(scenario.ego_vehicles[0])
             self.manager.load_scenario(scenario, self.agent_instance)
             self.manager.run_scenario()
+            self._simulated_time += self.manager.scenario_duration_game
+            self._wall_time += self.manager.scenario_duration_system
 
             # Provide outputs if required
             self._analyze_scenario(config)
@@ -508,6 +548,10 @@ class ScenarioRunner(object):
                 result = self._load_and_run_scenario(config)
 
                 self._cleanup()
+
+        if get_route_cache() is not None:
+            route_cache_stats = get_route_cache().get_stats()
+            print("Route cache: {} hits, {} misses".format(route_cache_stats['hits'], route_cache_stats['misses']))
         return result
 
     def _run_openscenario(self):
@@ -544,6 +588,10 @@ class ScenarioRunner(object):
         else:
             result = self._run_scenarios()
 
+        if self._args.headless and self._wall_time > 0:
+            print("Simulated {:.1f} s in {:.1f} s ({:.2f} simulated seconds per wall second)".format(
+                self._simulated_time, self._wall_time, self._simulated_time / self._wall_time))
+
         print("No more scenarios .... Exiting")
         return result
 
@@ -571,6 +619,9 @@ def main():
                         help='Seed used by the TrafficManager (default: 0)')
     parser.add_argument('--sync', action='store_true',
                         help='Forces the simulation to run synchronously')
+    parser.add_argument('--headless', action='store_true',
+                        help='Runs without any GUI and as fast as possible, for batch runs.\n'
+                        'Forces the synchronous mode, with a fixed time step, and reports the simulated seconds per wall second')
     parser.add_argument('--list', action="store_true", help='List all supported scenarios and exit')
 
     parser.add_argument(
@@ -599,10 +650,21 @@ def main():
                         help='Reload the CARLA world before starting a scenario (default=True)')
     parser.add_argument('--record', type=str, default='',
                         help='Path were the files will be saved, relative to SCENARIO_RUNNER_ROOT.\nActivates the CARLA recording feature and saves to file all the criteria information.')
+    parser.add_argument('--recordSensors', type=str, default='',
+                        help='Path were the sensor data of the agent will be saved, relative to SCENARIO_RUNNER_ROOT.\nActivates the recording of the agent sensors into memory-mapped files, one directory per run.')
+    parser.add_argument('--profileTicks', nargs='?', const='csv', default='', choices=['csv', 'npz'],
+                        help='Profile the phases of each tick, print their percentiles and export the samples '
+                        'to the output directory (csv [default] or npz)')
+    parser.add_argument('--profileBehaviors', nargs='?', const=20, default=0, type=int,
+                        help='Profile the behaviors of the scenario tree, print the top N [default: 20] and export '
+                        'their self time as collapsed stacks (flame graph input) to the output directory')
     parser.add_argument('--randomize', action="store_true", help='Scenario parameters are randomized')
     parser.add_argument('--repetitions', default=1, type=int, help='Number of scenario executions')
     parser.add_argument('--waitForEgo', action="store_true", help='Connect the scenario to an existing ego vehicle')
     parser.add_argument('--target-dir', default=None, help='Directory where the scenario files are located')
+    parser.add_argument('--routeCache', default='',
+                        help='Directory used to cache the interpolated routes between runs (default: disabled)')
+    parser.add_argument('--clearRouteCache', action="store_true", help='Remove all the entries of the route cache')
 
     arguments = parser.parse_args()
     # pylint: enable=line-too-long
@@ -636,7 +698,7 @@ def main():
     if arguments.route:
         arguments.reloadWorld = True
 
-    if arguments.agent:
+    if arguments.agent or arguments.headless:
         arguments.sync = True
 
     log_level = logging.INFO
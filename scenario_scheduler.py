@@ -0,0 +1,416 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Welcome to the ScenarioRunner's scheduler
+
+Runs many scenario_runner.py jobs in parallel, over several CARLA servers.
+
+The routes (or scenarios) and their repetitions are split into (config, repetition, seed)
+jobs, which are dispatched to one worker per server. Each worker runs its jobs one after
+another, as scenario_runner.py processes bound to the port and traffic manager port of its
+server. Failed jobs are retried, workers whose server stops responding are retired, and
+all the results are aggregated into a single report.
+
+The scheduler can be tried without CARLA, against local stand-in servers (--standin).
+"""
+
+from __future__ import print_function
+
+import argparse
+from argparse import RawTextHelpFormatter
+import glob
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+
+
+def get_route_ids(routes_file, single_route=None):
+    """
+    Returns the ids of the routes of a routes file, or only the given one
+    """
+    if single_route is not None:
+        return [single_route]
+    tree = ET.parse(routes_file)
+    return [route.attrib['id'] for route in tree.iter("route")]
+
+
+def get_jobs(args):
+    """
+    Returns the list of jobs, one per (config, repetition), each with its own seed
+    """
+    if args.route:
+        single_route = args.route[2] if len(args.route) > 2 else None
+        configs = [("route_{}".format(route_id), ['--route', args.route[0], args.route[1], route_id])
+                   for route_id in get_route_ids(args.route[0], single_route)]
+    else:
+        configs = [(args.scenario, ['--scenario', args.scenario])]
+
+    jobs = []
+    for name, config_args in configs:
+        for repetition in range(args.repetitions):
+            seed = args.seed + repetition
+            jobs.append({
+                'name': "{}_rep{}".format(name, repetition),
+                'config': name,
+                'repetition': repetition,
+                'seed': seed,
+                'args': config_args,
+                'attempts': [],
+            })
+    return jobs
+
+
+def is_server_alive(host, port, timeout=2.0):
+    """
+    Returns True if a server accepts connections at the given port
+    """
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout):
+            return True
+    except (OSError, ValueError):
+        return False
+
+
+class Worker(object):
+
+    """
+    Runs jobs against a single server
+
+    Args:
+        index (int): index of the worker
+        host (str): host of the server
+        port (int): port of the server
+        tm_port (int): traffic manager port used by the jobs of this worker
+    """
+
+    def __init__(self, index, host, port, tm_port):
+        self.index = index
+        self.host = host
+        self.port = port
+        self.tm_port = tm_port
+        self.jobs = 0
+        self.failures = 0
+        self.retired = False
+
+    def get_command(self, job, output_dir, args):
+        """
+        Returns the command running a job at this worker
+        """
+        if args.standin:
+            return [sys.executable, os.path.abspath(__file__), '--standin-job',
+                    self.host, str(self.port), output_dir, job['name']]
+
+        command = [sys.executable, args.runner,
+                   '--host', self.host,
+                   '--port', str(self.port),
+                   '--trafficManagerPort', str(self.tm_port),
+                   '--trafficManagerSeed', str(job['seed']),
+                   '--repetitions', '1',
+                   '--json', '--outputDir', output_dir]
+        return command + job['args'] + args.runner_args
+
+    def run(self, job, args):
+        """
+        Runs a job, returning the result of the attempt
+        """
+        attempt = len(job['attempts'])
+        output_dir = os.path.join(args.output_dir, job['name'], "attempt_{}".format(attempt))
+        os.makedirs(output_dir, exist_ok=True)
+
+        result = {'worker': self.index, 'port': self.port, 'status': 'failed', 'success': False,
+                  'duration': 0.0, 'output_dir': output_dir}
+
+        if not is_server_alive(self.host, self.port):
+            result['status'] = 'server_down'
+            return result
+
+        start_time = time.time()
+        with open(os.path.join(output_dir, "log.txt"), 'w') as log_file:
+            try:
+                returncode = subprocess.call(self.get_command(job, output_dir, args),
+                                             stdout=log_file, stderr=subprocess.STDOUT, timeout=args.job_timeout)
+            except subprocess.TimeoutExpired:
+                returncode = None
+        result['duration'] = time.time() - start_time
+
+        if returncode is None:
+            result['status'] = 'timeout'
+            return result
+
+        # The results of the scenario, written by --json
+        reports = glob.glob(os.path.join(output_dir, "*.json"))
+        if returncode != 0 or not reports:
+            result['status'] = 'failed'
+            result['returncode'] = returncode
+            return result
+
+        with open(reports[0]) as report_file:
+            report = json.load(report_file)
+        result['status'] = 'done'
+        result['success'] = bool(report.get('success', False))
+        result['criteria'] = report.get('criteria', [])
+        return result
+
+
+class JobScheduler(object):
+
+    """
+    Dispatches the jobs to the workers, retrying the failed ones up to max_attempts times,
+    preferably at workers they haven't failed at. The failures count against the job:
+    a worker is only retired once its server isn't reachable, before or after a job.
+    """
+
+    def __init__(self, jobs, workers, max_attempts=3):
+        self._jobs = jobs
+        self._workers = workers
+        self._max_attempts = max_attempts
+
+        self._queue = deque(jobs)
+        self._running = 0
+        self._condition = threading.Condition()
+
+    def _get_job(self, worker):
+        """
+        Returns the next job for the worker, or None if there are no more
+        """
+        with self._condition:
+            while True:
+                if worker.retired:
+                    return None
+                if self._queue:
+                    self._running += 1
+                    return self._pop_job(worker)
+                if self._running == 0:
+                    return None
+                # A running job may still fail and be queued again
+                self._condition.wait()
+
+    def _pop_job(self, worker):
+        """
+        Takes the first queued job that hasn't failed at the worker, or else the first one
+        """
+        for job in self._queue:
+            if all(attempt['worker'] != worker.index for attempt in job['attempts']):
+                self._queue.remove(job)
+                return job
+        return self._queue.popleft()
+
+    def _finish_job(self, worker, job, result):
+        with self._condition:
+            self._running -= 1
+            job['attempts'].append(result)
+            worker.jobs += 1
+
+            if result['status'] != 'done':
+                if result['status'] != 'server_down':
+                    worker.failures += 1
+                if result['status'] == 'server_down' or not result.get('server_alive', True):
+                    print("Scheduler: Retiring worker {} (port {})".format(worker.index, worker.port))
+                    worker.retired = True
+
+                # Attempts at a server that was down don't count
+                attempts = len([a for a in job['attempts'] if a['status'] != 'server_down'])
+                if attempts < self._max_attempts and not all(w.retired for w in self._workers):
+                    self._queue.append(job)
+
+            self._condition.notify_all()
+
+        print("Scheduler: {} at worker {}: {} ({:.1f} s)".format(
+            job['name'], worker.index, result['status'], result['duration']))
+
+    def _run_worker(self, worker, args):
+        while True:
+            job = self._get_job(worker)
+            if job is None:
+                return
+            try:
+                result = worker.run(job, args)
+            except Exception as e:  # pylint: disable=broad-except
+                result = {'worker': worker.index, 'port': worker.port, 'status': 'error: {}'.format(e),
+                          'success': False, 'duration': 0.0}
+            if result['status'] not in ('done', 'server_down'):
+                # Tell a failing job from a server that went down while running it
+                result['server_alive'] = is_server_alive(worker.host, worker.port)
+            self._finish_job(worker, job, result)
+
+    def run(self, args):
+        """
+        Runs all the jobs, returning once all of them are done or out of attempts
+        """
+        threads = [threading.Thread(target=self._run_worker, args=(worker, args), name="Worker-{}".format(i))
+                   for i, worker in enumerate(self._workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def get_report(self, wall_time):
+        """
+        Returns the aggregated report of all the jobs
+        """
+        jobs = []
+        for job in self._jobs:
+            last = job['attempts'][-1] if job['attempts'] else {'status': 'not_run', 'success': False}
+            jobs.append({
+                'name': job['name'],
+                'config': job['config'],
+                'repetition': job['repetition'],
+                'seed': job['seed'],
+                'status': last['status'],
+                'success': last['success'],
+                'attempts': job['attempts'],
+            })
+
+        return {
+            'jobs': jobs,
+            'total': len(jobs),
+            'done': len([job for job in jobs if job['status'] == 'done']),
+            'success': len([job for job in jobs if job['success']]),
+            'retried': len([job for job in jobs if len(job['attempts']) > 1]),
+            'wall_time': wall_time,
+            'workers': [{'index': worker.index, 'port': worker.port, 'tm_port': worker.tm_port, 'jobs': worker.jobs,
+                         'failures': worker.failures, 'retired': worker.retired} for worker in self._workers],
+        }
+
+
+def run_standin_server(port, delay, failure_rate):
+    """
+    Local stand-in of a CARLA server, answering each job after a delay, and failing some
+    of them. Only for trying the scheduler without CARLA
+    """
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", port))
+    server.listen(16)
+    while True:
+        connection, _ = server.accept()
+        with connection:
+            if not connection.recv(1024):
+                continue  # health check
+            time.sleep(delay)
+            connection.sendall(b"fail" if random.random() < failure_rate else b"done")
+
+
+def run_standin_job(host, port, output_dir, name):
+    """
+    Stand-in of a scenario_runner.py job, run against a stand-in server
+    """
+    with socket.create_connection((host, int(port)), timeout=60) as connection:
+        connection.sendall(name.encode('utf-8'))
+        answer = connection.recv(1024)
+    if answer != b"done":
+        return 1
+    with open(os.path.join(output_dir, name + ".json"), 'w') as fd:
+        json.dump({'scenario': name, 'success': True, 'criteria': []}, fd)
+    return 0
+
+
+def main():
+    """
+    main function
+    """
+    # pylint: disable=line-too-long
+    description = ("Scenario Runner's scheduler. Run scenarios and their repetitions in parallel over several CARLA servers.\n"
+                   "Arguments after '--' are given to every scenario_runner.py job, e.g. -- --agent <agent> --headless\n")
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--standin-job':
+        return run_standin_job(*sys.argv[2:6])
+
+    argv = sys.argv[1:]
+    runner_args = []
+    if '--' in argv:
+        runner_args = argv[argv.index('--') + 1:]
+        argv = argv[:argv.index('--')]
+
+    parser = argparse.ArgumentParser(description=description, formatter_class=RawTextHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='IP of the host of the servers (default: localhost)')
+    parser.add_argument('--ports', default=[2000], type=int, nargs='+',
+                        help='Ports of the servers, one worker each (default: 2000)')
+    parser.add_argument('--tm-ports', default=None, type=int, nargs='+',
+                        help='Traffic manager port of each worker (default: 8000, 8001, ...)')
+    parser.add_argument('--route', nargs='+', type=str,
+                        help='Routes to run (input: (route_file,scenario_file,[route id])), one job per route')
+    parser.add_argument('--scenario', help='Name of the scenario to run')
+    parser.add_argument('--repetitions', default=1, type=int, help='Number of executions of each route or scenario')
+    parser.add_argument('--seed', default=0, type=int,
+                        help='Traffic manager seed of the first repetition, the next ones add their repetition (default: 0)')
+    parser.add_argument('--max-attempts', default=3, type=int, help='Maximum attempts per job (default: 3)')
+    parser.add_argument('--job-timeout', default=None, type=float, help='Maximum duration [s] of a job (default: none)')
+    parser.add_argument('--output-dir', default='out/scheduler', help='Directory of the job outputs and the report')
+    parser.add_argument('--runner', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scenario_runner.py'),
+                        help='Path to scenario_runner.py')
+    parser.add_argument('--standin', action='store_true',
+                        help='Start local stand-in servers at the given ports, and run stand-in jobs against them')
+    parser.add_argument('--standin-delay', default=0.2, type=float, help='Duration [s] of the stand-in jobs')
+    parser.add_argument('--standin-failure-rate', default=0.0, type=float, help='Fraction of failed stand-in jobs')
+    parser.add_argument('--standin-server', default=None, type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    args.runner_args = runner_args
+    # pylint: enable=line-too-long
+
+    if args.standin_server is not None:
+        run_standin_server(args.standin_server, args.standin_delay, args.standin_failure_rate)
+        return 0
+
+    if not args.route and not args.scenario:
+        if not args.standin:
+            print("Please specify either a route or a scenario\n\n")
+            parser.print_help(sys.stdout)
+            return 1
+        args.scenario = "StandIn"
+
+    tm_ports = args.tm_ports or [8000 + i for i in range(len(args.ports))]
+    if len(tm_ports) != len(args.ports):
+        print("Please specify one traffic manager port per server port")
+        return 1
+
+    standin_servers = []
+    if args.standin:
+        for port in args.ports:
+            standin_servers.append(subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--standin-server', str(port),
+                 '--standin-delay', str(args.standin_delay), '--standin-failure-rate', str(args.standin_failure_rate)]))
+        time.sleep(1.0)
+
+    jobs = get_jobs(args)
+    workers = [Worker(i, args.host, port, tm_port) for i, (port, tm_port) in enumerate(zip(args.ports, tm_ports))]
+    print("Scheduler: {} jobs over {} workers".format(len(jobs), len(workers)))
+
+    scheduler = JobScheduler(jobs, workers, args.max_attempts)
+    start_time = time.time()
+    try:
+        scheduler.run(args)
+    finally:
+        for server in standin_servers:
+            server.terminate()
+            server.wait()
+
+    report = scheduler.get_report(time.time() - start_time)
+    os.makedirs(args.output_dir, exist_ok=True)
+    report_file = os.path.join(args.output_dir, "report.json")
+    with open(report_file, 'w') as fd:
+        json.dump(report, fd, indent=4)
+
+    print("Scheduler: {}/{} jobs done, {} successful, {} retried, in {:.1f} s".format(
+        report['done'], report['total'], report['success'], report['retried'], report['wall_time']))
+    for worker in report['workers']:
+        print("  worker {} (port {}): {} jobs, {} failures{}".format(
+            worker['index'], worker['port'], worker['jobs'], worker['failures'],
+            ", retired" if worker['retired'] else ""))
+    print("Scheduler: Report written to {}".format(report_file))
+
+    return 0 if report['done'] == report['total'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
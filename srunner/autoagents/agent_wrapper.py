@@ -31,6 +31,7 @@ class AgentWrapper(object):
         Set the autonomous agent
         """
         self._agent = agent
+        self._callbacks = []
 
     def __call__(self, clock = None):
         """
@@ -87,17 +88,33 @@ class AgentWrapper(object):
                 additional_sensor_process = self._agent.get_sensor_listener(sensor_spec['type'])
             else:
                 additional_sensor_process = None
-            sensor.listen(CallBack(sensor_spec['id'],
-                          sensor,
-                          self._agent.sensor_interface,
-                          additional_sensor_process))
+            callback = CallBack(sensor_spec['id'],
+                                sensor,
+                                self._agent.sensor_interface,
+                                additional_sensor_process,
+                                sensor_spec.get('worker'),
+                                CarlaDataProvider.is_sync_mode())
+            sensor.listen(callback)
             self._sensors_list.append(sensor)
+            self._callbacks.append(callback)
             sensor_ids.append(sensor_spec['id'])
 
         # Tick once to spawn the sensors
         CarlaDataProvider.get_world().tick()
         CarlaDataProvider.add_sensors(self._sensors_list, sensor_ids)
 
+    def get_sensor_statistics(self):
+        """
+        Returns the consumed and dropped frames, and latencies, of the agent's sensors,
+        as well as the statistics of their workers, if any
+        """
+        statistics = self._agent.sensor_interface.get_statistics()
+        for callback in self._callbacks:
+            worker_statistics = callback.get_worker_statistics()
+            if worker_statistics is not None and callback.tag in statistics:
+                statistics[callback.tag]['worker'] = worker_statistics
+        return statistics
+
     def cleanup(self):
         """
         Remove and destroy all sensors
@@ -108,3 +125,7 @@ class AgentWrapper(object):
                 self._sensors_list[i].destroy()
                 self._sensors_list[i] = None
         self._sensors_list = []
+
+        for callback in self._callbacks:
+            callback.stop()
+        self._callbacks = []
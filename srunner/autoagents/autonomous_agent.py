@@ -12,6 +12,7 @@ from __future__ import print_function
 import carla
 
 from srunner.autoagents.sensor_interface import SensorInterface
+from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
 from srunner.scenariomanager.timer import GameTime
 from srunner.tools.route_manipulation import downsample_route
 
@@ -57,6 +58,13 @@ class AutonomousAgent(object):
              'id': 'LIDAR'}
         ]
 
+        Optionally, a sensor can have its data processed by a SensorWorker, outside of the CARLA
+        sensor thread, by adding the worker options to its definition:
+
+            {..., 'id': 'Center', 'worker': {'queue_size': 2, 'drop_policy': 'block'}}
+
+        In synchronous mode, the workers always use the 'block' drop policy.
+
         """
         sensors = []
 
@@ -87,7 +95,11 @@ class AutonomousAgent(object):
         Execute the agent call, e.g. agent()
         Returns the next vehicle controls
         """
-        input_data = self.sensor_interface.get_data()
+        # In synchronous mode, all the sensor data is of the current frame
+        if CarlaDataProvider.is_sync_mode():
+            input_data = self.sensor_interface.get_data(GameTime.get_frame())
+        else:
+            input_data = self.sensor_interface.get_data()
 
         timestamp = GameTime.get_time()
         wallclock = GameTime.get_wallclocktime()
@@ -8,21 +8,19 @@ This file containts CallBack class and SensorInterface, responsible of
 handling the use of sensors for the agents
 """
 
-import copy
 import logging
+import threading
+import time
+from collections import deque
+from functools import partial
 from typing import Callable, Tuple
 
-try:
-    from queue import Queue
-    from queue import Empty
-except ImportError:
-    from Queue import Queue
-    from Queue import Empty
-
 import numpy as np
 
 import carla
 
+from srunner.autoagents.sensor_worker import SensorWorker
+
 
 class SensorReceivedNoData(Exception):
 
@@ -31,26 +29,133 @@ class SensorReceivedNoData(Exception):
     """
 
 
+class SensorBufferRing(object):
+
+    """
+    Preallocated buffers the raw data of a sensor is copied into, so that no memory
+    is allocated per frame. A buffer is in use from the moment the data is copied into it
+    until the SensorInterface recycles it, after handing it to the agent.
+
+    The buffers are (re)allocated the first time a frame doesn't fit in them. As the
+    amount of lidar points changes every frame, they are then given some headroom.
+
+    Args:
+        size (int): amount of buffers of the ring
+    """
+
+    def __init__(self, size=4):
+        self._size = size
+        self._free = deque()
+        self._capacity = 0
+        self._lock = threading.Lock()
+        self.allocations = 0
+
+    def acquire(self, nbytes):
+        """
+        Returns a free uint8 buffer of at least nbytes
+        """
+        with self._lock:
+            if nbytes > self._capacity:
+                if self._capacity == 0:
+                    self._capacity = nbytes
+                else:
+                    self._capacity = max(nbytes, int(1.25 * self._capacity))
+                self._free = deque(np.empty(self._capacity, dtype=np.uint8) for _ in range(self._size))
+                self.allocations += self._size
+
+            if self._free:
+                return self._free.popleft()
+
+            # All of them are still in use
+            self.allocations += 1
+            return np.empty(self._capacity, dtype=np.uint8)
+
+    def release(self, buffer):
+        """
+        Returns a buffer to the ring, once its data is no longer used
+        """
+        with self._lock:
+            if len(buffer) >= self._capacity and len(self._free) < self._size:
+                self._free.append(buffer)
+
+
 class CallBack(object):
 
     """
-    Class the sensors listen to in order to receive their data each frame
+    Class the sensors listen to in order to receive their data each frame.
+
+    The camera, lidar and radar data is copied once into a buffer of the sensor's ring,
+    and the agent receives views of it, which are only valid until its next step.
+
+    If worker options are given, the data is parsed and post-processed by a SensorWorker
+    instead of at the CARLA sensor thread (see SensorWorker for the available options).
+    In synchronous mode, the agent waits for the data of every frame, so the worker
+    always blocks instead of dropping data.
     """
 
-    def __init__(self, tag, sensor, data_provider, additional_process: Tuple[Callable, None] = None):
+    def __init__(self, tag, sensor, data_provider, additional_process: Tuple[Callable, None] = None,
+                 worker_options=None, synchronous=False):
         """
         Initializes the call back
         """
         self._tag = tag
         self._data_provider = data_provider
+        self._buffers = SensorBufferRing()
 
         self._data_provider.register_sensor(tag, sensor)
         self._additional_process = additional_process
 
+        self._worker = None
+        if worker_options is not None:
+            worker_options = dict(worker_options)
+            if synchronous and worker_options.get('drop_policy', SensorWorker.DROP_OLDEST) != SensorWorker.BLOCK:
+                if 'drop_policy' in worker_options:
+                    logging.warning("The worker of sensor [%s] can't drop data in synchronous mode, "
+                                    "using the '%s' policy instead", tag, SensorWorker.BLOCK)
+                worker_options['drop_policy'] = SensorWorker.BLOCK
+            self._worker = SensorWorker(self._process, name=tag, on_drop=self._on_drop, **worker_options)
+
     def __call__(self, data):
         """
         call function
         """
+        if self._worker is not None:
+            self._worker.submit(data)
+        else:
+            self._process(data)
+
+    @property
+    def tag(self):
+        """
+        Tag of the sensor
+        """
+        return self._tag
+
+    def get_worker_statistics(self):
+        """
+        Returns the statistics of the sensor worker, or None if the data is processed inline
+        """
+        if self._worker is None:
+            return None
+        return self._worker.get_statistics()
+
+    def stop(self):
+        """
+        Stops the sensor worker, if any
+        """
+        if self._worker is not None:
+            self._worker.stop()
+
+    def _on_drop(self, data):
+        """
+        Tells the data provider the worker dropped the data of a frame
+        """
+        self._data_provider.drop_sensor_frame(self._tag, data.frame)
+
+    def _process(self, data):
+        """
+        Parses the sensor data and runs the additional process
+        """
         if isinstance(data, carla.Image):
             self._parse_image_cb(data, self._tag)
         elif isinstance(data, carla.LidarMeasurement):
@@ -67,35 +172,43 @@ class CallBack(object):
         if self._additional_process:
             self._additional_process(data)
 
+    def _copy_to_buffer(self, raw_data, dtype):
+        """
+        Copies the raw data of a sensor into a buffer of the ring.
+        Returns the buffer and a view of the copied data with the given type
+        """
+        raw = np.frombuffer(raw_data, dtype=np.dtype("uint8"))
+        buffer = self._buffers.acquire(len(raw))
+        array = buffer[:len(raw)]
+        np.copyto(array, raw)
+        return buffer, array.view(dtype)
+
     # Parsing CARLA physical Sensors
     def _parse_image_cb(self, image, tag):
         """
         parses cameras
         """
-        array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-        array = copy.deepcopy(array)
+        buffer, array = self._copy_to_buffer(image.raw_data, np.dtype("uint8"))
         array = np.reshape(array, (image.height, image.width, 4))
-        self._data_provider.update_sensor(tag, array, image.frame)
+        self._data_provider.update_sensor(tag, array, image.frame, partial(self._buffers.release, buffer))
 
     def _parse_lidar_cb(self, lidar_data, tag):
         """
         parses lidar sensors
         """
-        points = np.frombuffer(lidar_data.raw_data, dtype=np.dtype('f4'))
-        points = copy.deepcopy(points)
+        buffer, points = self._copy_to_buffer(lidar_data.raw_data, np.dtype('f4'))
         points = np.reshape(points, (int(points.shape[0] / 4), 4))
-        self._data_provider.update_sensor(tag, points, lidar_data.frame)
+        self._data_provider.update_sensor(tag, points, lidar_data.frame, partial(self._buffers.release, buffer))
 
     def _parse_radar_cb(self, radar_data, tag):
         """
         parses radar sensors
         """
         # [depth, azimuth, altitute, velocity]
-        points = np.frombuffer(radar_data.raw_data, dtype=np.dtype('f4'))
-        points = copy.deepcopy(points)
+        buffer, points = self._copy_to_buffer(radar_data.raw_data, np.dtype('f4'))
         points = np.reshape(points, (int(points.shape[0] / 4), 4))
         points = np.flip(points, 1)
-        self._data_provider.update_sensor(tag, points, radar_data.frame)
+        self._data_provider.update_sensor(tag, points, radar_data.frame, partial(self._buffers.release, buffer))
 
     def _parse_gnss_cb(self, gnss_data, tag):
         """
@@ -124,7 +237,10 @@ class CallBack(object):
 class SensorInterface(object):
 
     """
-    Class that contains all sensor data
+    Class that contains all sensor data.
+
+    The data of each sensor is kept in slots keyed by its frame number, so that the agent
+    is given the data of all its sensors at exactly the same frame.
     """
 
     def __init__(self):
@@ -132,9 +248,27 @@ class SensorInterface(object):
         Initializes the class
         """
         self._sensors_objects = {}
-        self._new_data_buffers = Queue()
         self._queue_timeout = 10
 
+        # Per sensor dictionary of {frame: (data, release, arrival time)}
+        self._slots = {}
+        # Per sensor set of the frames whose data was dropped before reaching the slots
+        self._missed_frames = {}
+        self._slots_condition = threading.Condition()
+        self._last_frame = -1
+
+        # Functions recycling the buffers of the data given to the agent at its last step
+        self._pending_releases = []
+
+        # Optional SensorRecorder the sensor data is also given to
+        self._recorder = None
+
+        # Per sensor statistics
+        self._dropped_frames = {}
+        self._consumed_frames = {}
+        self._latency_sum = {}
+        self._latency_max = {}
+
     def register_sensor(self, tag, sensor):
         """
         Registers the sensors
@@ -143,28 +277,137 @@ class SensorInterface(object):
             raise ValueError("Duplicated sensor tag [{}]".format(tag))
 
         self._sensors_objects[tag] = sensor
+        with self._slots_condition:
+            self._slots[tag] = {}
+            self._missed_frames[tag] = set()
+            self._dropped_frames[tag] = 0
+            self._consumed_frames[tag] = 0
+            self._latency_sum[tag] = 0.0
+            self._latency_max[tag] = 0.0
+
+    def set_recorder(self, recorder):
+        """
+        Sets the SensorRecorder all the sensor data is recorded with, or None to stop recording
+        """
+        self._recorder = recorder
 
-    def update_sensor(self, tag, data, timestamp):
+    def update_sensor(self, tag, data, timestamp, release=None):
         """
         Updates the sensor
+
+        Args:
+            timestamp (int): frame number of the data
+            release (callable): called once the data is no longer used, to recycle its buffer
         """
         if tag not in self._sensors_objects:
             raise ValueError("The sensor with tag [{}] has not been created!".format(tag))
 
-        self._new_data_buffers.put((tag, timestamp, data))
+        arrival_time = time.time()
+        if self._recorder is not None:
+            release = self._recorder.record(tag, timestamp, arrival_time, data, release)
+
+        with self._slots_condition:
+            slots = self._slots[tag]
+            if timestamp <= self._last_frame:
+                # The agent is already past this frame
+                self._dropped_frames[tag] += 1
+                self._release_data([release])
+                return
 
-    def get_data(self):
+            if timestamp in slots:
+                # Replaced by newer data of the same frame
+                self._dropped_frames[tag] += 1
+                self._release_data([slots[timestamp][1]])
+
+            slots[timestamp] = (data, release, arrival_time)
+            self._slots_condition.notify_all()
+
+    def drop_sensor_frame(self, tag, timestamp):
+        """
+        Tells that the data of a sensor at the given frame was dropped before being updated,
+        so that get_data() doesn't wait for it
         """
-        Returns the data of a sensor
+        with self._slots_condition:
+            self._dropped_frames[tag] += 1
+            if timestamp > self._last_frame:
+                self._missed_frames[tag].add(timestamp)
+                self._slots_condition.notify_all()
+
+    def _release_data(self, releases):
+        for release in releases:
+            if release is not None:
+                release()
+
+    def get_data(self, frame=None):
         """
-        try:
+        Returns the data of all the sensors at the given frame, waiting for it if needed.
+        Data of older frames is dropped. If no frame is given, the newest data of each sensor is returned.
+        SensorReceivedNoData is raised if the data doesn't arrive in time, or as soon as the data
+        of a sensor at the given frame is known to be dropped.
+
+        The data of the previous call is recycled, so the agent shouldn't keep it between steps
+        """
+        self._release_data(self._pending_releases)
+        self._pending_releases = []
+
+        with self._slots_condition:
+            if frame is None:
+                def is_ready():
+                    return all(self._slots.values())
+            else:
+                def is_ready():
+                    return all(frame in self._slots[tag] or frame in self._missed_frames[tag]
+                               for tag in self._slots)
+
+            if not self._slots_condition.wait_for(is_ready, self._queue_timeout):
+                raise SensorReceivedNoData("A sensor took too long to send its data")
+
+            if frame is not None:
+                missing = [tag for tag in self._slots if frame not in self._slots[tag]]
+                for tag in self._missed_frames:
+                    self._missed_frames[tag] = {f for f in self._missed_frames[tag] if f > frame}
+                if missing:
+                    self._last_frame = frame
+                    raise SensorReceivedNoData("The data of the sensors {} at frame {} was dropped".format(
+                        missing, frame))
+
+            consumption_time = time.time()
             data_dict = {}
-            while len(data_dict.keys()) < len(self._sensors_objects.keys()):
+            for tag, slots in self._slots.items():
+                selected_frame = frame if frame is not None else max(slots)
+
+                for old_frame in [f for f in slots if f < selected_frame]:
+                    self._dropped_frames[tag] += 1
+                    self._release_data([slots.pop(old_frame)[1]])
+
+                data, release, arrival_time = slots.pop(selected_frame)
+                data_dict[tag] = ((selected_frame, data))
+                self._pending_releases.append(release)
 
-                sensor_data = self._new_data_buffers.get(True, self._queue_timeout)
-                data_dict[sensor_data[0]] = ((sensor_data[1], sensor_data[2]))
+                latency = consumption_time - arrival_time
+                self._consumed_frames[tag] += 1
+                self._latency_sum[tag] += latency
+                self._latency_max[tag] = max(self._latency_max[tag], latency)
 
-        except Empty:
-            raise SensorReceivedNoData("A sensor took too long to send its data")
+            if frame is not None:
+                self._last_frame = frame
 
         return data_dict
+
+    def get_statistics(self):
+        """
+        Returns a dictionary with the amount of consumed and dropped frames of each sensor,
+        as well as the mean and max latency [s] between the arrival of its data and its consumption
+        """
+        statistics = {}
+        with self._slots_condition:
+            for tag in self._sensors_objects:
+                consumed = self._consumed_frames[tag]
+                statistics[tag] = {
+                    'consumed': consumed,
+                    'dropped': self._dropped_frames[tag],
+                    'latency_mean': self._latency_sum[tag] / consumed if consumed else 0.0,
+                    'latency_max': self._latency_max[tag],
+                }
+
+        return statistics
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This file contains SensorRecorder, which records the data received by the
+SensorInterface into chunked memory-mapped files, and SensorRecording, used to
+read those recordings back by frame
+"""
+
+from __future__ import print_function
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+
+INDEX_DTYPE = np.dtype([
+    ('frame', '<i8'),
+    ('timestamp', '<f8'),
+    ('chunk', '<i4'),
+    ('offset', '<i8'),
+    ('nbytes', '<i8'),
+])
+
+
+class SharedRelease(object):
+
+    """
+    Release function shared by several users of the same sensor data.
+    The original release is only called once all of them are done with the data.
+    """
+
+    def __init__(self, release, users):
+        self._release = release
+        self._users = users
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+        if self._release is not None:
+            self._release()
+
+
+class SensorStream(object):
+
+    """
+    Memory-mapped files of a single sensor. The data is appended to preallocated chunk
+    files, and each frame gets an entry at the index, with its frame number, timestamp,
+    chunk, offset and size.
+
+    Args:
+        path (str): directory of the stream
+        chunk_size (int): size [bytes] of each chunk file
+        index_block (int): amount of index entries preallocated at once
+    """
+
+    def __init__(self, path, chunk_size, index_block=1024):
+        self._path = path
+        self._chunk_size = chunk_size
+        self._index_block = index_block
+        if not os.path.exists(self._path):
+            os.makedirs(self._path)
+
+        self._dtype = None
+        self._shape = None
+
+        self._chunk = None
+        self._chunk_id = -1
+        self._chunk_offset = 0
+        self._chunk_sizes = []
+
+        self._index = None
+        self._count = 0
+
+    def _get_chunk_path(self, chunk_id):
+        return os.path.join(self._path, "chunk_{:05d}.bin".format(chunk_id))
+
+    def _open_chunk(self, nbytes):
+        self._close_chunk()
+        self._chunk_id += 1
+        size = max(self._chunk_size, nbytes)
+        self._chunk = np.memmap(self._get_chunk_path(self._chunk_id), dtype=np.uint8, mode='w+', shape=(size,))
+        self._chunk_offset = 0
+        self._chunk_sizes.append(0)
+
+    def _close_chunk(self):
+        if self._chunk is None:
+            return
+        self._chunk.flush()
+        del self._chunk
+        self._chunk = None
+        # Remove the unused preallocated space
+        os.truncate(self._get_chunk_path(self._chunk_id), self._chunk_offset)
+        self._chunk_sizes[-1] = self._chunk_offset
+
+    def _grow_index(self):
+        old_index = self._index
+        size = self._count + self._index_block
+        mode = 'r+' if old_index is not None else 'w+'
+        self._index = np.memmap(os.path.join(self._path, "index.bin"), dtype=INDEX_DTYPE, mode=mode, shape=(size,))
+        del old_index
+
+    def write(self, frame, timestamp, data):
+        """
+        Appends the data of a frame to the stream
+        """
+        data = np.ascontiguousarray(data)
+        if self._dtype is None:
+            self._dtype = data.dtype.str
+            self._shape = list(data.shape[1:])
+
+        raw = data.reshape(-1).view(np.uint8)
+        nbytes = len(raw)
+        if self._chunk is None or self._chunk_offset + nbytes > len(self._chunk):
+            self._open_chunk(nbytes)
+
+        self._chunk[self._chunk_offset:self._chunk_offset + nbytes] = raw
+
+        if self._index is None or self._count == len(self._index):
+            self._grow_index()
+        self._index[self._count] = (frame, timestamp, self._chunk_id, self._chunk_offset, nbytes)
+        self._count += 1
+        self._chunk_offset += nbytes
+
+    def close(self):
+        """
+        Flushes the stream and writes its metadata
+        """
+        self._close_chunk()
+        if self._index is not None:
+            self._index.flush()
+            del self._index
+            self._index = None
+            os.truncate(os.path.join(self._path, "index.bin"), self._count * INDEX_DTYPE.itemsize)
+
+        metadata = {
+            'dtype': self._dtype,
+            'shape': self._shape,
+            'count': self._count,
+            'chunks': self._chunk_sizes,
+        }
+        with open(os.path.join(self._path, "metadata.json"), 'w') as fd:
+            json.dump(metadata, fd)
+
+
+class SensorRecorder(object):
+
+    """
+    Records the sensor data received by the SensorInterface, one SensorStream per sensor.
+
+    The data is queued and written to disk by a background thread. The sensor buffers are kept
+    until written, so the SensorInterface shares their release with the recorder.
+    If the queue is full, the sensor data is dropped and counted, instead of delaying the simulation.
+
+    Args:
+        output_dir (str): directory where the sensor streams are stored
+        chunk_size (int): size [bytes] of each chunk file
+        queue_size (int): maximum amount of sensor data waiting to be written
+    """
+
+    def __init__(self, output_dir, chunk_size=256 * 1024 * 1024, queue_size=64):
+        self._output_dir = output_dir
+        self._chunk_size = chunk_size
+        self._queue_size = queue_size
+
+        self._streams = {}
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._running = True
+
+        self.recorded = 0
+        self.dropped = 0
+
+        self._thread = threading.Thread(target=self._run, name="SensorRecorder")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def record(self, tag, frame, timestamp, data, release=None):
+        """
+        Queues the data of a sensor to be written. Returns the release function the
+        consumer of the data has to call instead of the given one
+        """
+        with self._condition:
+            if not self._running or len(self._queue) >= self._queue_size:
+                self.dropped += 1
+                return release
+
+            shared_release = SharedRelease(release, 2)
+            self._queue.append((tag, frame, timestamp, data, shared_release))
+            self._condition.notify_all()
+
+        return shared_release
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or not self._running)
+                if not self._queue:
+                    return
+                tag, frame, timestamp, data, release = self._queue.popleft()
+
+            try:
+                if tag not in self._streams:
+                    self._streams[tag] = SensorStream(os.path.join(self._output_dir, tag), self._chunk_size)
+                self._streams[tag].write(frame, timestamp, data)
+                self.recorded += 1
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Error recording the data of sensor %s", tag)
+            finally:
+                release()
+
+    def close(self):
+        """
+        Writes the remaining queued data and closes all the streams
+        """
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join()
+
+        for stream in self._streams.values():
+            stream.close()
+        self._streams = {}
+
+
+class SensorRecording(object):
+
+    """
+    Random access, by frame, to the streams recorded by a SensorRecorder.
+    The returned arrays are read-only views of the memory-mapped files.
+    If a frame was recorded more than once, the first recorded data is returned.
+
+    Args:
+        path (str): directory of the recording
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._streams = {}
+        for tag in sorted(os.listdir(path)):
+            if os.path.exists(os.path.join(path, tag, "metadata.json")):
+                self._streams[tag] = None
+
+    def get_sensors(self):
+        """
+        returns the tags of the recorded sensors
+        """
+        return list(self._streams)
+
+    def _get_stream(self, tag):
+        if self._streams[tag] is None:
+            stream_path = os.path.join(self._path, tag)
+            with open(os.path.join(stream_path, "metadata.json")) as fd:
+                metadata = json.load(fd)
+
+            if metadata['count']:
+                index = np.memmap(os.path.join(stream_path, "index.bin"), dtype=INDEX_DTYPE, mode='r',
+                                  shape=(metadata['count'],))
+            else:
+                index = np.zeros(0, dtype=INDEX_DTYPE)
+
+            # get_data() looks the frames up by bisection. The data is recorded in the order
+            # it is received, which isn't guaranteed to be the frame order
+            if np.any(np.diff(index['frame']) < 0):
+                logging.warning("The frames of sensor %s were recorded out of order, sorting them", tag)
+                index = np.array(index)[np.argsort(index['frame'], kind='stable')]
+
+            chunks = []
+            for chunk_id, size in enumerate(metadata['chunks']):
+                if size:
+                    chunk_path = os.path.join(stream_path, "chunk_{:05d}.bin".format(chunk_id))
+                    chunks.append(np.memmap(chunk_path, dtype=np.uint8, mode='r', shape=(size,)))
+                else:
+                    chunks.append(np.zeros(0, dtype=np.uint8))
+
+            self._streams[tag] = (metadata, index, chunks)
+
+        return self._streams[tag]
+
+    def get_index(self, tag):
+        """
+        returns the index of a sensor, a structured array with the frame, timestamp,
+        chunk, offset and nbytes of each recorded data, sorted by frame
+        """
+        return self._get_stream(tag)[1]
+
+    def get_frames(self, tag):
+        """
+        returns the frame numbers recorded for a sensor
+        """
+        return np.asarray(self.get_index(tag)['frame'])
+
+    def get_data(self, tag, frame):
+        """
+        returns the (timestamp, data) of a sensor at the given frame, or None if it wasn't recorded
+        """
+        metadata, index, chunks = self._get_stream(tag)
+        position = np.searchsorted(index['frame'], frame)
+        if position == len(index) or index['frame'][position] != frame:
+            return None
+
+        entry = index[position]
+        raw = chunks[entry['chunk']][entry['offset']:entry['offset'] + entry['nbytes']]
+        data = raw.view(np.dtype(metadata['dtype'])).reshape([-1] + metadata['shape'])
+        return float(entry['timestamp']), data
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This file contains SensorWorker, used to process the data of a sensor
+outside of the CARLA sensor thread
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+
+class SensorWorker(object):
+
+    """
+    Processes the data of a sensor in background threads, so that the CARLA sensor
+    callback only has to queue it and the delivery of the other sensors isn't delayed.
+
+    The queue is bounded. Once full, either the oldest queued data is dropped ("drop_oldest"),
+    or the sensor callback waits for a free spot ("block"). Note that in synchronous mode,
+    dropping data means the agent never receives that frame, so "block" has to be used
+    (see CallBack). The optional on_drop is called with each dropped data.
+
+    Args:
+        process (callable): function called with each sensor data
+        name (str): name of the worker threads
+        queue_size (int): maximum amount of queued sensor data
+        drop_policy (str): "drop_oldest" or "block"
+        num_threads (int): amount of threads processing the data
+        on_drop (callable): function called with each data dropped from the queue
+    """
+
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+
+    def __init__(self, process, name="SensorWorker", queue_size=2, drop_policy=DROP_OLDEST, num_threads=1,
+                 on_drop=None):
+        if drop_policy not in (self.DROP_OLDEST, self.BLOCK):
+            raise ValueError("Unknown drop policy [{}]".format(drop_policy))
+
+        self._process = process
+        self._on_drop = on_drop
+        self._queue_size = queue_size
+        self._drop_policy = drop_policy
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._running = True
+
+        self._processed = 0
+        self._dropped = 0
+        self._max_queue_depth = 0
+        self._processing_time_sum = 0.0
+        self._processing_time_max = 0.0
+
+        self._threads = []
+        for i in range(num_threads):
+            thread = threading.Thread(target=self._run, name="{}-{}".format(name, i))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, data):
+        """
+        Queues sensor data to be processed. Used as the sensor callback
+        """
+        dropped_data = None
+        with self._condition:
+            if not self._running:
+                return
+
+            if len(self._queue) >= self._queue_size:
+                if self._drop_policy == self.DROP_OLDEST:
+                    dropped_data = self._queue.popleft()
+                    self._dropped += 1
+                else:
+                    self._condition.wait_for(lambda: len(self._queue) < self._queue_size or not self._running)
+                    if not self._running:
+                        return
+
+            self._queue.append(data)
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            self._condition.notify_all()
+
+        if dropped_data is not None and self._on_drop is not None:
+            self._on_drop(dropped_data)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or not self._running)
+                if not self._running:
+                    return
+                data = self._queue.popleft()
+                self._condition.notify_all()
+
+            start_time = time.time()
+            try:
+                self._process(data)
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Error processing the sensor data at %s", threading.current_thread().name)
+            processing_time = time.time() - start_time
+
+            with self._condition:
+                self._processed += 1
+                self._processing_time_sum += processing_time
+                self._processing_time_max = max(self._processing_time_max, processing_time)
+
+    def get_statistics(self):
+        """
+        Returns a dictionary with the amount of processed and dropped data, the current and
+        max queue depth, and the mean and max processing time [s]
+        """
+        with self._condition:
+            return {
+                'processed': self._processed,
+                'dropped': self._dropped,
+                'queue_depth': len(self._queue),
+                'max_queue_depth': self._max_queue_depth,
+                'processing_time_mean': self._processing_time_sum / self._processed if self._processed else 0.0,
+                'processing_time_max': self._processing_time_max,
+            }
+
+    def stop(self):
+        """
+        Stops the worker threads, discarding the data still queued
+        """
+        with self._condition:
+            self._running = False
+            self._queue.clear()
+            self._condition.notify_all()
+
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
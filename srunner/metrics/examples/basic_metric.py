@@ -25,8 +25,9 @@ class BasicMetric(object):
             criteria (dict): list of dictionaries with all the criteria information
         """
 
-        # Create the metrics of the simulation. This part is left to the user
-        self._create_metric(town_map, log, criteria)
+        # Create the metrics of the simulation. This part is left to the user.
+        # Its results, if any, are gathered by the metrics manager in batch mode
+        self.results = self._create_metric(town_map, log, criteria)
 
     def _create_metric(self, town_map, log, criteria):
         """
@@ -36,6 +37,9 @@ class BasicMetric(object):
             town_map (carla.Map): Map of the simulation. Used to access the Waypoint API.
             log (srunner.metrics.tools.Metricslog): instance of a class used to access the recorder information
             criteria (dict): dictionaries with all the criteria information
+
+        Returns:
+            dict: (optional) results of the metric, aggregated by the metrics manager in batch mode
         """
         raise NotImplementedError(
             "This function should be re-implemented by all metrics"
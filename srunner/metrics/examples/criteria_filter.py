@@ -44,3 +44,5 @@ class CriteriaFilter(BasicMetric):
 
         with open('srunner/metrics/data/CriteriaFilter_results.json', 'w') as fw:
             json.dump(results, fw, sort_keys=False, indent=4)
+
+        return results
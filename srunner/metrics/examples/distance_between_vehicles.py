@@ -14,7 +14,7 @@ It is meant to serve as an example of how to use the information from
 the recorder
 """
 
-import math
+import numpy as np
 import matplotlib.pyplot as plt
 
 from srunner.metrics.examples.basic_metric import BasicMetric
@@ -35,31 +35,27 @@ class DistanceBetweenVehicles(BasicMetric):
         ego_id = log.get_ego_vehicle_id()
         adv_id = log.get_actor_ids_with_role_name("scenario")[0]  # Could have also used its type_id
 
-        dist_list = []
-        frames_list = []
-
         # Get the frames both actors were alive
         start_ego, end_ego = log.get_actor_alive_frames(ego_id)
         start_adv, end_adv = log.get_actor_alive_frames(adv_id)
         start = max(start_ego, start_adv)
         end = min(end_ego, end_adv)
+        frames = np.arange(start, end)
 
-        # Get the distance between the two
-        for i in range(start, end):
-
-            # Get the transforms
-            ego_location = log.get_actor_transform(ego_id, i).location
-            adv_location = log.get_actor_transform(adv_id, i).location
+        # Get the distance between the two, for all the frames at once
+        dist_list = log.get_distance_series(ego_id, adv_id, frames)
 
-            # Filter some points for a better graph
-            if adv_location.z < -10:
-                continue
+        # Filter some points for a better graph
+        adv_locations = log.get_actor_series(adv_id, "location", frames)
+        valid = adv_locations[:, 2] >= -10
 
-            dist_v = ego_location - adv_location
-            dist = math.sqrt(dist_v.x * dist_v.x + dist_v.y * dist_v.y + dist_v.z * dist_v.z)
+        dist_list = dist_list[valid]
+        frames_list = frames[valid]
 
-            dist_list.append(dist)
-            frames_list.append(i)
+        if dist_list.size == 0:
+            # The vehicles were never alive at the same time, or all the points were filtered out
+            print("DistanceBetweenVehicles: No frames with both vehicles")
+            return {'min_distance': None}
 
         # Use matplotlib to show the results
         plt.plot(frames_list, dist_list)
@@ -67,3 +63,5 @@ class DistanceBetweenVehicles(BasicMetric):
         plt.xlabel('Frame number')
         plt.title('Distance between the ego vehicle and the adversary over time')
         plt.show()
+
+        return {'min_distance': float(np.min(dist_list))}
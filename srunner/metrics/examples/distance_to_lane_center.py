@@ -13,8 +13,10 @@ the center of the lane, dumping it to a json file.
 It is meant to serve as an example of how to use the map API
 """
 
-import math
 import json
+import numpy as np
+
+import carla
 
 from srunner.metrics.examples.basic_metric import BasicMetric
 
@@ -32,37 +34,39 @@ class DistanceToLaneCenter(BasicMetric):
         # Get ego vehicle id
         ego_id = log.get_ego_vehicle_id()
 
-        dist_list = []
-        frames_list = []
-
-        # Get the frames the ego actor was alive and its transforms
+        # Get the frames the ego actor was alive and its locations
         start, end = log.get_actor_alive_frames(ego_id)
+        frames_list = np.arange(start, end + 1)
+        ego_locations = log.get_actor_series(ego_id, "location", frames_list)
+
+        # Get the location and the forward and right vectors of the closest waypoints
+        waypoint_data = []
+        for x, y, z in ego_locations.tolist():
+            ego_waypoint = town_map.get_waypoint(carla.Location(x, y, z))
+            wp_location = ego_waypoint.transform.location
+            forward = ego_waypoint.transform.get_forward_vector()
+            right = ego_waypoint.transform.get_right_vector()
+            waypoint_data.append([wp_location.x, wp_location.y, wp_location.z,
+                                  forward.x, forward.y, forward.z,
+                                  right.x, right.y, right.z])
+        waypoint_data = np.array(waypoint_data).reshape(-1, 9)
 
         # Get the projected distance vector to the center of the lane
-        for i in range(start, end + 1):
-
-            ego_location = log.get_actor_transform(ego_id, i).location
-            ego_waypoint = town_map.get_waypoint(ego_location)
+        a = ego_locations - waypoint_data[:, 0:3]       # Ego to waypoint vector
+        b = waypoint_data[:, 6:9]                       # Waypoint perpendicular vector
+        c = waypoint_data[:, 3:6]                       # Waypoint forward vector
 
-            # Get the distance vector and project it
-            a = ego_location - ego_waypoint.transform.location      # Ego to waypoint vector
-            b = ego_waypoint.transform.get_right_vector()           # Waypoint perpendicular vector
-            b_norm = math.sqrt(b.x * b.x + b.y * b.y + b.z * b.z)
+        ab_dot = np.sum(a * b, axis=1)
+        dist_v = (ab_dot / np.sum(b * b, axis=1))[:, np.newaxis] * b
+        dist = np.linalg.norm(dist_v, axis=1)
 
-            ab_dot = a.x * b.x + a.y * b.y + a.z * b.z
-            dist_v = ab_dot/(b_norm*b_norm)*b
-            dist = math.sqrt(dist_v.x * dist_v.x + dist_v.y * dist_v.y + dist_v.z * dist_v.z)
-
-            # Get the sign of the distance (left side is positive)
-            c = ego_waypoint.transform.get_forward_vector()         # Waypoint forward vector
-            ac_cross = c.x * a.y - c.y * a.x
-            if ac_cross < 0:
-                dist *= -1
-
-            dist_list.append(dist)
-            frames_list.append(i)
+        # Get the sign of the distance (left side is positive)
+        ac_cross = c[:, 0] * a[:, 1] - c[:, 1] * a[:, 0]
+        dist_list = np.where(ac_cross < 0, -dist, dist)
 
         # Save the results to a file
-        results = {'frames': frames_list, 'distance': dist_list}
+        results = {'frames': frames_list.tolist(), 'distance': dist_list.tolist()}
         with open('srunner/metrics/data/DistanceToLaneCenter_results.json', 'w') as fw:
             json.dump(results, fw, sort_keys=False, indent=4)
+
+        return {'mean_distance': float(np.mean(dist_list)), 'max_distance': float(np.max(np.abs(dist_list)))}
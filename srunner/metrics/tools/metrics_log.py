@@ -14,21 +14,60 @@ It also provides a series of functions to help the user querry
 specific information
 """
 
+import bisect
 import fnmatch
-from srunner.metrics.tools.metrics_parser import MetricsParser
+
+import numpy as np
+
+from srunner.metrics.tools.metrics_parser import (MetricsParser, RecorderLog, state_to_carla, parse_physics_control,
+                                                  parse_scene_lights, parse_state_times)
+
+# RecorderLog state holding each of the per frame actor states
+STATE_SOURCES = {
+    "transform": "transform",
+    "location": "transform",
+    "velocity": "velocity",
+    "angular_velocity": "angular_velocity",
+    "acceleration": "acceleration",
+    "control": "control",
+    "speed": "speed",
+    "lights": "lights",
+    "traffic_light": "traffic_light",
+    "state": "traffic_light",
+    "frozen": "traffic_light",
+    "elapsed_time": "traffic_light",
+}
+
 
 class MetricsLog(object):  # pylint: disable=too-many-public-methods
     """
     Utility class to query the log.
+
+    The actor states are kept as the NumPy columns of the parsed RecorderLog,
+    indexed per actor, so that whole time series can be queried at once
+    (see get_actor_series).
     """
 
     def __init__(self, recorder):
         """
         Initializes the log class and parses it to extract the dictionaries.
+
+        Args:
+            recorder (str, iterable or RecorderLog): information given by the recorder,
+                or an already parsed RecorderLog
         """
         # Parse the information
-        parser = MetricsParser(recorder)
-        self._simulation, self._actors, self._frames = parser.parse_recorder_info()
+        if isinstance(recorder, RecorderLog):
+            self._log = recorder
+        else:
+            parser = MetricsParser(recorder)
+            self._log = parser.parse()
+        self._simulation = self._log.simulation
+        self._actors = self._log.get_actors_info()
+        self._event_frames = sorted(self._log.events)
+
+        # Per state dictionary of {actor_id: (frames, rows)}, built on demand
+        self._state_indices = {}
 
     ### Functions used to get general info of the simulation ###
     def get_actor_collisions(self, actor_id):
@@ -41,11 +80,12 @@ class MetricsLog(object):  # pylint: disable=too-many-public-methods
         """
         actor_collisions = {}
 
-        for i, frame in enumerate(self._frames):
-            collisions = frame["events"]["collisions"]
+        for frame in self._event_frames:
+            collisions = self._log.events[frame]["collisions"]
 
             if actor_id in collisions:
-                actor_collisions.update({i: collisions[actor_id]})
+                i = int(np.searchsorted(self._log.frame_numbers, frame))
+                actor_collisions.update({i: list(collisions[actor_id])})
 
         return actor_collisions
 
@@ -61,21 +101,32 @@ class MetricsLog(object):  # pylint: disable=too-many-public-methods
         Returns a float with the elapsed time of a specific frame.
         """
 
-        return self._frames[frame]["frame"]["elapsed_time"]
+        return float(self._log.elapsed_times[frame])
 
     def get_delta_time(self, frame):
         """
         Returns a float with the delta time of a specific frame.
         """
 
-        return self._frames[frame]["frame"]["delta_time"]
+        return float(self._log.delta_times[frame])
 
     def get_platform_time(self, frame):
         """
         Returns a float with the platform time time of a specific frame.
         """
+        platform_time = float(self._log.platform_times[frame])
+        if np.isnan(platform_time):
+            return None
+
+        return platform_time
 
-        return self._frames[frame]["frame"]["platform_time"]
+    def _get_previous_events(self, name, frame):
+        """
+        Yields the events of the given type, going backwards from the frame until the start
+        """
+        last = bisect.bisect_right(self._event_frames, frame)
+        for event_frame in reversed(self._event_frames[:last]):
+            yield self._log.events[event_frame][name]
 
     ### Functions used to get info about the actors ###
     def get_ego_vehicle_id(self):
@@ -181,6 +232,53 @@ class MetricsLog(object):  # pylint: disable=too-many-public-methods
         return None, None
 
     ### Functions used to get the actor states ###
+    def _get_state_index(self, state):
+        """
+        Returns a dictionary {actor_id: (frames, rows)} with the sorted frame numbers
+        in which each actor has the given RecorderLog state, and the matching rows of its columns.
+        """
+        if state not in self._state_indices:
+            frames, actor_ids, _ = self._log.get_state(state)
+
+            order = np.argsort(actor_ids, kind='stable')
+            ids, starts = np.unique(actor_ids[order], return_index=True)
+            ends = np.append(starts[1:], len(order))
+
+            index = {}
+            for actor_id, start, end in zip(ids.tolist(), starts.tolist(), ends.tolist()):
+                rows = order[start:end]
+                index[actor_id] = (frames[rows], rows)
+            self._state_indices[state] = index
+
+        return self._state_indices[state]
+
+    def _get_state_rows(self, actor_id, state, frames):
+        """
+        Returns the rows of the RecorderLog state of an actor at each of the frames,
+        -1 if the actor has no such state at that frame.
+        """
+        frames = np.asarray(frames, dtype=np.int64).reshape(-1)
+        rows = np.full(len(frames), -1, dtype=np.int64)
+
+        actor_index = self._get_state_index(state).get(actor_id)
+        if actor_index is None:
+            return rows
+
+        actor_frames, actor_rows = actor_index
+        positions = np.minimum(np.searchsorted(actor_frames, frames), len(actor_frames) - 1)
+        found = actor_frames[positions] == frames
+        rows[found] = actor_rows[positions[found]]
+
+        return rows
+
+    def _row_to_state(self, state, row):
+        """
+        Returns the carla representation of a row of the actor states
+        """
+        source = STATE_SOURCES[state]
+        value = self._log.states[source].values[row].tolist()
+        return state_to_carla(source, value)[state]
+
     def _get_actor_state(self, actor_id, state, frame):
         """
         Given an actor id, returns the specific variable of that actor at a given frame.
@@ -191,19 +289,11 @@ class MetricsLog(object):  # pylint: disable=too-many-public-methods
             frame: (int): frame number of the simulation.
             attribute (str): name of the actor's attribute to be returned.
         """
-        frame_state = self._frames[frame - 1]["actors"]
-
-        # Check if the actor exists
-        if actor_id in frame_state:
-
-            # Check if the state exists
-            if state not in frame_state[actor_id]:
-                return None
-
-            state_info = frame_state[actor_id][state]
-            return state_info
+        row = self._get_state_rows(actor_id, STATE_SOURCES[state], [frame])[0]
+        if row < 0:
+            return None
 
-        return None
+        return self._row_to_state(state, row)
 
     def _get_all_actor_states(self, actor_id, state, first_frame=None, last_frame=None):
         """
@@ -223,13 +313,10 @@ class MetricsLog(object):  # pylint: disable=too-many-public-methods
         if last_frame is None:
             last_frame = self.get_total_frame_count()
 
-        state_list = []
-
-        for frame_number in range(first_frame, last_frame + 1):
-            state_info = self._get_actor_state(actor_id, state, frame_number)
-            state_list.append(state_info)
+        frames = np.arange(first_frame, last_frame + 1)
+        rows = self._get_state_rows(actor_id, STATE_SOURCES[state], frames)
 
-        return state_list
+        return [None if row < 0 else self._row_to_state(state, row) for row in rows.tolist()]
 
     def _get_states_at_frame(self, frame, state, actor_list=None):
         """
@@ -239,19 +326,71 @@ class MetricsLog(object):  # pylint: disable=too-many-public-methods
         By default, all actors will be considered.
         """
         states = {}
-        actor_info = self._frames[frame]["actors"]
+        frames, actor_ids, _ = self._log.get_state(STATE_SOURCES[state])
 
-        for actor_id in actor_info:
-            if not actor_list:
-                _state = self._get_actor_state(actor_id, state, frame)
-                if _state:
-                    states.update({actor_id: _state})
-            elif actor_id in actor_list:
-                _state = self._get_actor_state(actor_id, state, frame)
-                states.update({actor_id: _state})
+        # Rows are stored in frame order
+        first = np.searchsorted(frames, frame, side='left')
+        last = np.searchsorted(frames, frame, side='right')
+
+        for row in range(first, last):
+            actor_id = int(actor_ids[row])
+            if not actor_list or actor_id in actor_list:
+                states.update({actor_id: self._row_to_state(state, row)})
 
         return states
 
+    def get_actor_series(self, actor_id, state, frames=None):
+        """
+        Returns an array with the values of an actor state at each of the given frames,
+        with one row per frame and one column per value of the state (see STATE_COLUMNS at
+        the metrics parser). Rows of the frames in which the actor has no such state are NaN.
+
+        Args:
+            actor_id (int): ID of the actor.
+            state (str): name of the state. Besides the STATE_COLUMNS, "location" returns
+                the (x, y, z) columns of the transform
+            frames (iterable): frame numbers. By default, all the frames of the simulation
+        """
+        source = STATE_SOURCES[state]
+        if frames is None:
+            frames = self._log.frame_numbers
+
+        rows = self._get_state_rows(actor_id, source, frames)
+        values = self._log.states[source].values
+
+        series = np.full((len(rows), values.shape[1]), np.nan)
+        found = rows >= 0
+        series[found] = values[rows[found]]
+
+        if state == "location":
+            series = series[:, :3]
+
+        return series
+
+    def get_distance_series(self, actor_id, other_id, frames=None):
+        """
+        Returns an array with the distance between two actors at each of the given frames.
+        NaN if any of them is missing at that frame.
+        """
+        actor_locations = self.get_actor_series(actor_id, "location", frames)
+        other_locations = self.get_actor_series(other_id, "location", frames)
+
+        return np.linalg.norm(actor_locations - other_locations, axis=1)
+
+    def get_speed_series(self, actor_id, frames=None):
+        """
+        Returns an array with the speed of the actor at each of the given frames.
+        NaN if the actor is missing at that frame.
+        """
+        return np.linalg.norm(self.get_actor_series(actor_id, "velocity", frames), axis=1)
+
+    def get_acceleration_series(self, actor_id, frames=None):
+        """
+        Returns an array with the acceleration magnitude of the actor at each of the given frames.
+        NaN if the actor is missing at that frame.
+        """
+        return np.linalg.norm(self.get_actor_series(actor_id, "acceleration", frames), axis=1)
+
     # Transforms
     def get_actor_transform(self, actor_id, frame):
         """
@@ -345,11 +484,9 @@ class MetricsLog(object):  # pylint: disable=too-many-public-methods
         Returns None if the id can't be found.
         """
 
-        for i in range(frame - 1, -1, -1):  # Go backwards from the frame until 0
-            physics_info = self._frames[i]["events"]["physics_control"]
-
+        for physics_info in self._get_previous_events("physics_control", frame):
             if vehicle_id in physics_info:
-                return physics_info[vehicle_id]
+                return parse_physics_control(physics_info[vehicle_id])
 
         return None
 
@@ -384,13 +521,11 @@ class MetricsLog(object):  # pylint: disable=too-many-public-methods
         Returns None if the id can't be found.
         """
 
-        for i in range(frame - 1, -1, -1):  # Go backwards from the frame until 0
-            state_times_info = self._frames[i]["events"]["traffic_light_state_time"]
-
+        for state_times_info in self._get_previous_events("traffic_light_state_time", frame):
             if traffic_light_id in state_times_info:
-                states = state_times_info[traffic_light_id]
+                states = parse_state_times(state_times_info[traffic_light_id])
                 if state in states:
-                    return state_times_info[traffic_light_id][state]
+                    return states[state]
 
         return None
 
@@ -419,10 +554,8 @@ class MetricsLog(object):  # pylint: disable=too-many-public-methods
         Returns None if the id can't be found.
         """
 
-        for i in range(frame - 1, -1, -1):  # Go backwards from the frame until 0
-            scene_lights_info = self._frames[i]["events"]["scene_lights"]
-
+        for scene_lights_info in self._get_previous_events("scene_lights", frame):
             if light_id in scene_lights_info:
-                return scene_lights_info[light_id]
+                return parse_scene_lights(scene_lights_info[light_id])
 
         return None
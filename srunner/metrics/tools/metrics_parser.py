@@ -8,12 +8,43 @@
 
 """
 Support class of the MetricsManager to parse the information of
-the CARLA recorder into a readable dictionary
+the CARLA recorder into a readable dictionary.
+
+The recorder is parsed line by line, so it can be streamed from a file,
+and the per frame actor states are stored as NumPy columns (RecorderLog)
+instead of one dictionary per actor and frame.
 """
 
+import numpy as np
+
 import carla
 
 
+# Columns of each of the actor states stored in the RecorderLog
+STATE_COLUMNS = {
+    "transform": ("x", "y", "z", "pitch", "yaw", "roll"),
+    "traffic_light": ("state", "frozen", "elapsed_time"),
+    "control": ("throttle", "steer", "brake", "hand_brake", "gear"),
+    "speed": ("speed",),
+    "lights": ("mask",),
+    "velocity": ("x", "y", "z"),
+    "angular_velocity": ("x", "y", "z"),
+    "acceleration": ("x", "y", "z"),
+}
+
+# Order of the vehicle lights in the "lights" bit mask
+LIGHT_NAMES = ("None", "Position", "LowBeam", "HighBeam", "Brake", "RightBlinker",
+               "LeftBlinker", "Reverse", "Fog", "Interior", "Special1", "Special2")
+
+EVENT_NAMES = ("scene_lights", "physics_control", "traffic_light_state_time", "collisions")
+
+# Headers of the per frame sections of the recorder whose rows are parsed
+SECTION_NAMES = ("Positions", "State traffic lights", "Vehicle animations", "Walker animations",
+                 "Vehicle light animations", "Scene light changes", "Dynamic actors",
+                 "Actor bounding boxes", "Actor trigger volumes", "Physics Control",
+                 "Traffic Light time events")
+
+
 def parse_actor(info):
     """
     Returns a dictionary with the basic actor information
@@ -24,7 +55,7 @@ def parse_actor(info):
 
     actor = {
         "type_id": info[2],
-        "location": carla.Location(
+        "location": (
             float(info[5][1:-1]) / 100,
             float(info[6][:-1]) / 100,
             float(info[7][:-1]) / 100
@@ -36,135 +67,96 @@ def parse_actor(info):
 
 def parse_transform(info):
     """
-    Parses a list into a carla.Transform
+    Parses a list into the (x, y, z, pitch, yaw, roll) values of a transform
 
     Args:
         info (list): list corresponding to a row of the recorder
     """
-    transform = carla.Transform(
-        carla.Location(
-            float(info[3][1:-1]) / 100,
-            float(info[4][:-1]) / 100,
-            float(info[5][:-1]) / 100,
-        ),
-        carla.Rotation(
-            float(info[8][:-1]),   # pitch
-            float(info[9][:-1]),   # yaw
-            float(info[7][1:-1])   # roll
-        )
+    return (
+        float(info[3][1:-1]) / 100,
+        float(info[4][:-1]) / 100,
+        float(info[5][:-1]) / 100,
+        float(info[8][:-1]),    # pitch
+        float(info[9][:-1]),    # yaw
+        float(info[7][1:-1])    # roll
     )
 
-    return transform
-
 
 def parse_control(info):
     """
-    Parses a list into a carla.VehicleControl
+    Parses a list into the (throttle, steer, brake, hand_brake, gear) values of a control
 
     Args:
         info (list): list corresponding to a row of the recorder
     """
-    control = carla.VehicleControl(
+    return (
         float(info[5]),         # throttle
         float(info[3]),         # steer
         float(info[7]),         # brake
-        bool(int(info[9])),     # hand_brake
-        int(info[11]) < 0,      # reverse
-        False,                  # manual_gear_shift
-        int(info[11]),          # gear
+        float(int(info[9])),    # hand_brake
+        float(int(info[11])),   # gear
     )
 
-    return control
-
 
 def parse_vehicle_lights(info):
     """
-    Parses a list into a carla.VehicleLightState
+    Parses a list into a bit mask of the active vehicle lights, following LIGHT_NAMES
 
     Args:
         info (list): list corresponding to a row of the recorder
     """
-    srt_to_vlight = {
-        "None": carla.VehicleLightState.NONE,
-        "Position": carla.VehicleLightState.Position,
-        "LowBeam": carla.VehicleLightState.LowBeam,
-        "HighBeam": carla.VehicleLightState.HighBeam,
-        "Brake": carla.VehicleLightState.Brake,
-        "RightBlinker": carla.VehicleLightState.RightBlinker,
-        "LeftBlinker": carla.VehicleLightState.LeftBlinker,
-        "Reverse": carla.VehicleLightState.Reverse,
-        "Fog": carla.VehicleLightState.Fog,
-        "Interior": carla.VehicleLightState.Interior,
-        "Special1": carla.VehicleLightState.Special1,
-        "Special2": carla.VehicleLightState.Special2,
-    }
-
-    lights = []
+    mask = 0
     for i in range(2, len(info)):
-        lights.append(srt_to_vlight[info[i]])
+        mask |= 1 << LIGHT_NAMES.index(info[i])
 
-    return lights
+    return (mask,)
 
 
 def parse_traffic_light(info):
     """
-    Parses a list into a dictionary with all the traffic light's information
+    Parses a list into the (state, frozen, elapsed_time) values of a traffic light
 
     Args:
         info (list): list corresponding to a row of the recorder
     """
-    number_to_state = {
-        "0": carla.TrafficLightState.Red,
-        "1": carla.TrafficLightState.Yellow,
-        "2": carla.TrafficLightState.Green,
-        "3": carla.TrafficLightState.Off,
-        "4": carla.TrafficLightState.Unknown,
-    }
-
-    traffic_light = {
-        "state": number_to_state[info[3]],
-        "frozen": bool(int(info[5])),
-        "elapsed_time": float(info[7]),
-    }
-
-    return traffic_light
+    return (
+        int(info[3]),
+        int(info[5]),
+        float(info[7]),
+    )
 
 
 def parse_velocity(info):
     """
-    Parses a list into a carla.Vector3D with the velocity
+    Parses a list into the (x, y, z) values of the velocity
 
     Args:
         info (list): list corresponding to a row of the recorder
     """
-    velocity = carla.Vector3D(
+    return (
         float(info[3][1:-1]),
         float(info[4][:-1]),
         float(info[5][:-1])
     )
 
-    return velocity
-
 
 def parse_angular_velocity(info):
     """
-    Parses a list into a carla.Vector3D with the angular velocity
+    Parses a list into the (x, y, z) values of the angular velocity
 
     Args:
         info (list): list corresponding to a row of the recorder
     """
-    velocity = carla.Vector3D(
+    return (
         float(info[7][1:-1]),
         float(info[8][:-1]),
         float(info[9][:-1])
     )
 
-    return velocity
-
 
 def parse_scene_lights(info):
     """
-    Parses a list into a carla.VehicleLightState
+    Parses a list into a carla.LightState
 
     Args:
         info (list): list corresponding to a row of the recorder
@@ -186,27 +178,20 @@ def parse_scene_lights(info):
 
 def parse_bounding_box(info):
     """
-    Parses a list into a carla.BoundingBox
+    Parses a list into the (x, y, z, extent_x, extent_y, extent_z) values of a bounding box
 
     Args:
         info (list): list corresponding to a row of the recorder
     """
-    location = carla.Location(
+    return (
         float(info[3][1:-1])/100,
         float(info[4][:-1])/100,
         float(info[5][:-1])/100,
-    )
-
-    extent = carla.Vector3D(
         float(info[7][1:-1])/100,
         float(info[8][:-1])/100,
         float(info[9][:-1])/100,
     )
 
-    bbox = carla.BoundingBox(location, extent)
-
-    return bbox
-
 
 def parse_state_times(info):
     """
@@ -279,340 +264,515 @@ def parse_wheels_control(info):
     return gears_control
 
 
-class MetricsParser(object):
+def parse_physics_control(rows):
     """
-    Class used to parse the CARLA recorder into readable information
+    Parses the rows of the recorder describing the physics of a vehicle into
+    a carla.VehiclePhysicsControl
+
+    Args:
+        rows (list): rows of the recorder (with their indentation) following the actor id
+    """
+    physics_control = carla.VehiclePhysicsControl()
+
+    forward_gears = []
+    wheels = []
+    for row in rows:
+        if row.startswith('    '):
+            elements = row[4:].split(" ")
+            if elements[0] == "gear":
+                forward_gears.append(parse_gears_control(elements))
+            elif elements[0] == "wheel":
+                wheels.append(parse_wheels_control(elements))
+
+        else:
+            elements = row[3:].split(" = ")
+            name = elements[0]
+
+            if name == "center_of_mass":
+                values = elements[1].split(" ")
+                value = carla.Vector3D(
+                    float(values[0][1:-1]),
+                    float(values[1][:-1]),
+                    float(values[2][:-1]),
+                )
+                setattr(physics_control, name, value)
+            elif name == "torque_curve" or name == "steering_curve":
+                values = elements[1].split(" ")
+                value = parse_vector_list(values)
+                setattr(physics_control, name, value)
+
+            elif name == "use_gear_auto_box":
+                name = "use_gear_autobox"
+                value = True if elements[1] == "true" else False
+                setattr(physics_control, name, value)
+
+            elif "forward_gears" in name or "wheels" in name:
+                pass
+
+            else:
+                name = name.lower()
+                value = float(elements[1])
+                setattr(physics_control, name, value)
+
+    setattr(physics_control, "forward_gears", forward_gears)
+    setattr(physics_control, "wheels", wheels)
+
+    return physics_control
+
+
+def iterate_lines(text):
+    """
+    Lazily yields the lines of a string, without splitting it all at once
     """
+    start = 0
+    end = text.find("\n")
+    while end != -1:
+        yield text[start:end]
+        start = end + 1
+        end = text.find("\n", start)
+
+    if start < len(text):
+        yield text[start:]
 
-    def __init__(self, recorder_info):
 
-        self.recorder_info = recorder_info
-        self.frame_list = None
-        self.frame_row = None
-        self.i = 0
+class ColumnBuffer(object):
+    """
+    Growable table of the values of one of the actor states. Each row holds the
+    frame number, the actor id and the values of the state's columns.
 
-    def get_row_elements(self, indent_num, split_string):
+    Args:
+        columns (tuple): names of the columns of the state
+        capacity (int): initial amount of rows
+    """
+
+    def __init__(self, columns, capacity=1024):
+        self.columns = columns
+        self._frames = np.empty(capacity, dtype=np.int32)
+        self._actor_ids = np.empty(capacity, dtype=np.int32)
+        self._values = np.empty((capacity, len(columns)), dtype=np.float32)
+        self._size = 0
+
+    @staticmethod
+    def from_arrays(columns, frames, actor_ids, values):
         """
-        returns a list with the elements of the row
+        Creates a buffer holding already parsed rows
         """
-        return self.frame_row[indent_num:].split(split_string)
-
-    def next_row(self):
+        buffer = ColumnBuffer(columns, capacity=0)
+        buffer._frames = np.asarray(frames, dtype=np.int32)  # pylint: disable=protected-access
+        buffer._actor_ids = np.asarray(actor_ids, dtype=np.int32)  # pylint: disable=protected-access
+        buffer._values = np.asarray(  # pylint: disable=protected-access
+            values, dtype=np.float32).reshape(-1, len(columns))
+        buffer._size = len(buffer._frames)  # pylint: disable=protected-access
+        return buffer
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def frames(self):
         """
-        Gets the next row of the recorder
+        Frame number of each row
         """
-        self.i += 1
-        self.frame_row = self.frame_list[self.i]
+        return self._frames[:self._size]
 
-    def parse_recorder_info(self):
+    @property
+    def actor_ids(self):
         """
-        Parses the recorder into readable information.
+        Actor id of each row
+        """
+        return self._actor_ids[:self._size]
 
-        Args:
-            recorder_info (str): string given by the recorder
+    @property
+    def values(self):
+        """
+        Nx(len(columns)) array with the values of each row
         """
+        return self._values[:self._size]
 
-        # Divide it into frames
-        recorder_list = self.recorder_info.split("Frame")
+    def append(self, frame, actor_id, values):
+        """
+        Adds a row to the buffer, doubling its capacity if needed
+        """
+        if self._size == len(self._frames):
+            self._resize(max(2 * self._size, 1024))
 
-        # Get general information
-        header = recorder_list[0].split("\n")
-        sim_map = header[1][5:]
-        sim_date = header[2][6:]
+        self._frames[self._size] = frame
+        self._actor_ids[self._size] = actor_id
+        self._values[self._size] = values
+        self._size += 1
 
-        annex = recorder_list[-1].split("\n")
-        sim_frames = int(annex[0][3:])
-        sim_duration = float(annex[1][10:-8])
+    def trim(self):
+        """
+        Releases the unused capacity of the buffer
+        """
+        if self._size != len(self._frames):
+            self._resize(self._size)
 
-        recorder_list = recorder_list[1:-1]
+    def _resize(self, capacity):
+        size = self._size
 
-        simulation_info = {
-            "map": sim_map,
-            "date:": sim_date,
-            "total_frames": sim_frames,
-            "duration": sim_duration
-        }
+        frames = np.empty(capacity, dtype=np.int32)
+        frames[:size] = self._frames[:size]
+        actor_ids = np.empty(capacity, dtype=np.int32)
+        actor_ids[:size] = self._actor_ids[:size]
+        values = np.empty((capacity, len(self.columns)), dtype=np.float32)
+        values[:size] = self._values[:size]
 
-        actors_info = {}
-        frames_info = []
+        self._frames = frames
+        self._actor_ids = actor_ids
+        self._values = values
 
-        for frame in recorder_list:
 
-            # Divide the frame in lines
-            self.frame_list = frame.split("\n")
+class RecorderLog(object):
+    """
+    Columnar representation of a parsed CARLA recorder.
+
+    Attributes:
+        simulation (dict): general information of the simulation
+        actors (dict): static information of each actor, keyed by its id
+        frame_numbers, elapsed_times, delta_times, platform_times (np.ndarray):
+            per frame information. Missing platform times are NaN
+        states (dict): ColumnBuffer of each of the STATE_COLUMNS
+        events (dict): events of the frames that have any, keyed by frame number
+    """
 
-            # Get the general frame information
-            frame_info = self.frame_list[0].split(" ")
-            frame_number = int(frame_info[1])
-            frame_time = float(frame_info[3])
+    def __init__(self, simulation, actors, frame_numbers, elapsed_times, delta_times,
+                 platform_times, states, events):
+        self.simulation = simulation
+        self.actors = actors
+        self.frame_numbers = np.asarray(frame_numbers, dtype=np.int32)
+        self.elapsed_times = np.asarray(elapsed_times, dtype=np.float64)
+        self.delta_times = np.asarray(delta_times, dtype=np.float64)
+        self.platform_times = np.asarray(platform_times, dtype=np.float64)
+        self.states = states
+        self.events = events
+
+    def get_state(self, state):
+        """
+        Returns the (frames, actor_ids, values) arrays of an actor state
+        """
+        buffer = self.states[state]
+        return buffer.frames, buffer.actor_ids, buffer.values
 
-            try:
-                prev_frame = frames_info[frame_number - 2]
-                prev_time = prev_frame["frame"]["elapsed_time"]
-                delta_time = round(frame_time - prev_time, 6)
-            except IndexError:
-                delta_time = 0
+    def get_actors_info(self):
+        """
+        Returns the information of the actors, with carla types
+        """
+        actors_info = {}
+        for actor_id, actor in self.actors.items():
+            actor_info = dict(actor)
+            actor_info["location"] = carla.Location(*actor["location"])
+            for name in ("bounding_box", "trigger_volume"):
+                if name in actor:
+                    x, y, z, ex, ey, ez = actor[name]
+                    actor_info[name] = carla.BoundingBox(carla.Location(x, y, z), carla.Vector3D(ex, ey, ez))
+            actors_info[actor_id] = actor_info
+
+        return actors_info
+
+    def to_dicts(self):
+        """
+        Compatibility adapter returning the (simulation_info, actors_info, frames_info)
+        dictionaries, with carla types, of the previous MetricsParser.
+        """
+        actors_info = self.get_actors_info()
 
-            # Variable to store all the information about the frame
-            frame_state = {
+        frames_info = []
+        frame_positions = {}
+        for i, frame in enumerate(self.frame_numbers.tolist()):
+            platform_time = float(self.platform_times[i])
+            frames_info.append({
                 "frame": {
-                    "elapsed_time": frame_time,
-                    "delta_time": delta_time,
-                    "platform_time": None
+                    "elapsed_time": float(self.elapsed_times[i]),
+                    "delta_time": float(self.delta_times[i]),
+                    "platform_time": None if np.isnan(platform_time) else platform_time
                 },
                 "actors": {},
-                "events":{
-                    "scene_lights": {},
-                    "physics_control": {},
-                    "traffic_light_state_time": {},
-                    "collisions": {}
-                }
-            }
-
-            # Loop through all the other rows.
-            self.i = 0
-            self.next_row()
-
-            while self.frame_row.startswith(' Create') or self.frame_row.startswith('  '):
-
-                if self.frame_row.startswith(' Create'):
-                    elements = self.get_row_elements(1, " ")
-                    actor_id = int(elements[1][:-1])
-
-                    actor = parse_actor(elements)
-                    actors_info.update({actor_id: actor})
-                    actors_info[actor_id].update({"created": frame_number})
-                else:
-                    elements = self.get_row_elements(2, " = ")
-                    actors_info[actor_id].update({elements[0]: elements[1]})
-
-                self.next_row()
-
-            while self.frame_row.startswith(' Destroy'):
-
-                elements = self.get_row_elements(1, " ")
+                "events": self.get_frame_events(frame)
+            })
+            frame_positions[frame] = i
 
-                actor_id = int(elements[1])
-                actors_info[actor_id].update({"destroyed": frame_number})
+        for state in STATE_COLUMNS:
+            frames, actor_ids, values = self.get_state(state)
+            for frame, actor_id, value in zip(frames.tolist(), actor_ids.tolist(), values.tolist()):
+                actor_state = frames_info[frame_positions[frame]]["actors"].setdefault(actor_id, {})
+                actor_state.update(state_to_carla(state, value))
 
-                self.next_row()
+        simulation_info = dict(self.simulation)
 
-            while self.frame_row.startswith(' Collision'):
-
-                elements = self.get_row_elements(1, " ")
-
-                actor_id = int(elements[4])
-                other_id = int(elements[-1])
-
-                if actor_id not in frame_state["events"]["collisions"]:
-                    frame_state["events"]["collisions"][actor_id] = [other_id]
-                else:
-                    collisions = frame_state["events"]["collisions"][actor_id]
-                    collisions.append(other_id)
-                    frame_state["events"]["collisions"].update({actor_id: collisions})
-
-                self.next_row()
-
-            while self.frame_row.startswith(' Parenting'):
-
-                elements = self.get_row_elements(1, " ")
-
-                actor_id = int(elements[1])
-                parent_id = int(elements[3])
-                actors_info[actor_id].update({"parent": parent_id})
-
-                self.next_row()
-
-            if self.frame_row.startswith(' Positions'):
-                self.next_row()
-
-                while self.frame_row.startswith('  '):
-
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
-
-                    transform = parse_transform(elements)
-                    frame_state["actors"].update({actor_id: {"transform": transform}})
-
-                    self.next_row()
-
-            if self.frame_row.startswith(' State traffic lights'):
-                self.next_row()
-
-                while self.frame_row.startswith('  '):
-
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
-
-                    traffic_light = parse_traffic_light(elements)
-                    frame_state["actors"].update({actor_id: traffic_light})
-                    self.next_row()
-
-            if self.frame_row.startswith(' Vehicle animations'):
-                self.next_row()
-
-                while self.frame_row.startswith('  '):
-
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
-
-                    control = parse_control(elements)
-                    frame_state["actors"][actor_id].update({"control": control})
-                    self.next_row()
-
-            if self.frame_row.startswith(' Walker animations'):
-                self.next_row()
-
-                while self.frame_row.startswith('  '):
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
-
-                    frame_state["actors"][actor_id].update({"speed": elements[3]})
-                    self.next_row()
-
-            if self.frame_row.startswith(' Vehicle light animations'):
-                self.next_row()
-
-                while self.frame_row.startswith('  '):
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
-
-                    lights = parse_vehicle_lights(elements)
-                    frame_state["actors"][actor_id].update({"lights": lights})
-                    self.next_row()
-
-            if self.frame_row.startswith(' Scene light changes'):
-                self.next_row()
-
-                while self.frame_row.startswith('  '):
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
-
-                    scene_light = parse_scene_lights(elements)
-                    frame_state["events"]["scene_lights"].update({actor_id: scene_light})
-                    self.next_row()
-
-            if self.frame_row.startswith(' Dynamic actors'):
-                self.next_row()
-
-                while self.frame_row.startswith('  '):
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
-
-                    velocity = parse_velocity(elements)
-                    frame_state["actors"][actor_id].update({"velocity": velocity})
-
-                    angular_v = parse_angular_velocity(elements)
-                    frame_state["actors"][actor_id].update({"angular_velocity": angular_v})
-
-                    if delta_time == 0:
-                        acceleration = carla.Vector3D(0, 0, 0)
-                    else:
-                        prev_velocity = frame_state["actors"][actor_id]["velocity"]
-                        acceleration = (velocity - prev_velocity) / delta_time
-
-                    frame_state["actors"][actor_id].update({"acceleration": acceleration})
-                    self.next_row()
-
-            if self.frame_row.startswith(' Actor bounding boxes'):
-                self.next_row()
-
-                while self.frame_row.startswith('  '):
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
-
-                    bbox = parse_bounding_box(elements)
-                    actors_info[actor_id].update({"bounding_box": bbox})
-                    self.next_row()
-
-            if self.frame_row.startswith(' Actor trigger volumes'):
-                self.next_row()
-
-                while self.frame_row.startswith('  '):
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
-
-                    trigvol = parse_bounding_box(elements)
-                    actors_info[actor_id].update({"trigger_volume": trigvol})
-                    self.next_row()
+        return simulation_info, actors_info, frames_info
 
-            if self.frame_row.startswith(' Current platform time'):
+    def get_frame_events(self, frame):
+        """
+        Returns the events, with carla types, of a frame number
+        """
+        events = {name: {} for name in EVENT_NAMES}
+        if frame not in self.events:
+            return events
 
-                elements = self.get_row_elements(1, " ")
+        frame_events = self.events[frame]
+        events["collisions"] = {k: list(v) for k, v in frame_events["collisions"].items()}
+        for actor_id, elements in frame_events["scene_lights"].items():
+            events["scene_lights"][actor_id] = parse_scene_lights(elements)
+        for actor_id, rows in frame_events["physics_control"].items():
+            events["physics_control"][actor_id] = parse_physics_control(rows)
+        for actor_id, elements in frame_events["traffic_light_state_time"].items():
+            events["traffic_light_state_time"][actor_id] = parse_state_times(elements)
 
-                platform_time = float(elements[-1])
-                frame_state["frame"]["platform_time"] = platform_time
-                self.next_row()
+        return events
 
-            if self.frame_row.startswith(' Physics Control'):
-                self.next_row()
 
-                actor_id = None
-                while self.frame_row.startswith('  '):
+def state_to_carla(state, value):
+    """
+    Converts the values of a row of an actor state into the dictionary entries,
+    with carla types, used by the previous MetricsParser
+    """
+    if state == "transform":
+        x, y, z, pitch, yaw, roll = value
+        return {"transform": carla.Transform(carla.Location(x, y, z), carla.Rotation(pitch, yaw, roll))}
+
+    if state == "traffic_light":
+        number_to_state = {
+            0: carla.TrafficLightState.Red,
+            1: carla.TrafficLightState.Yellow,
+            2: carla.TrafficLightState.Green,
+            3: carla.TrafficLightState.Off,
+            4: carla.TrafficLightState.Unknown,
+        }
+        return {
+            "state": number_to_state[int(value[0])],
+            "frozen": bool(value[1]),
+            "elapsed_time": value[2],
+        }
 
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
-                    physics_control = carla.VehiclePhysicsControl()
-                    self.next_row()
+    if state == "control":
+        throttle, steer, brake, hand_brake, gear = value
+        control = carla.VehicleControl(throttle, steer, brake, bool(hand_brake), gear < 0, False, int(gear))
+        return {"control": control}
+
+    if state == "speed":
+        return {"speed": value[0]}
+
+    if state == "lights":
+        srt_to_vlight = {
+            "None": carla.VehicleLightState.NONE,
+            "Position": carla.VehicleLightState.Position,
+            "LowBeam": carla.VehicleLightState.LowBeam,
+            "HighBeam": carla.VehicleLightState.HighBeam,
+            "Brake": carla.VehicleLightState.Brake,
+            "RightBlinker": carla.VehicleLightState.RightBlinker,
+            "LeftBlinker": carla.VehicleLightState.LeftBlinker,
+            "Reverse": carla.VehicleLightState.Reverse,
+            "Fog": carla.VehicleLightState.Fog,
+            "Interior": carla.VehicleLightState.Interior,
+            "Special1": carla.VehicleLightState.Special1,
+            "Special2": carla.VehicleLightState.Special2,
+        }
+        mask = int(value[0])
+        return {"lights": [srt_to_vlight[name] for i, name in enumerate(LIGHT_NAMES) if mask & (1 << i)]}
 
-                    forward_gears = []
-                    wheels = []
-                    while self.frame_row.startswith('   '):
+    return {state: carla.Vector3D(*value)}
 
-                        if self.frame_row.startswith('    '):
-                            elements = self.get_row_elements(4, " ")
-                            if elements[0] == "gear":
-                                forward_gears.append(parse_gears_control(elements))
-                            elif elements[0] == "wheel":
-                                wheels.append(parse_wheels_control(elements))
 
-                        else:
-                            elements = self.get_row_elements(3, " = ")
-                            name = elements[0]
+class MetricsParser(object):
+    """
+    Class used to parse the CARLA recorder into readable information.
 
-                            if name == "center_of_mass":
-                                values = elements[1].split(" ")
-                                value = carla.Vector3D(
-                                    float(values[0][1:-1]),
-                                    float(values[1][:-1]),
-                                    float(values[2][:-1]),
-                                )
-                                setattr(physics_control, name, value)
-                            elif name == "torque_curve" or name == "steering_curve":
-                                values = elements[1].split(" ")
-                                value = parse_vector_list(values)
-                                setattr(physics_control, name, value)
+    Args:
+        recorder_info (str or iterable): string given by the recorder, or any iterable
+            of its lines, such as an opened file
+    """
 
-                            elif name == "use_gear_auto_box":
-                                name = "use_gear_autobox"
-                                value = True if elements[1] == "true" else False
-                                setattr(physics_control, name, value)
+    def __init__(self, recorder_info):
 
-                            elif "forward_gears" in name or "wheels" in name:
-                                pass
+        if isinstance(recorder_info, str):
+            recorder_info = iterate_lines(recorder_info)
+        self._lines = recorder_info
 
-                            else:
-                                name = name.lower()
-                                value = float(elements[1])
-                                setattr(physics_control, name, value)
+        self._simulation = {"map": None, "date:": None, "total_frames": 0, "duration": 0.0}
+        self._actors = {}
+        self._states = {state: ColumnBuffer(columns) for state, columns in STATE_COLUMNS.items()}
+        self._events = {}
 
-                        self.next_row()
+        self._frame_numbers = []
+        self._elapsed_times = []
+        self._delta_times = []
+        self._platform_times = []
 
-                    setattr(physics_control, "forward_gears", forward_gears)
-                    setattr(physics_control, "wheels", wheels)
-                    frame_state["events"]["physics_control"].update({actor_id: physics_control})
+        self._frame = None
+        self._section = None
+        self._actor_id = None
+        self._physics_rows = None
+        self._last_velocities = {}
 
-            if self.frame_row.startswith(' Traffic Light time events'):
-                self.next_row()
+    def parse_recorder_info(self):
+        """
+        Parses the recorder into readable information.
+        Returns the (simulation_info, actors_info, frames_info) dictionaries.
+        """
+        return self.parse().to_dicts()
 
-                while self.frame_row.startswith('  '):
-                    elements = self.get_row_elements(2, " ")
-                    actor_id = int(elements[1])
+    def parse(self):
+        """
+        Parses the recorder, line by line, into a RecorderLog
+        """
+        for line in self._lines:
+            line = line.rstrip("\r\n")
+
+            if line.startswith("  "):
+                self._parse_section_row(line)
+            elif line.startswith(" "):
+                self._parse_section_header(line)
+            elif line.startswith("Frames: "):
+                self._simulation["total_frames"] = int(line[8:])
+            elif line.startswith("Frame "):
+                self._start_frame(line)
+            elif line.startswith("Duration: "):
+                self._simulation["duration"] = float(line[10:-8])
+            elif line.startswith("Map: "):
+                self._simulation["map"] = line[5:]
+            elif line.startswith("Date: "):
+                self._simulation["date:"] = line[6:]
+
+        self._end_physics_control()
+        for buffer in self._states.values():
+            buffer.trim()
+
+        return RecorderLog(self._simulation, self._actors, self._frame_numbers, self._elapsed_times,
+                           self._delta_times, self._platform_times, self._states, self._events)
+
+    def _get_frame_events(self):
+        if self._frame not in self._events:
+            self._events[self._frame] = {name: {} for name in EVENT_NAMES}
+        return self._events[self._frame]
+
+    def _start_frame(self, line):
+        self._end_physics_control()
+        self._section = None
+
+        frame_info = line.split(" ")
+        frame_number = int(frame_info[1])
+        frame_time = float(frame_info[3])
+
+        if self._elapsed_times:
+            delta_time = round(frame_time - self._elapsed_times[-1], 6)
+        else:
+            delta_time = 0
+
+        self._frame = frame_number
+        self._frame_numbers.append(frame_number)
+        self._elapsed_times.append(frame_time)
+        self._delta_times.append(delta_time)
+        self._platform_times.append(np.nan)
+
+    def _parse_section_header(self, line):
+        self._end_physics_control()
+        elements = line[1:].split(" ")
+        name = elements[0]
+
+        if name == "Create":
+            actor_id = int(elements[1][:-1])
+            self._actors[actor_id] = parse_actor(elements)
+            self._actors[actor_id]["created"] = self._frame
+            self._actor_id = actor_id
+            self._section = "Create"
+
+        elif name == "Destroy":
+            self._actors[int(elements[1])]["destroyed"] = self._frame
+            self._section = None
+
+        elif name == "Collision":
+            collisions = self._get_frame_events()["collisions"]
+            collisions.setdefault(int(elements[4]), []).append(int(elements[-1]))
+            self._section = None
+
+        elif name == "Parenting":
+            self._actors[int(elements[1])]["parent"] = int(elements[3])
+            self._section = None
+
+        elif line.startswith(' Current platform time'):
+            self._platform_times[-1] = float(elements[-1])
+            self._section = None
+
+        else:
+            self._section = None
+            for section in SECTION_NAMES:
+                if line.startswith(section, 1):
+                    self._section = section
+                    break
+
+    def _parse_section_row(self, line):
+        section = self._section
+
+        if section == "Create":
+            elements = line[2:].split(" = ")
+            self._actors[self._actor_id][elements[0]] = elements[1]
+            return
+
+        if section is None:
+            return
+
+        if section == "Physics Control":
+            if line.startswith("   "):
+                self._physics_rows.append(line)
+            else:
+                self._end_physics_control()
+                self._actor_id = int(line[2:].split(" ")[1])
+                self._physics_rows = []
+            return
+
+        elements = line[2:].split(" ")
+        actor_id = int(elements[1])
+        frame = self._frame
+
+        if section == "Positions":
+            self._states["transform"].append(frame, actor_id, parse_transform(elements))
+
+        elif section == "State traffic lights":
+            self._states["traffic_light"].append(frame, actor_id, parse_traffic_light(elements))
+
+        elif section == "Vehicle animations":
+            self._states["control"].append(frame, actor_id, parse_control(elements))
+
+        elif section == "Walker animations":
+            self._states["speed"].append(frame, actor_id, (float(elements[3]),))
+
+        elif section == "Vehicle light animations":
+            self._states["lights"].append(frame, actor_id, parse_vehicle_lights(elements))
+
+        elif section == "Scene light changes":
+            self._get_frame_events()["scene_lights"][actor_id] = elements
+
+        elif section == "Dynamic actors":
+            velocity = parse_velocity(elements)
+            self._states["velocity"].append(frame, actor_id, velocity)
+            self._states["angular_velocity"].append(frame, actor_id, parse_angular_velocity(elements))
+            self._states["acceleration"].append(frame, actor_id, self._get_acceleration(actor_id, velocity))
+
+        elif section == "Actor bounding boxes":
+            self._actors[actor_id]["bounding_box"] = parse_bounding_box(elements)
+
+        elif section == "Actor trigger volumes":
+            self._actors[actor_id]["trigger_volume"] = parse_bounding_box(elements)
+
+        elif section == "Traffic Light time events":
+            self._get_frame_events()["traffic_light_state_time"][actor_id] = elements
+
+    def _get_acceleration(self, actor_id, velocity):
+        """
+        Finite difference between the velocity of the actor and the one it had at the previous frame
+        """
+        delta_time = self._delta_times[-1]
+        previous = self._last_velocities.get(actor_id)
+        self._last_velocities[actor_id] = (self._frame, velocity)
 
-                    state_times = parse_state_times(elements)
-                    frame_state["events"]["traffic_light_state_time"].update({actor_id: state_times})
-                    self.next_row()
+        if delta_time == 0 or previous is None or previous[0] != self._frame_numbers[-2]:
+            return (0.0, 0.0, 0.0)
 
-            frames_info.append(frame_state)
+        prev_velocity = previous[1]
+        return tuple((v - pv) / delta_time for v, pv in zip(velocity, prev_velocity))
 
-        return simulation_info, actors_info, frames_info
+    def _end_physics_control(self):
+        if self._physics_rows is not None:
+            self._get_frame_events()["physics_control"][self._actor_id] = self._physics_rows
+            self._physics_rows = None
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides an on-disk cache of the parsed CARLA recorder logs, so that
+the metrics can be re-run without a server and without parsing the recorder again.
+"""
+
+from __future__ import print_function
+
+import json
+import os
+
+import numpy as np
+
+from srunner.metrics.tools.metrics_parser import STATE_COLUMNS, ColumnBuffer, RecorderLog
+from srunner.tools.npz_cache import NpzCache
+
+
+class RecorderCache(NpzCache):
+
+    """
+    Cache of parsed recorder logs.
+
+    Each entry is a compressed .npz file named after the hash of the recorder's path,
+    size and modification time. It holds the columns of the RecorderLog, its actor and event
+    information as JSON, and the OpenDRIVE of the map the simulation took place in.
+
+    Args:
+        cache_dir (str): directory where the entries are stored
+    """
+
+    PREFIX = "recorder"
+    VERSION = 1
+
+    @classmethod
+    def get_key(cls, recorder_file):
+        """
+        returns the cache key of a recorder file
+        """
+        stat = os.stat(recorder_file)
+        return cls._hash(os.path.abspath(recorder_file), stat.st_size, stat.st_mtime_ns)
+
+    def load(self, key):
+        """
+        returns the cached (recorder_log, opendrive) for the given key, or None if not cached
+        """
+        return self._read(key, self._decode)
+
+    def _decode(self, data):
+        info = json.loads(str(data['info']))
+        opendrive = str(data['opendrive'])
+
+        states = {}
+        for state, columns in STATE_COLUMNS.items():
+            states[state] = ColumnBuffer.from_arrays(
+                columns, data[state + '_frames'], data[state + '_actor_ids'], data[state + '_values'])
+
+        recorder_log = RecorderLog(
+            info['simulation'],
+            {actor_id: actor for actor_id, actor in info['actors']},
+            data['frame_numbers'],
+            data['elapsed_times'],
+            data['delta_times'],
+            data['platform_times'],
+            states,
+            {frame: self._decode_events(events) for frame, events in info['events']}
+        )
+        return recorder_log, opendrive
+
+    def store(self, key, recorder_log, opendrive):
+        """
+        Store a RecorderLog, and the OpenDRIVE of its map, under the given key
+        """
+        info = {
+            'simulation': recorder_log.simulation,
+            'actors': [[actor_id, actor] for actor_id, actor in recorder_log.actors.items()],
+            'events': [[frame, self._encode_events(events)] for frame, events in recorder_log.events.items()]
+        }
+
+        arrays = {
+            'info': np.array(json.dumps(info)),
+            'opendrive': np.array(opendrive),
+            'frame_numbers': recorder_log.frame_numbers,
+            'elapsed_times': recorder_log.elapsed_times,
+            'delta_times': recorder_log.delta_times,
+            'platform_times': recorder_log.platform_times,
+        }
+        for state in STATE_COLUMNS:
+            frames, actor_ids, values = recorder_log.get_state(state)
+            arrays[state + '_frames'] = frames
+            arrays[state + '_actor_ids'] = actor_ids
+            arrays[state + '_values'] = values
+
+        self._write(key, arrays)
+
+    @staticmethod
+    def _encode_events(events):
+        # JSON objects only have string keys, so store the actor ids as [key, value] pairs
+        return {name: [[actor_id, value] for actor_id, value in events[name].items()] for name in events}
+
+    @staticmethod
+    def _decode_events(events):
+        return {name: {actor_id: value for actor_id, value in events[name]} for name in events}
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides the BehaviorProfiler, which measures the time spent
+ticking each behavior of a py_trees tree
+"""
+
+from __future__ import print_function
+
+import time
+
+
+class BehaviorProfiler(object):
+
+    """
+    Accumulates the amount of ticks and the time spent at each behavior of a tree.
+
+    attach() replaces the tick() generator of each behavior of the tree by a timed one,
+    and detach() restores it, so that nothing is added to the ticks when not profiling.
+    The time of a behavior includes the one of its children, its self time doesn't.
+    Behaviors added to the tree after attach() aren't profiled.
+
+    Args:
+        tree (py_trees.behaviour.Behaviour): root of the tree
+    """
+
+    def __init__(self, tree):
+        self._tree = tree
+        self._nodes = []
+        # Per node [path, class name, ticks, time, parent index]
+        self._stats = []
+
+    def attach(self):
+        """
+        Starts profiling the tree
+        """
+        self.detach()
+        self._stats = []
+        self._attach_node(self._tree, None, None)
+
+    def _attach_node(self, node, parent_path, parent_index):
+        name = node.name.replace(";", ":")
+        path = name if parent_path is None else parent_path + ";" + name
+        index = len(self._stats)
+        stats = [path, node.__class__.__name__, 0, 0.0, parent_index]
+        self._stats.append(stats)
+        self._nodes.append(node)
+
+        tick = node.tick
+
+        def profiled_tick():
+            stats[2] += 1
+            generator = tick()
+            while True:
+                start_time = time.perf_counter()
+                try:
+                    ticked_node = next(generator)
+                except StopIteration:
+                    stats[3] += time.perf_counter() - start_time
+                    return
+                stats[3] += time.perf_counter() - start_time
+                yield ticked_node
+
+        node.tick = profiled_tick
+
+        for child in node.children:
+            self._attach_node(child, path, index)
+
+    def detach(self):
+        """
+        Stops profiling the tree, keeping the results
+        """
+        for node in self._nodes:
+            if 'tick' in node.__dict__:
+                del node.tick
+        self._nodes = []
+
+    def _get_self_times(self):
+        self_times = [stats[3] for stats in self._stats]
+        for stats in self._stats:
+            if stats[4] is not None:
+                self_times[stats[4]] -= stats[3]
+        return [max(self_time, 0.0) for self_time in self_times]
+
+    def get_node_report(self):
+        """
+        Returns a list of (path, class name, ticks, time, self time) per node, sorted by self time [s]
+        """
+        report = [(stats[0], stats[1], stats[2], stats[3], self_time)
+                  for stats, self_time in zip(self._stats, self._get_self_times())]
+        return sorted(report, key=lambda entry: entry[4], reverse=True)
+
+    def get_class_report(self):
+        """
+        Returns a list of (class name, nodes, ticks, self time) per class, sorted by self time [s]
+        """
+        classes = {}
+        for stats, self_time in zip(self._stats, self._get_self_times()):
+            entry = classes.setdefault(stats[1], [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += stats[2]
+            entry[2] += self_time
+        report = [(name, entry[0], entry[1], entry[2]) for name, entry in classes.items()]
+        return sorted(report, key=lambda entry: entry[3], reverse=True)
+
+    def print_report(self, top=20):
+        """
+        Prints the top behaviors and classes by self time [ms]
+        """
+        print("ScenarioManager: Top {} behaviors by self time [ms]".format(top))
+        print("  {:>10}{:>10}{:>10}{:>10}  {}".format("ticks", "total", "self", "self/tick", "behavior"))
+        for path, class_name, ticks, total_time, self_time in self.get_node_report()[:top]:
+            print("  {:>10}{:>10.1f}{:>10.1f}{:>10.3f}  {} ({})".format(
+                ticks, 1000 * total_time, 1000 * self_time, 1000 * self_time / ticks if ticks else 0.0,
+                path.rsplit(";", 1)[-1], class_name))
+
+        print("ScenarioManager: Top {} behavior classes by self time [ms]".format(top))
+        print("  {:>10}{:>10}{:>10}  {}".format("nodes", "ticks", "self", "class"))
+        for class_name, nodes, ticks, self_time in self.get_class_report()[:top]:
+            print("  {:>10}{:>10}{:>10.1f}  {}".format(nodes, ticks, 1000 * self_time, class_name))
+
+    def write_collapsed(self, filename):
+        """
+        Writes the self time [us] of each node keyed by its tree path, in the collapsed
+        stack format used by flame graph tools (e.g. flamegraph.pl, speedscope)
+        """
+        with open(filename, 'w') as fd:
+            for stats, self_time in zip(self._stats, self._get_self_times()):
+                microseconds = int(round(1e6 * self_time))
+                if microseconds > 0:
+                    fd.write("{} {}\n".format(stats[0], microseconds))
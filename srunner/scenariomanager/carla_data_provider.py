@@ -12,13 +12,19 @@ local buffers to avoid blocking calls to CARLA
 
 from __future__ import print_function
 
+import fnmatch
 import math
 import re
+import numpy as np
 from numpy import random
 from six import iteritems
 
 import carla
 
+from srunner.tools.route_index import RouteIndex
+from srunner.tools.route_planner import MemoizedGlobalRoutePlanner
+from srunner.tools.spatial_grid import SpatialGrid
+
 
 def calculate_velocity(actor):
     """
@@ -29,6 +35,108 @@ def calculate_velocity(actor):
     return math.sqrt(velocity_squared)
 
 
+class ActorStateTable(object):
+
+    """
+    Columnar table holding the state of all registered actors for one tick.
+    Row i of every column belongs to the actor with id ids[i].
+
+    Columns:
+    - ids: actor ids (int64)
+    - locations: x, y, z of the actor location (float64, Nx3)
+    - yaws: yaw of the actor transform in degrees (float64)
+    - velocities: absolute planar velocity (float64)
+    """
+
+    def __init__(self, size=0, frame=None):
+        self.frame = frame
+        self.ids = np.zeros(size, dtype=np.int64)
+        self.locations = np.zeros((size, 3), dtype=np.float64)
+        self.yaws = np.zeros(size, dtype=np.float64)
+        self.velocities = np.zeros(size, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def resize(self, size):
+        """
+        Shrink the table to the first size rows
+        """
+        self.ids = self.ids[:size]
+        self.locations = self.locations[:size]
+        self.yaws = self.yaws[:size]
+        self.velocities = self.velocities[:size]
+
+
+class ActorState(object):
+
+    """
+    Buffered state of a single registered actor
+    """
+
+    __slots__ = ('actor', 'velocity', 'location', 'transform', 'alive')
+
+    def __init__(self, actor):
+        self.actor = actor
+        self.velocity = 0.0
+        self.location = None
+        self.transform = None
+        self.alive = True
+
+
+class ActorSpatialIndex(object):
+
+    """
+    Spatial index over the locations of the actors of a tick, built from its ActorStateTable.
+    It is built once per tick and answers radius and nearest-neighbour queries.
+
+    Both queries return a list of (distance, actor) tuples sorted by distance.
+    The optional type_filter is a wildcard pattern matched against the actor
+    type id, e.g. 'vehicle.*'
+
+    locations is an Nx3 array, row i being the location of actors[i]
+    """
+
+    def __init__(self, table, actors, locations, cell_size=20.0):
+        self.table = table
+        self._actors = actors
+        self._type_ids = [actor.type_id for actor in actors]
+        self._grid = SpatialGrid(locations, cell_size)
+
+    def __len__(self):
+        return len(self._actors)
+
+    def _matches(self, row, type_filter):
+        return type_filter is None or fnmatch.fnmatch(self._type_ids[row], type_filter)
+
+    def actors_within(self, location, radius, type_filter=None):
+        """
+        returns all actors closer than radius to the given location
+        """
+        rows, distances = self._grid.query_radius(location, radius)
+        return [(distance, self._actors[row]) for row, distance in zip(rows, distances)
+                if self._matches(row, type_filter)]
+
+    def k_nearest(self, location, k, type_filter=None):
+        """
+        returns the k actors closest to the given location
+        """
+        if type_filter is None:
+            rows, distances = self._grid.query_nearest(location, k)
+            return [(distance, self._actors[row]) for row, distance in zip(rows, distances)]
+
+        # Widen the search until enough actors of the requested type are found
+        result = []
+        amount = k
+        while True:
+            rows, distances = self._grid.query_nearest(location, amount)
+            result = [(distance, self._actors[row]) for row, distance in zip(rows, distances)
+                      if self._matches(row, type_filter)]
+            if len(result) >= k or len(rows) < amount:
+                return result[:k]
+            amount *= 2
+
+
 class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
 
     """
@@ -46,10 +154,20 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
     In addition it provides access to the map and the transform of all traffic lights
     """
 
-    _actor_velocity_map = {}
-    _actor_location_map = {}
-    _actor_transform_map = {}
+    _actor_state_registry = {}
+    _actor_state_table = ActorStateTable()
+    _actor_spatial_index = None
+    _world_actor_ids = frozenset()
+    _world_dynamic_actors = {}
+    _unregistered_actors = {}
     _traffic_light_map = {}
+    _traffic_light_trigger_grid = None
+    _traffic_light_trigger_list = []
+    _next_traffic_light_cache = {}
+    _waypoint_cache = {}
+    _waypoint_cache_resolution = 0.01
+    _waypoint_cache_hits = 0
+    _waypoint_cache_misses = 0
     _carla_actor_pool = {}
     _carla_sensor_pool = {}
     _client = None
@@ -60,6 +178,8 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
     _spawn_index = 0
     _blueprint_library = None
     _ego_vehicle_route = None
+    _ego_vehicle_route_index = None
+    _global_route_planners = {}
     _traffic_manager_port = 8000
     _random_seed = 2000
     _rng = random.RandomState(_random_seed)
@@ -67,26 +187,23 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
     @staticmethod
     def register_actor(actor):
         """
-        Add new actor to dictionaries
+        Add new actor to the state registry
         If actor already exists, throw an exception
         """
-        if actor in CarlaDataProvider._actor_velocity_map:
+        if actor.id in CarlaDataProvider._actor_state_registry:
             raise KeyError(
                 "Vehicle '{}' already registered. Cannot register twice!".format(actor.id))
-        else:
-            CarlaDataProvider._actor_velocity_map[actor] = 0.0
 
-        if actor in CarlaDataProvider._actor_location_map:
-            raise KeyError(
-                "Vehicle '{}' already registered. Cannot register twice!".format(actor.id))
-        else:
-            CarlaDataProvider._actor_location_map[actor] = None
+        CarlaDataProvider._actor_state_registry[actor.id] = ActorState(actor)
 
-        if actor in CarlaDataProvider._actor_transform_map:
-            raise KeyError(
-                "Vehicle '{}' already registered. Cannot register twice!".format(actor.id))
-        else:
-            CarlaDataProvider._actor_transform_map[actor] = None
+    @staticmethod
+    def unregister_actor_by_id(actor_id):
+        """
+        Remove an actor from the state registry. Unknown ids are ignored
+        """
+        CarlaDataProvider._actor_state_registry.pop(actor_id, None)
+        # The actor is still part of the state table until the next tick
+        CarlaDataProvider._actor_spatial_index = None
 
     @staticmethod
     def register_actors(actors):
@@ -97,34 +214,179 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
             CarlaDataProvider.register_actor(actor)
 
     @staticmethod
-    def on_carla_tick():
+    def on_carla_tick(snapshot=None):
         """
         Callback from CARLA
-        """
-        for actor in CarlaDataProvider._actor_velocity_map:
-            if actor is not None and actor.is_alive:
-                CarlaDataProvider._actor_velocity_map[actor] = calculate_velocity(actor)
 
-        for actor in CarlaDataProvider._actor_location_map:
-            if actor is not None and actor.is_alive:
-                CarlaDataProvider._actor_location_map[actor] = actor.get_location()
+        If the world snapshot of the current tick is provided, the state of all
+        registered actors is read from it instead of querying each actor
+        individually, which saves several blocking calls per actor.
+        """
+        CarlaDataProvider._waypoint_cache.clear()
 
-        for actor in CarlaDataProvider._actor_transform_map:
-            if actor is not None and actor.is_alive:
-                CarlaDataProvider._actor_transform_map[actor] = actor.get_transform()
+        if snapshot is not None:
+            CarlaDataProvider._update_from_snapshot(snapshot)
+        else:
+            CarlaDataProvider._update_from_actors()
+        CarlaDataProvider._update_unregistered_actors(snapshot)
 
         world = CarlaDataProvider._world
         if world is None:
             print("WARNING: CarlaDataProvider couldn't find the world")
 
+    @staticmethod
+    def _update_from_actors():
+        """
+        Refresh the buffered actor data by querying every actor
+        """
+        table = ActorStateTable(len(CarlaDataProvider._actor_state_registry))
+
+        row = 0
+        for actor_id, state in CarlaDataProvider._actor_state_registry.items():
+            actor = state.actor
+            state.alive = actor is not None and actor.is_alive
+            if not state.alive:
+                continue
+
+            state.velocity = calculate_velocity(actor)
+            state.transform = actor.get_transform()
+            state.location = state.transform.location
+
+            CarlaDataProvider._fill_state_table_row(table, row, actor_id, state)
+            row += 1
+
+        table.resize(row)
+        CarlaDataProvider._actor_state_table = table
+
+    @staticmethod
+    def _update_from_snapshot(snapshot):
+        """
+        Refresh the buffered actor data and the actor state table
+        from a single world snapshot
+        """
+        table = ActorStateTable(len(CarlaDataProvider._actor_state_registry), snapshot.frame)
+
+        row = 0
+        for actor_id, state in CarlaDataProvider._actor_state_registry.items():
+            actor_snapshot = snapshot.find(actor_id)
+            state.alive = actor_snapshot is not None
+            if not state.alive:
+                # The actor is no longer part of the simulation
+                continue
+
+            velocity_vector = actor_snapshot.get_velocity()
+            state.velocity = math.sqrt(velocity_vector.x**2 + velocity_vector.y**2)
+            state.transform = actor_snapshot.get_transform()
+            state.location = state.transform.location
+
+            CarlaDataProvider._fill_state_table_row(table, row, actor_id, state)
+            row += 1
+
+        table.resize(row)
+        CarlaDataProvider._actor_state_table = table
+
+    @staticmethod
+    def _update_unregistered_actors(snapshot):
+        """
+        Refresh the transforms of the vehicles and walkers of the world that aren't registered,
+        such as an ego vehicle spawned by another client, so that the actor spatial index
+        still sees them. With a snapshot, the world is only queried for these actors
+        when the actors of the snapshot change
+        """
+        world = CarlaDataProvider._world
+        registry = CarlaDataProvider._actor_state_registry
+        unregistered_actors = {}
+
+        if world is None:
+            pass
+        elif snapshot is None:
+            for actor in world.get_actors():
+                if actor.id not in registry and actor.type_id.startswith(('vehicle.', 'walker.')):
+                    unregistered_actors[actor.id] = (actor, actor.get_transform())
+        else:
+            actor_ids = frozenset(actor_snapshot.id for actor_snapshot in snapshot)
+            if actor_ids != CarlaDataProvider._world_actor_ids:
+                CarlaDataProvider._world_actor_ids = actor_ids
+                CarlaDataProvider._world_dynamic_actors = {
+                    actor.id: actor for actor in world.get_actors()
+                    if actor.type_id.startswith(('vehicle.', 'walker.'))}
+
+            for actor_id, actor in CarlaDataProvider._world_dynamic_actors.items():
+                if actor_id in registry:
+                    continue
+                actor_snapshot = snapshot.find(actor_id)
+                if actor_snapshot is not None:
+                    unregistered_actors[actor_id] = (actor, actor_snapshot.get_transform())
+
+        CarlaDataProvider._unregistered_actors = unregistered_actors
+
+    @staticmethod
+    def _fill_state_table_row(table, row, actor_id, state):
+        """
+        Copy the buffered state of an actor into a row of the state table
+        """
+        location = state.location
+        table.ids[row] = actor_id
+        table.locations[row] = (location.x, location.y, location.z)
+        table.yaws[row] = state.transform.rotation.yaw
+        table.velocities[row] = state.velocity
+
+    @staticmethod
+    def get_actor_state_table():
+        """
+        returns the columnar state table of all alive registered actors of the last tick
+        """
+        return CarlaDataProvider._actor_state_table
+
+    @staticmethod
+    def get_actor_spatial_index():
+        """
+        returns the spatial index over the cached locations of all alive registered actors,
+        and of the vehicles and walkers of the world that aren't registered.
+        The index is built on first use after each tick, and rebuilt if actors are unregistered
+        during the tick, which are left out of it
+        """
+        table = CarlaDataProvider._actor_state_table
+        index = CarlaDataProvider._actor_spatial_index
+        if index is None or index.table is not table:
+            registry = CarlaDataProvider._actor_state_registry
+            rows = []
+            actors = []
+            for row, actor_id in enumerate(table.ids):
+                state = registry.get(actor_id)
+                if state is not None:
+                    rows.append(row)
+                    actors.append(state.actor)
+            locations = table.locations[rows]
+
+            unregistered_actors = CarlaDataProvider._unregistered_actors.values()
+            if unregistered_actors:
+                actors.extend(actor for actor, _ in unregistered_actors)
+                locations = np.vstack([locations, [(transform.location.x, transform.location.y, transform.location.z)
+                                                   for _, transform in unregistered_actors]])
+
+            index = ActorSpatialIndex(table, actors, locations)
+            CarlaDataProvider._actor_spatial_index = index
+
+        return index
+
+    @staticmethod
+    def get_actor_state(actor):
+        """
+        returns the buffered ActorState for the given actor or actor id,
+        or None if it is not registered
+        """
+        actor_id = actor if isinstance(actor, int) else actor.id
+        return CarlaDataProvider._actor_state_registry.get(actor_id, None)
+
     @staticmethod
     def get_velocity(actor):
         """
         returns the absolute velocity for the given actor
         """
-        for key in CarlaDataProvider._actor_velocity_map:
-            if key.id == actor.id:
-                return CarlaDataProvider._actor_velocity_map[key]
+        state = CarlaDataProvider.get_actor_state(actor)
+        if state is not None:
+            return state.velocity
 
         # We are intentionally not throwing here
         # This may cause exception loops in py_trees
@@ -136,9 +398,9 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         """
         returns the location for the given actor
         """
-        for key in CarlaDataProvider._actor_location_map:
-            if key.id == actor.id:
-                return CarlaDataProvider._actor_location_map[key]
+        state = CarlaDataProvider.get_actor_state(actor)
+        if state is not None:
+            return state.location
 
         # We are intentionally not throwing here
         # This may cause exception loops in py_trees
@@ -148,11 +410,16 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
     @staticmethod
     def get_transform(actor):
         """
-        returns the transform for the given actor
+        returns the transform for the given actor.
+        Vehicles and walkers that aren't registered are looked up at the world actors of the last tick
         """
-        for key in CarlaDataProvider._actor_transform_map:
-            if key.id == actor.id:
-                return CarlaDataProvider._actor_transform_map[key]
+        state = CarlaDataProvider.get_actor_state(actor)
+        if state is not None:
+            return state.transform
+
+        actor_id = actor if isinstance(actor, int) else actor.id
+        if actor_id in CarlaDataProvider._unregistered_actors:
+            return CarlaDataProvider._unregistered_actors[actor_id][1]
 
         # We are intentionally not throwing here
         # This may cause exception loops in py_trees
@@ -208,6 +475,39 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
 
         return CarlaDataProvider._map
 
+    @staticmethod
+    def get_waypoint(location, project_to_road=True, lane_type=carla.LaneType.Driving):
+        """
+        Same as carla.Map.get_waypoint, but the projections are shared during a tick.
+        Locations are quantized to _waypoint_cache_resolution, so repeated projections
+        of the same location in one tick only query the map once.
+        """
+        resolution = CarlaDataProvider._waypoint_cache_resolution
+        key = (int(round(location.x / resolution)),
+               int(round(location.y / resolution)),
+               int(round(location.z / resolution)),
+               lane_type,
+               project_to_road)
+
+        if key in CarlaDataProvider._waypoint_cache:
+            CarlaDataProvider._waypoint_cache_hits += 1
+            return CarlaDataProvider._waypoint_cache[key]
+
+        CarlaDataProvider._waypoint_cache_misses += 1
+        waypoint = CarlaDataProvider.get_map().get_waypoint(
+            location, project_to_road=project_to_road, lane_type=lane_type)
+        CarlaDataProvider._waypoint_cache[key] = waypoint
+        return waypoint
+
+    @staticmethod
+    def get_waypoint_cache_stats():
+        """
+        returns the amount of waypoint projections served from the cache (hits)
+        and the ones that had to query the map (misses)
+        """
+        return {'hits': CarlaDataProvider._waypoint_cache_hits,
+                'misses': CarlaDataProvider._waypoint_cache_misses}
+
     @staticmethod
     def is_sync_mode():
         """
@@ -243,6 +543,26 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
                 raise KeyError(
                     "Traffic light '{}' already registered. Cannot register twice!".format(traffic_light.id))
 
+        CarlaDataProvider._build_traffic_light_index()
+
+    @staticmethod
+    def _build_traffic_light_index():
+        """
+        Precompute the world location of the trigger volume of all traffic lights
+        in a spatial index, and invalidate the cached next traffic light lookups
+        """
+        traffic_lights = []
+        trigger_locations = []
+        for traffic_light, tl_t in CarlaDataProvider._traffic_light_map.items():
+            if hasattr(traffic_light, 'trigger_volume'):
+                transformed_tv = tl_t.transform(traffic_light.trigger_volume.location)
+                traffic_lights.append(traffic_light)
+                trigger_locations.append((transformed_tv.x, transformed_tv.y, transformed_tv.z))
+
+        CarlaDataProvider._traffic_light_trigger_list = traffic_lights
+        CarlaDataProvider._traffic_light_trigger_grid = SpatialGrid(trigger_locations, 50.0)
+        CarlaDataProvider._next_traffic_light_cache.clear()
+
     @staticmethod
     def annotate_trafficlight_in_group(traffic_light):
         """
@@ -350,6 +670,9 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
     def get_next_traffic_light(actor, use_cached_location=True):
         """
         returns the next relevant traffic light for the provided actor
+
+        The result only depends on the lane the actor is at, so it is cached
+        per road, section and lane until the map is prepared again
         """
 
         if not use_cached_location:
@@ -358,39 +681,44 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
             location = CarlaDataProvider.get_location(actor)
 
         waypoint = CarlaDataProvider.get_map().get_waypoint(location)
-        # Create list of all waypoints until next intersection
-        list_of_waypoints = []
-        while waypoint and not waypoint.is_intersection:
-            list_of_waypoints.append(waypoint)
-            waypoint = waypoint.next(2.0)[0]
 
-        # If the list is empty, the actor is in an intersection
-        if not list_of_waypoints:
+        # If the actor is in an intersection, there is no next traffic light
+        if waypoint is None or waypoint.is_intersection:
             return None
 
-        relevant_traffic_light = None
-        distance_to_relevant_traffic_light = float("inf")
+        lane_key = (waypoint.road_id, waypoint.section_id, waypoint.lane_id)
+        if lane_key in CarlaDataProvider._next_traffic_light_cache:
+            return CarlaDataProvider._next_traffic_light_cache[lane_key]
 
-        for traffic_light in CarlaDataProvider._traffic_light_map:
-            if hasattr(traffic_light, 'trigger_volume'):
-                tl_t = CarlaDataProvider._traffic_light_map[traffic_light]
-                transformed_tv = tl_t.transform(traffic_light.trigger_volume.location)
-                distance = carla.Location(transformed_tv).distance(list_of_waypoints[-1].transform.location)
+        # Find the last waypoint until next intersection
+        last_waypoint = None
+        while waypoint and not waypoint.is_intersection:
+            last_waypoint = waypoint
+            waypoint = waypoint.next(2.0)[0]
 
-                if distance < distance_to_relevant_traffic_light:
-                    relevant_traffic_light = traffic_light
-                    distance_to_relevant_traffic_light = distance
+        if CarlaDataProvider._traffic_light_trigger_grid is None:
+            CarlaDataProvider._build_traffic_light_index()
+
+        relevant_traffic_light = None
+        rows, _ = CarlaDataProvider._traffic_light_trigger_grid.query_nearest(last_waypoint.transform.location, 1)
+        if len(rows) > 0:
+            relevant_traffic_light = CarlaDataProvider._traffic_light_trigger_list[rows[0]]
 
+        CarlaDataProvider._next_traffic_light_cache[lane_key] = relevant_traffic_light
         return relevant_traffic_light
 
     @staticmethod
     def set_ego_vehicle_route(route):
         """
-        Set the route of the ego vehicle
+        Set the route of the ego vehicle, and build the RouteIndex shared
+        by all the route criteria and trigger conditions
 
         @todo extend ego_vehicle_route concept to support multi ego_vehicle scenarios
         """
         CarlaDataProvider._ego_vehicle_route = route
+        CarlaDataProvider._ego_vehicle_route_index = None
+        if route:
+            CarlaDataProvider._ego_vehicle_route_index = CarlaDataProvider.create_route_index(route)
 
     @staticmethod
     def get_ego_vehicle_route():
@@ -400,6 +728,49 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         """
         return CarlaDataProvider._ego_vehicle_route
 
+    @staticmethod
+    def create_route_index(route):
+        """
+        Create a RouteIndex for the given route. If the route is made of locations,
+        the forward vectors are taken from the lanes the route points are at
+        """
+        forward_vectors = None
+        if route and not hasattr(route[0][0], 'location'):
+            forward_vectors = []
+            for location, _ in route:
+                waypoint = CarlaDataProvider.get_map().get_waypoint(location)
+                forward = waypoint.transform.get_forward_vector()
+                forward_vectors.append((forward.x, forward.y, forward.z))
+
+        return RouteIndex.from_route(route, forward_vectors)
+
+    @staticmethod
+    def get_route_index(route=None):
+        """
+        returns the RouteIndex of the given route. The index of the ego vehicle route
+        is shared, any other route gets a new one
+        """
+        if route is None or route is CarlaDataProvider._ego_vehicle_route:
+            return CarlaDataProvider._ego_vehicle_route_index
+
+        return CarlaDataProvider.create_route_index(route)
+
+    @staticmethod
+    def get_global_route_planner(sampling_resolution=1.0, wmap=None):
+        """
+        returns the global route planner of the map (the current one by default)
+        with the given sampling resolution. Planners are created once and shared
+        until cleanup(), as building their graph is expensive.
+        """
+        if wmap is None:
+            wmap = CarlaDataProvider.get_map()
+
+        key = (wmap.name, float(sampling_resolution))
+        if key not in CarlaDataProvider._global_route_planners:
+            CarlaDataProvider._global_route_planners[key] = MemoizedGlobalRoutePlanner(wmap, sampling_resolution)
+
+        return CarlaDataProvider._global_route_planners[key]
+
     @staticmethod
     def generate_spawn_points():
         """
@@ -743,6 +1114,7 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
             CarlaDataProvider._carla_actor_pool[actor_id].destroy()
             CarlaDataProvider._carla_actor_pool[actor_id] = None
             CarlaDataProvider._carla_actor_pool.pop(actor_id)
+            CarlaDataProvider.unregister_actor_by_id(actor_id)
         else:
             print("Trying to remove a non-existing actor id {}".format(actor_id))
 
@@ -752,10 +1124,11 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         Remove all actors from the pool that are closer than distance to the
         provided location
         """
-        for actor_id in CarlaDataProvider._carla_actor_pool.copy():
-            if CarlaDataProvider._carla_actor_pool[actor_id].get_location().distance(location) < distance:
-                CarlaDataProvider._carla_actor_pool[actor_id].destroy()
-                CarlaDataProvider._carla_actor_pool.pop(actor_id)
+        for _, actor in CarlaDataProvider.get_actor_spatial_index().actors_within(location, distance):
+            if actor.id in CarlaDataProvider._carla_actor_pool:
+                CarlaDataProvider._carla_actor_pool[actor.id].destroy()
+                CarlaDataProvider._carla_actor_pool.pop(actor.id)
+                CarlaDataProvider.unregister_actor_by_id(actor.id)
 
         # Remove all keys with None values
         CarlaDataProvider._carla_actor_pool = dict({k: v for k, v in CarlaDataProvider._carla_actor_pool.items() if v})
@@ -796,14 +1169,25 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
                 else:
                     raise e
 
-        CarlaDataProvider._actor_velocity_map.clear()
-        CarlaDataProvider._actor_location_map.clear()
-        CarlaDataProvider._actor_transform_map.clear()
+        CarlaDataProvider._actor_state_registry.clear()
+        CarlaDataProvider._actor_state_table = ActorStateTable()
+        CarlaDataProvider._actor_spatial_index = None
+        CarlaDataProvider._world_actor_ids = frozenset()
+        CarlaDataProvider._world_dynamic_actors = {}
+        CarlaDataProvider._unregistered_actors = {}
         CarlaDataProvider._traffic_light_map.clear()
+        CarlaDataProvider._traffic_light_trigger_grid = None
+        CarlaDataProvider._traffic_light_trigger_list = []
+        CarlaDataProvider._next_traffic_light_cache.clear()
+        CarlaDataProvider._waypoint_cache.clear()
+        CarlaDataProvider._waypoint_cache_hits = 0
+        CarlaDataProvider._waypoint_cache_misses = 0
         CarlaDataProvider._map = None
         CarlaDataProvider._world = None
         CarlaDataProvider._sync_flag = False
         CarlaDataProvider._ego_vehicle_route = None
+        CarlaDataProvider._ego_vehicle_route_index = None
+        CarlaDataProvider._global_route_planners.clear()
         CarlaDataProvider._carla_actor_pool = {}
         CarlaDataProvider._carla_sensor_pool = {}
         CarlaDataProvider._client = None
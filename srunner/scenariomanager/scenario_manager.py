@@ -18,8 +18,10 @@ import py_trees
 import pygame
 
 from srunner.autoagents.agent_wrapper import AgentWrapper
+from srunner.scenariomanager.behavior_profiler import BehaviorProfiler
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
 from srunner.scenariomanager.result_writer import ResultOutputProvider
+from srunner.scenariomanager.tick_profiler import TickProfiler
 from srunner.scenariomanager.timer import GameTime
 from srunner.scenariomanager.watchdog import Watchdog
 
@@ -42,10 +44,18 @@ class ScenarioManager(object):
     5. If needed, cleanup with manager.stop_scenario()
     """
 
-    def __init__(self, debug_mode=False, sync_mode=False, timeout=2.0):
+    def __init__(self, debug_mode=False, sync_mode=False, timeout=2.0, profile_ticks=False, profile_behaviors=0,
+                 headless=False):
         """
         Setups up the parameters, which will be filled at load_scenario()
 
+        If profile_ticks is set, the time spent at each phase of the ticks is recorded
+        by a TickProfiler, available at tick_profiler after running the scenario.
+        If profile_behaviors is set, the time spent at each behavior of the scenario tree
+        is recorded by a BehaviorProfiler, available at behavior_profiler, and the given
+        amount of top behaviors is printed.
+        If headless is set, no pygame clock is created, and the achieved simulated seconds
+        per wall second are printed after each scenario
         """
         self.scenario = None
         self.scenario_tree = None
@@ -58,6 +68,11 @@ class ScenarioManager(object):
         self._sync_mode = sync_mode
         self._watchdog = None
         self._timeout = timeout
+        self._profile_ticks = profile_ticks
+        self.tick_profiler = None
+        self._profile_behaviors = profile_behaviors
+        self.behavior_profiler = None
+        self._headless = headless
 
         self._running = False
         self._timestamp_last_run = 0.0
@@ -128,20 +143,56 @@ class ScenarioManager(object):
         self._watchdog.start()
         self._running = True
 
-        clock = pygame.time.Clock()
+        self.tick_profiler = TickProfiler() if self._profile_ticks else None
+        self.behavior_profiler = None
+        if self._profile_behaviors:
+            self.behavior_profiler = BehaviorProfiler(self.scenario_tree)
+            self.behavior_profiler.attach()
+
+        clock = None if self._headless else pygame.time.Clock()
         if hasattr(self._agent, "_on_world_tick"):
             CarlaDataProvider.get_world().on_tick(self._agent._on_world_tick)
             
         while self._running:
             timestamp = None
+            snapshot = None
             world = CarlaDataProvider.get_world()
-            clock.tick_busy_loop(60)
+            # Only measures the frame time, for the agent's interface. The pace is set by the
+            # simulation: each tick in synchronous mode, and by the server in asynchronous mode
+            if clock is not None:
+                clock.tick()
             if world:
-                snapshot = world.get_snapshot()
+                if self._sync_mode:
+                    snapshot = world.get_snapshot()
+                else:
+                    snapshot = self._wait_for_world_tick(world)
                 if snapshot:
                     timestamp = snapshot.timestamp
             if timestamp:
-                self._tick_scenario(timestamp, clock)
+                self._tick_scenario(timestamp, clock, snapshot)
+
+        if self._debug_mode:
+            waypoint_cache_stats = CarlaDataProvider.get_waypoint_cache_stats()
+            print("ScenarioManager: Waypoint projections: {} cached, {} queried".format(
+                waypoint_cache_stats['hits'], waypoint_cache_stats['misses']))
+            if self._agent is not None:
+                for tag, stats in self._agent.get_sensor_statistics().items():
+                    print("ScenarioManager: Sensor {}: {} frames, {} dropped, latency {:.1f} ms (max {:.1f} ms)".format(
+                        tag, stats['consumed'], stats['dropped'],
+                        1000 * stats['latency_mean'], 1000 * stats['latency_max']))
+                    if 'worker' in stats:
+                        worker_stats = stats['worker']
+                        print("ScenarioManager:   worker: {} processed, {} dropped, max queue depth {}, "
+                              "processing {:.1f} ms (max {:.1f} ms)".format(
+                                  worker_stats['processed'], worker_stats['dropped'], worker_stats['max_queue_depth'],
+                                  1000 * worker_stats['processing_time_mean'],
+                                  1000 * worker_stats['processing_time_max']))
+
+        if self.tick_profiler is not None:
+            self.tick_profiler.print_summary()
+        if self.behavior_profiler is not None:
+            self.behavior_profiler.detach()
+            self.behavior_profiler.print_report(self._profile_behaviors)
 
         self.cleanup()
 
@@ -152,14 +203,31 @@ class ScenarioManager(object):
             self.start_system_time
         self.scenario_duration_game = end_game_time - start_game_time
 
+        if self._headless and self.scenario_duration_system > 0:
+            print("ScenarioManager: Simulated {:.1f} s in {:.1f} s ({:.2f} simulated seconds per wall second)".format(
+                self.scenario_duration_game, self.scenario_duration_system,
+                self.scenario_duration_game / self.scenario_duration_system))
+
         if self.scenario_tree.status == py_trees.common.Status.FAILURE:
             print("ScenarioManager: Terminated due to failure")
 
-    def _tick_scenario(self, timestamp, clock=None):
+    def _wait_for_world_tick(self, world):
+        """
+        Blocks until the server ticks, returning the new world snapshot,
+        or None if it didn't tick before the timeout
+        """
+        try:
+            return world.wait_for_tick(float(self._timeout))
+        except RuntimeError:
+            return None
+
+    def _tick_scenario(self, timestamp, clock=None, snapshot=None):
         """
         Run next tick of scenario and the agent.
         If running synchornously, it also handles the ticking of the world.
+        If the world snapshot is given, the actor information is refreshed from it.
         """
+        profiler = self.tick_profiler
 
         if self._timestamp_last_run < timestamp.elapsed_seconds and self._running:
             self._timestamp_last_run = timestamp.elapsed_seconds
@@ -169,29 +237,49 @@ class ScenarioManager(object):
             if self._debug_mode:
                 print("\n--------- Tick ---------\n")
 
+            if profiler is not None:
+                profiler.start_tick(timestamp.elapsed_seconds)
+
             # Update game time and actor information
             GameTime.on_carla_tick(timestamp)
-            CarlaDataProvider.on_carla_tick()
+            if profiler is not None:
+                profiler.lap(TickProfiler.GAME_TIME)
+            CarlaDataProvider.on_carla_tick(snapshot)
+            if profiler is not None:
+                profiler.lap(TickProfiler.DATA_PROVIDER)
 
             if self._agent is not None:
                 ego_action = self._agent(clock)  # pylint: disable=not-callable
+                if profiler is not None:
+                    profiler.lap(TickProfiler.AGENT)
 
             if self._agent is not None:
                 self.ego_vehicles[0].apply_control(ego_action)
+                if profiler is not None:
+                    profiler.lap(TickProfiler.APPLY_CONTROL)
 
             # Tick scenario
             self.scenario_tree.tick_once()
+            if profiler is not None:
+                profiler.lap(TickProfiler.SCENARIO_TREE)
 
             if self._debug_mode:
                 print("\n")
                 py_trees.display.print_ascii_tree(self.scenario_tree, show_status=True)
                 sys.stdout.flush()
+                if profiler is not None:
+                    profiler.skip()
 
             if self.scenario_tree.status != py_trees.common.Status.RUNNING:
                 self._running = False
 
         if self._sync_mode and self._running and self._watchdog.get_status():
             CarlaDataProvider.get_world().tick()
+            if profiler is not None:
+                profiler.lap(TickProfiler.WORLD_TICK)
+
+        if profiler is not None:
+            profiler.end_tick()
 
     def get_running_status(self):
         """
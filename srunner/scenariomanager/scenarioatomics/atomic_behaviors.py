@@ -31,7 +31,6 @@ import networkx
 import carla
 from agents.navigation.basic_agent import BasicAgent, LocalPlanner
 from agents.navigation.local_planner import RoadOption
-from agents.navigation.global_route_planner import GlobalRoutePlanner
 from agents.tools.misc import is_within_distance
 
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
@@ -757,7 +756,7 @@ class ChangeActorWaypoints(AtomicBehavior):
 
         # Obtain final route, considering the routing option
         # At the moment everything besides "shortest" will use the CARLA GlobalPlanner
-        grp = GlobalRoutePlanner(CarlaDataProvider.get_world().get_map(), 2.0)
+        grp = CarlaDataProvider.get_global_route_planner(2.0)
         route = []
         for i, _ in enumerate(carla_route_elements):
             if carla_route_elements[i][1] == "shortest":
@@ -2314,6 +2313,9 @@ class ActorSource(AtomicBehavior):
     - blackboard_queue_name: Name of the blackboard used to control this behavior
     - actor_limit [optional]: Maximum number of actors to be spawned (default=7)
 
+    The spawn location is blocked by the actors registered at the CarlaDataProvider,
+    and by the vehicles and walkers of the world that aren't registered.
+
     A parallel termination behavior has to be used.
     """
 
@@ -2334,18 +2336,16 @@ class ActorSource(AtomicBehavior):
     def update(self):
         new_status = py_trees.common.Status.RUNNING
         if self._actor_limit > 0:
-            world_actors = self._world.get_actors()
             spawn_point_blocked = False
             if (self._last_blocking_actor and
                     self._spawn_point.location.distance(self._last_blocking_actor.get_location()) < self._threshold):
                 spawn_point_blocked = True
 
             if not spawn_point_blocked:
-                for actor in world_actors:
-                    if self._spawn_point.location.distance(actor.get_location()) < self._threshold:
-                        spawn_point_blocked = True
-                        self._last_blocking_actor = actor
-                        break
+                nearest = CarlaDataProvider.get_actor_spatial_index().k_nearest(self._spawn_point.location, 1)
+                if nearest and nearest[0][0] < self._threshold:
+                    spawn_point_blocked = True
+                    self._last_blocking_actor = nearest[0][1]
 
             if not spawn_point_blocked:
                 try:
@@ -2752,7 +2752,7 @@ class ScenarioTriggerer(AtomicBehavior):
 
         self._current_index = 0
         self._route_length = len(self._route)
-        self._waypoints, _ = zip(*self._route)
+        self._route_index = CarlaDataProvider.get_route_index(self._route)
 
     def update(self):
         new_status = py_trees.common.Status.RUNNING
@@ -2761,20 +2761,8 @@ class ScenarioTriggerer(AtomicBehavior):
         if location is None:
             return new_status
 
-        lower_bound = self._current_index
-        upper_bound = min(self._current_index + self.WINDOWS_SIZE + 1, self._route_length)
-
-        shortest_distance = float('inf')
-        closest_index = -1
-
-        for index in range(lower_bound, upper_bound):
-            ref_waypoint = self._waypoints[index]
-            ref_location = ref_waypoint.location
-
-            dist_to_route = ref_location.distance(location)
-            if dist_to_route <= shortest_distance:
-                closest_index = index
-                shortest_distance = dist_to_route
+        closest_index, shortest_distance = self._route_index.closest_index(
+            location, self._current_index, self._current_index + self.WINDOWS_SIZE + 1)
 
         if closest_index == -1 or shortest_distance == float('inf'):
             return new_status
@@ -2782,7 +2770,7 @@ class ScenarioTriggerer(AtomicBehavior):
         # Update the ego position at the route
         self._current_index = closest_index
 
-        route_location = self._waypoints[closest_index].location
+        route_location = carla.Location(*self._route_index.positions[closest_index])
 
         # Check which scenarios can be triggered
         blackboard = py_trees.blackboard.Blackboard()
@@ -2869,7 +2857,7 @@ class KeepLongitudinalGap(AtomicBehavior):
         self._start_time = GameTime.get_time()
         actor_dict[self._actor.id].update_target_speed(self.max_speed, start_time=self._start_time)
 
-        self._global_rp = GlobalRoutePlanner(CarlaDataProvider.get_world().get_map(), 1.0)
+        self._global_rp = CarlaDataProvider.get_global_route_planner(1.0)
 
         super(KeepLongitudinalGap, self).initialise()
 
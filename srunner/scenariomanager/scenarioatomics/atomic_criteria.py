@@ -666,11 +666,11 @@ class OffRoadTest(Criterion):
         current_location = CarlaDataProvider.get_location(self.actor)
 
         # Get the waypoint at the current location to see if the actor is offroad
-        drive_waypoint = self._map.get_waypoint(
+        drive_waypoint = CarlaDataProvider.get_waypoint(
             current_location,
             project_to_road=False
         )
-        park_waypoint = self._map.get_waypoint(
+        park_waypoint = CarlaDataProvider.get_waypoint(
             current_location,
             project_to_road=False,
             lane_type=carla.LaneType.Parking
@@ -743,7 +743,7 @@ class EndofRoadTest(Criterion):
         new_status = py_trees.common.Status.RUNNING
 
         current_location = CarlaDataProvider.get_location(self.actor)
-        current_waypoint = self._map.get_waypoint(current_location)
+        current_waypoint = CarlaDataProvider.get_waypoint(current_location)
 
         # Get the current road id
         if self._road_id is None:
@@ -826,7 +826,7 @@ class OnSidewalkTest(Criterion):
         # Some of the vehicle parameters
         current_tra = CarlaDataProvider.get_transform(self._actor)
         current_loc = current_tra.location
-        current_wp = self._map.get_waypoint(current_loc, lane_type=carla.LaneType.Any)
+        current_wp = CarlaDataProvider.get_waypoint(current_loc, lane_type=carla.LaneType.Any)
 
         # Case 1) Car center is at a sidewalk
         if current_wp.lane_type == carla.LaneType.Sidewalk:
@@ -855,10 +855,10 @@ class OnSidewalkTest(Criterion):
                 current_loc + carla.Location(-1 * x_boundary_vector + y_boundary_vector)]
 
             bbox_wp = [
-                self._map.get_waypoint(bbox[0], lane_type=carla.LaneType.Any),
-                self._map.get_waypoint(bbox[1], lane_type=carla.LaneType.Any),
-                self._map.get_waypoint(bbox[2], lane_type=carla.LaneType.Any),
-                self._map.get_waypoint(bbox[3], lane_type=carla.LaneType.Any)]
+                CarlaDataProvider.get_waypoint(bbox[0], lane_type=carla.LaneType.Any),
+                CarlaDataProvider.get_waypoint(bbox[1], lane_type=carla.LaneType.Any),
+                CarlaDataProvider.get_waypoint(bbox[2], lane_type=carla.LaneType.Any),
+                CarlaDataProvider.get_waypoint(bbox[3], lane_type=carla.LaneType.Any)]
 
             # Case 2.1) Not quite outside yet
             if bbox_wp[0].lane_type == (carla.LaneType.Driving or carla.LaneType.Parking) \
@@ -1065,6 +1065,7 @@ class OutsideRouteLanesTest(Criterion):
         self._current_index = 0
         self._route_length = len(self._route)
         self._waypoints, _ = zip(*self._route)
+        self._route_index = CarlaDataProvider.get_route_index(self._route)
 
         self._map = CarlaDataProvider.get_map()
         self._pre_ego_waypoint = self._map.get_waypoint(self._actor.get_location())
@@ -1102,30 +1103,23 @@ class OutsideRouteLanesTest(Criterion):
         if self._outside_lane_active or self._wrong_lane_active:
             self.test_status = "FAILURE"
 
-        # 2) Get the traveled distance
-        for index in range(self._current_index + 1,
-                           min(self._current_index + self.WINDOWS_SIZE + 1, self._route_length)):
-            # Get the dot product to know if it has passed this location
-            index_location = self._waypoints[index]
-            index_waypoint = self._map.get_waypoint(index_location)
+        # 2) Get the traveled distance, using the dot product to know if it has passed the locations
+        passed_indices = self._route_index.passed_indices(
+            location, self._current_index + 1, self._current_index + self.WINDOWS_SIZE + 1)
 
-            wp_dir = index_waypoint.transform.get_forward_vector()  # Waypoint's forward vector
-            wp_veh = location - index_location  # vector waypoint - vehicle
-            dot_ve_wp = wp_veh.x * wp_dir.x + wp_veh.y * wp_dir.y + wp_veh.z * wp_dir.z
+        if len(passed_indices) > 0:
+            # Distance between each passed location and the previous one
+            path = np.concatenate(([self._current_index], passed_indices))
+            positions = self._route_index.positions[path]
+            new_dist = float(np.sum(np.linalg.norm(np.diff(positions, axis=0), axis=1)))
 
-            if dot_ve_wp > 0:
-                # Get the distance traveled
-                index_location = self._waypoints[index]
-                current_index_location = self._waypoints[self._current_index]
-                new_dist = current_index_location.distance(index_location)
+            # Add it to the total distance
+            self._current_index = int(passed_indices[-1])
+            self._total_distance += new_dist
 
-                # Add it to the total distance
-                self._current_index = index
-                self._total_distance += new_dist
-
-                # And to the wrong one if outside route lanes
-                if self._outside_lane_active or self._wrong_lane_active:
-                    self._wrong_distance += new_dist
+            # And to the wrong one if outside route lanes
+            if self._outside_lane_active or self._wrong_lane_active:
+                self._wrong_distance += new_dist
 
         self.logger.debug("%s.update()[%s->%s]" % (self.__class__.__name__, self.status, new_status))
 
@@ -1136,8 +1130,10 @@ class OutsideRouteLanesTest(Criterion):
         Detects if the ego_vehicle is outside driving lanes
         """
 
-        current_driving_wp = self._map.get_waypoint(location, lane_type=carla.LaneType.Driving, project_to_road=True)
-        current_parking_wp = self._map.get_waypoint(location, lane_type=carla.LaneType.Parking, project_to_road=True)
+        current_driving_wp = CarlaDataProvider.get_waypoint(
+            location, lane_type=carla.LaneType.Driving, project_to_road=True)
+        current_parking_wp = CarlaDataProvider.get_waypoint(
+            location, lane_type=carla.LaneType.Parking, project_to_road=True)
 
         driving_distance = location.distance(current_driving_wp.transform.location)
         if current_parking_wp is not None:  # Some towns have no parking
@@ -1159,7 +1155,8 @@ class OutsideRouteLanesTest(Criterion):
         Detects if the ego_vehicle has invaded a wrong lane
         """
 
-        current_waypoint = self._map.get_waypoint(location, lane_type=carla.LaneType.Driving, project_to_road=True)
+        current_waypoint = CarlaDataProvider.get_waypoint(
+            location, lane_type=carla.LaneType.Driving, project_to_road=True)
         current_lane_id = current_waypoint.lane_id
         current_road_id = current_waypoint.road_id
 
@@ -1271,7 +1268,7 @@ class WrongLaneTest(Criterion):
         if self._terminate_on_failure and (self.test_status == "FAILURE"):
             new_status = py_trees.common.Status.FAILURE
 
-        lane_waypoint = self._map.get_waypoint(self._actor.get_location())
+        lane_waypoint = CarlaDataProvider.get_waypoint(CarlaDataProvider.get_location(self._actor))
         current_lane_id = lane_waypoint.lane_id
         current_road_id = lane_waypoint.road_id
 
@@ -1484,23 +1481,13 @@ class InRouteTest(Criterion):
             self._offroad_min = self._offroad_min
 
         self._world = CarlaDataProvider.get_world()
-        self._waypoints, _ = zip(*self._route)
+        self._route_index = CarlaDataProvider.get_route_index(self._route)
         self._route_length = len(self._route)
         self._current_index = 0
         self._out_route_distance = 0
         self._in_safe_route = True
 
-        self._accum_meters = []
-        prev_wp = self._waypoints[0]
-        for i, wp in enumerate(self._waypoints):
-            d = wp.distance(prev_wp)
-            if i > 0:
-                accum = self._accum_meters[i - 1]
-            else:
-                accum = 0
-
-            self._accum_meters.append(d + accum)
-            prev_wp = wp
+        self._accum_meters = self._route_index.cumulative_distance
 
         # Blackboard variable
         blackv = py_trees.blackboard.Blackboard()
@@ -1523,17 +1510,9 @@ class InRouteTest(Criterion):
 
             off_route = True
 
-            shortest_distance = float('inf')
-            closest_index = -1
-
             # Get the closest distance
-            for index in range(self._current_index,
-                               min(self._current_index + self.WINDOWS_SIZE + 1, self._route_length)):
-                ref_waypoint = self._waypoints[index]
-                distance = math.sqrt(((location.x - ref_waypoint.x) ** 2) + ((location.y - ref_waypoint.y) ** 2))
-                if distance <= shortest_distance:
-                    closest_index = index
-                    shortest_distance = distance
+            closest_index, shortest_distance = self._route_index.closest_index(
+                location, self._current_index, self._current_index + self.WINDOWS_SIZE + 1, planar=True)
 
             if closest_index == -1 or shortest_distance == float('inf'):
                 return new_status
@@ -1612,17 +1591,8 @@ class RouteCompletionTest(Criterion):
         self._waypoints, _ = zip(*self._route)
         self.target = self._waypoints[-1]
 
-        self._accum_meters = []
-        prev_wp = self._waypoints[0]
-        for i, wp in enumerate(self._waypoints):
-            d = wp.distance(prev_wp)
-            if i > 0:
-                accum = self._accum_meters[i - 1]
-            else:
-                accum = 0
-
-            self._accum_meters.append(d + accum)
-            prev_wp = wp
+        self._route_index = CarlaDataProvider.get_route_index(self._route)
+        self._accum_meters = self._route_index.cumulative_distance
 
         self._traffic_event = TrafficEvent(event_type=TrafficEventType.ROUTE_COMPLETION)
         self.list_traffic_events.append(self._traffic_event)
@@ -1643,24 +1613,20 @@ class RouteCompletionTest(Criterion):
 
         elif self.test_status == "RUNNING" or self.test_status == "INIT":
 
-            for index in range(self._current_index, min(self._current_index + self._wsize + 1, self._route_length)):
-                # Get the dot product to know if it has passed this location
-                ref_waypoint = self._waypoints[index]
-                wp = self._map.get_waypoint(ref_waypoint)
-                wp_dir = wp.transform.get_forward_vector()          # Waypoint's forward vector
-                wp_veh = location - ref_waypoint                    # vector waypoint - vehicle
-                dot_ve_wp = wp_veh.x * wp_dir.x + wp_veh.y * wp_dir.y + wp_veh.z * wp_dir.z
-
-                if dot_ve_wp > 0:
-                    # good! segment completed!
-                    self._current_index = index
-                    self._percentage_route_completed = 100.0 * float(self._accum_meters[self._current_index]) \
-                        / float(self._accum_meters[-1])
-                    self._traffic_event.set_dict({
-                        'route_completed': self._percentage_route_completed})
-                    self._traffic_event.set_message(
-                        "Agent has completed > {:.2f}% of the route".format(
-                            self._percentage_route_completed))
+            # Get the dot product to know if it has passed these locations
+            passed_indices = self._route_index.passed_indices(
+                location, self._current_index, self._current_index + self._wsize + 1)
+
+            if len(passed_indices) > 0:
+                # good! segment completed!
+                self._current_index = int(passed_indices[-1])
+                self._percentage_route_completed = 100.0 * float(self._accum_meters[self._current_index]) \
+                    / float(self._accum_meters[-1])
+                self._traffic_event.set_dict({
+                    'route_completed': self._percentage_route_completed})
+                self._traffic_event.set_message(
+                    "Agent has completed > {:.2f}% of the route".format(
+                        self._percentage_route_completed))
 
             if self._percentage_route_completed > 99.0 and location.distance(self.target) < self.DISTANCE_THRESHOLD:
                 route_completion_event = TrafficEvent(event_type=TrafficEventType.ROUTE_COMPLETED)
@@ -26,7 +26,6 @@ import math
 import py_trees
 import carla
 
-from agents.navigation.global_route_planner import GlobalRoutePlanner
 
 from srunner.scenariomanager.scenarioatomics.atomic_behaviors import calculate_distance
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
@@ -107,7 +106,7 @@ class InTriggerDistanceToOSCPosition(AtomicCondition):
 
         if self._along_route:
             # Get the global route planner, used to calculate the route
-            self._grp = GlobalRoutePlanner(self._map, 0.5)
+            self._grp = CarlaDataProvider.get_global_route_planner(0.5)
         else:
             self._grp = None
 
@@ -172,7 +171,7 @@ class InTimeToArrivalToOSCPosition(AtomicCondition):
 
         if self._along_route:
             # Get the global route planner, used to calculate the route
-            self._grp = GlobalRoutePlanner(self._map, 0.5)
+            self._grp = CarlaDataProvider.get_global_route_planner(0.5)
         else:
             self._grp = None
 
@@ -586,7 +585,7 @@ class InTriggerDistanceToVehicle(AtomicCondition):
         self._comparison_operator = comparison_operator
 
         if distance_type == "longitudinal":
-            self._global_rp = GlobalRoutePlanner(CarlaDataProvider.get_world().get_map(), 1.0)
+            self._global_rp = CarlaDataProvider.get_global_route_planner(1.0)
         else:
             self._global_rp = None
 
@@ -704,7 +703,7 @@ class InTriggerDistanceToNextIntersection(AtomicCondition):
         """
         new_status = py_trees.common.Status.RUNNING
 
-        current_waypoint = self._map.get_waypoint(CarlaDataProvider.get_location(self._actor))
+        current_waypoint = CarlaDataProvider.get_waypoint(CarlaDataProvider.get_location(self._actor))
         distance = calculate_distance(current_waypoint.transform.location, self._final_location)
 
         if distance < self._distance:
@@ -743,7 +742,8 @@ class InTriggerDistanceToLocationAlongRoute(AtomicCondition):
         self._route = route
         self._distance = distance
 
-        self._location_distance, _ = get_distance_along_route(self._route, self._location)
+        self._route_index = CarlaDataProvider.get_route_index(self._route)
+        self._location_distance, _ = get_distance_along_route(self._route, self._location, self._route_index)
 
     def update(self):
         new_status = py_trees.common.Status.RUNNING
@@ -755,7 +755,7 @@ class InTriggerDistanceToLocationAlongRoute(AtomicCondition):
 
         if current_location.distance(self._location) < self._distance + 20:
 
-            actor_distance, _ = get_distance_along_route(self._route, current_location)
+            actor_distance, _ = get_distance_along_route(self._route, current_location, self._route_index)
 
             # If closer than self._distance and hasn't passed the trigger point
             if (self._location_distance < actor_distance + self._distance and
@@ -855,7 +855,7 @@ class InTimeToArrivalToVehicle(AtomicCondition):
 
         if self._along_route:
             # Get the global route planner, used to calculate the route
-            self._grp = GlobalRoutePlanner(self._map, 0.5)
+            self._grp = CarlaDataProvider.get_global_route_planner(0.5)
         else:
             self._grp = None
 
@@ -1133,7 +1133,7 @@ class AtRightmostLane(AtomicCondition):
         new_status = py_trees.common.Status.RUNNING
 
         location = CarlaDataProvider.get_location(self._actor)
-        waypoint = self._map.get_waypoint(location)
+        waypoint = CarlaDataProvider.get_waypoint(location)
         if waypoint is None:
             return new_status
         right_waypoint = waypoint.get_right_lane()
@@ -1206,7 +1206,7 @@ class WaitEndIntersection(AtomicCondition):
         new_status = py_trees.common.Status.RUNNING
 
         location = CarlaDataProvider.get_location(self.actor)
-        waypoint = CarlaDataProvider.get_map().get_waypoint(location)
+        waypoint = CarlaDataProvider.get_waypoint(location)
 
         # Wait for the actor to enter a junction
         if not self.inside_junction and waypoint.is_junction:
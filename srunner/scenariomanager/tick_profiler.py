@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides the TickProfiler, which measures the wall time spent at
+each phase of the ticks of the ScenarioManager
+"""
+
+from __future__ import print_function
+
+import time
+
+import numpy as np
+
+
+class TickProfiler(object):
+
+    """
+    Records the wall time [s] of each phase of a tick in a preallocated ring buffer,
+    together with the wall and simulation time at the start of the tick.
+    Once full, the oldest ticks are overwritten.
+
+    Each tick is recorded with start_tick(), a lap() at the end of each phase, and end_tick().
+
+    Args:
+        capacity (int): amount of ticks kept
+    """
+
+    PHASES = ('game_time', 'data_provider', 'agent', 'apply_control', 'scenario_tree', 'world_tick')
+    GAME_TIME, DATA_PROVIDER, AGENT, APPLY_CONTROL, SCENARIO_TREE, WORLD_TICK = range(len(PHASES))
+
+    def __init__(self, capacity=100000):
+        self._capacity = capacity
+        self._start_times = np.zeros(capacity, dtype=np.float64)
+        self._sim_times = np.zeros(capacity, dtype=np.float64)
+        self._samples = np.zeros((capacity, len(self.PHASES)), dtype=np.float64)
+
+        self._count = 0
+        self._row = None
+        self._lap_time = 0.0
+
+    def start_tick(self, sim_time):
+        """
+        Starts recording a tick, at the given simulation time [s]
+        """
+        index = self._count % self._capacity
+        self._row = self._samples[index]
+        self._row.fill(0.0)
+        self._sim_times[index] = sim_time
+        self._lap_time = time.perf_counter()
+        self._start_times[index] = self._lap_time
+
+    def lap(self, phase):
+        """
+        Ends a phase of the current tick. A phase can be lapped several times per tick
+        """
+        if self._row is None:
+            return
+        now = time.perf_counter()
+        self._row[phase] += now - self._lap_time
+        self._lap_time = now
+
+    def skip(self):
+        """
+        Discards the time since the last lap, e.g. debug output between phases
+        """
+        self._lap_time = time.perf_counter()
+
+    def end_tick(self):
+        """
+        Ends recording the current tick
+        """
+        if self._row is not None:
+            self._count += 1
+            self._row = None
+
+    def __len__(self):
+        return min(self._count, self._capacity)
+
+    def get_samples(self):
+        """
+        Returns the recorded (start_times, sim_times, samples) of the kept ticks, oldest first.
+        samples has a column per phase, see PHASES
+        """
+        if self._count <= self._capacity:
+            order = np.arange(self._count)
+        else:
+            order = np.roll(np.arange(self._capacity), -(self._count % self._capacity))
+        return self._start_times[order], self._sim_times[order], self._samples[order]
+
+    def get_real_time_factor(self):
+        """
+        Returns the simulated seconds per wall second between the first and last kept ticks
+        """
+        start_times, sim_times, _ = self.get_samples()
+        if len(start_times) < 2 or start_times[-1] <= start_times[0]:
+            return None
+        return (sim_times[-1] - sim_times[0]) / (start_times[-1] - start_times[0])
+
+    def get_summary(self):
+        """
+        Returns a dictionary with the p50/p95/p99/max/mean [s] of each phase and of the whole tick
+        """
+        _, _, samples = self.get_samples()
+        summary = {}
+        if not len(samples):
+            return summary
+
+        columns = [(phase, samples[:, i]) for i, phase in enumerate(self.PHASES)]
+        columns.append(('total', samples.sum(axis=1)))
+        for phase, values in columns:
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary[phase] = {'p50': p50, 'p95': p95, 'p99': p99, 'max': values.max(), 'mean': values.mean()}
+        return summary
+
+    def print_summary(self):
+        """
+        Prints the percentiles of each phase [ms] and the real-time factor
+        """
+        summary = self.get_summary()
+        if not summary:
+            return
+
+        print("ScenarioManager: Tick profile of {} ticks [ms]".format(len(self)))
+        print("  {:<15}{:>9}{:>9}{:>9}{:>9}{:>9}".format("phase", "p50", "p95", "p99", "max", "mean"))
+        for phase, stats in summary.items():
+            print("  {:<15}{:>9.2f}{:>9.2f}{:>9.2f}{:>9.2f}{:>9.2f}".format(
+                phase, 1000 * stats['p50'], 1000 * stats['p95'], 1000 * stats['p99'],
+                1000 * stats['max'], 1000 * stats['mean']))
+
+        real_time_factor = self.get_real_time_factor()
+        if real_time_factor is not None:
+            print("  real-time factor: {:.2f}".format(real_time_factor))
+
+    def export(self, filename):
+        """
+        Exports the samples of the kept ticks to a .npz file, or otherwise to CSV.
+        The wall time is relative to the first kept tick
+        """
+        start_times, sim_times, samples = self.get_samples()
+        wall_times = start_times - start_times[0] if len(start_times) else start_times
+        if filename.endswith(".npz"):
+            np.savez(filename, phases=np.array(self.PHASES), wall_time=wall_times, sim_time=sim_times,
+                     samples=samples)
+        else:
+            table = np.column_stack([wall_times, sim_times, samples])
+            np.savetxt(filename, table, delimiter=',', fmt='%.9g', comments='',
+                       header=','.join(('wall_time', 'sim_time') + self.PHASES))
@@ -522,7 +522,7 @@ class RouteScenario(BasicScenario):
         # Add behavior that manages the scenarios trigger conditions
         scenario_triggerer = ScenarioTriggerer(
             self.ego_vehicles[0],
-            self.route,
+            CarlaDataProvider.get_ego_vehicle_route(),
             blackboard_list,
             scenario_trigger_distance,
             repeat_scenarios=False
@@ -541,7 +541,8 @@ class RouteScenario(BasicScenario):
 
         criteria = []
 
-        route = convert_transform_to_location(self.route)
+        # Use the route stored at the CarlaDataProvider, so that its RouteIndex is shared
+        route = CarlaDataProvider.get_ego_vehicle_route()
 
         collision_criterion = CollisionTest(self.ego_vehicles[0], terminate_on_failure=False)
 
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Benchmark of the lookup of the buffered state of an actor at the CarlaDataProvider:
+the former linear scan over the actor-keyed maps against the id-keyed registry.
+
+No CARLA server is needed. If the CARLA Python API is available, the actual
+CarlaDataProvider.get_velocity is timed as well.
+
+    python -m srunner.tests.benchmarks.bench_actor_lookup
+"""
+
+from __future__ import print_function
+
+import argparse
+import timeit
+
+
+class FakeActor(object):
+
+    """
+    Stand-in of a carla.Actor, hashed by identity like the actual one
+    """
+
+    def __init__(self, actor_id):
+        self.id = actor_id
+
+
+def scan_lookup(velocity_map, actor):
+    """
+    Former CarlaDataProvider.get_velocity, scanning every key
+    """
+    for key in velocity_map:
+        if key.id == actor.id:
+            return velocity_map[key]
+    return 0.0
+
+
+def registry_lookup(registry, actor):
+    """
+    CarlaDataProvider.get_velocity, looking the actor up by id
+    """
+    state = registry.get(actor.id, None)
+    if state is not None:
+        return state
+    return 0.0
+
+
+def get_provider_lookup(actors):
+    """
+    Returns the actual CarlaDataProvider.get_velocity with the given actors registered,
+    or None if the CARLA Python API isn't available
+    """
+    try:
+        from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
+    except ImportError:
+        return None
+
+    CarlaDataProvider._actor_state_registry = {}  # pylint: disable=protected-access
+    for actor in actors:
+        CarlaDataProvider.register_actor(actor)
+    return CarlaDataProvider.get_velocity
+
+
+def main():
+    """
+    Times each lookup, for several amounts of registered actors
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--actors', default=[10, 100, 1000], type=int, nargs='+',
+                        help='Amounts of registered actors (default: 10 100 1000)')
+    parser.add_argument('--repeat', default=5, type=int, help='Repetitions, the best one is kept (default: 5)')
+    args = parser.parse_args()
+
+    print("{:>8}{:>14}{:>14}{:>14}{:>10}".format("actors", "scan [us]", "by id [us]", "provider [us]", "speedup"))
+    for amount in args.actors:
+        actors = [FakeActor(actor_id) for actor_id in range(amount)]
+        velocity_map = {actor: 1.0 for actor in actors}
+        registry = {actor.id: 1.0 for actor in actors}
+
+        # Every actor is looked up once per round, as the behaviors of a tick would
+        number = max(1, 20000 // amount)
+
+        def time_lookup(lookup, *state):
+            best = min(timeit.repeat(lambda: [lookup(*(state + (actor,))) for actor in actors],
+                                     number=number, repeat=args.repeat))
+            return 1e6 * best / (number * amount)
+
+        scan_time = time_lookup(scan_lookup, velocity_map)
+        registry_time = time_lookup(registry_lookup, registry)
+
+        provider_time = None
+        provider_lookup = get_provider_lookup(actors)
+        if provider_lookup is not None:
+            provider_time = time_lookup(provider_lookup)
+
+        print("{:>8}{:>14.3f}{:>14.3f}{:>14}{:>9.0f}x".format(
+            amount, scan_time, registry_time,
+            "-" if provider_time is None else "{:.3f}".format(provider_time), scan_time / registry_time))
+
+
+if __name__ == '__main__':
+    main()
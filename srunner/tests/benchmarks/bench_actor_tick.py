@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Benchmark of the per tick update of the CarlaDataProvider: querying every registered
+actor against reading all of them from the world snapshot of the tick.
+
+No CARLA server is needed, only its Python API. The actors and the snapshot are fakes,
+which count the calls that would reach the server. The latency of each of these calls
+can be simulated with --rpc-latency, as the actual one depends on the server.
+
+    python -m srunner.tests.benchmarks.bench_actor_tick --rpc-latency 0 50
+"""
+
+from __future__ import print_function
+
+import argparse
+import time
+
+import carla
+
+from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
+
+
+class FakeServer(object):
+
+    """
+    Counts the calls to the server, and waits the given latency [us] on each one of them
+    """
+
+    def __init__(self, latency):
+        self.latency = latency * 1e-6
+        self.calls = 0
+
+    def call(self):
+        """
+        A blocking call to the server
+        """
+        self.calls += 1
+        if self.latency:
+            end_time = time.perf_counter() + self.latency
+            while time.perf_counter() < end_time:
+                pass
+
+
+class FakeActor(object):
+
+    """
+    Stand-in of a carla.Actor, each getter being a call to the server
+    """
+
+    def __init__(self, actor_id, server):
+        self.id = actor_id
+        self.type_id = 'vehicle.tesla.model3'
+        self._server = server
+        self._transform = carla.Transform(carla.Location(float(actor_id), 0.0, 0.0), carla.Rotation(0.0, 90.0, 0.0))
+        self._velocity = carla.Vector3D(1.0, 2.0, 0.0)
+
+    @property
+    def is_alive(self):
+        """
+        carla.Actor.is_alive
+        """
+        self._server.call()
+        return True
+
+    def get_transform(self):
+        """
+        carla.Actor.get_transform
+        """
+        self._server.call()
+        return self._transform
+
+    def get_velocity(self):
+        """
+        carla.Actor.get_velocity
+        """
+        self._server.call()
+        return self._velocity
+
+
+class FakeActorSnapshot(object):
+
+    """
+    Stand-in of a carla.ActorSnapshot, already received with the world snapshot
+    """
+
+    def __init__(self, actor):
+        self.id = actor.id
+        self._transform = actor._transform  # pylint: disable=protected-access
+        self._velocity = actor._velocity  # pylint: disable=protected-access
+
+    def get_transform(self):
+        """
+        carla.ActorSnapshot.get_transform
+        """
+        return self._transform
+
+    def get_velocity(self):
+        """
+        carla.ActorSnapshot.get_velocity
+        """
+        return self._velocity
+
+
+class FakeWorldSnapshot(object):
+
+    """
+    Stand-in of a carla.WorldSnapshot
+    """
+
+    def __init__(self, actors, frame=1):
+        self.frame = frame
+        self._actors = {actor.id: FakeActorSnapshot(actor) for actor in actors}
+
+    def __iter__(self):
+        return iter(self._actors.values())
+
+    def find(self, actor_id):
+        """
+        carla.WorldSnapshot.find
+        """
+        return self._actors.get(actor_id, None)
+
+
+class FakeWorld(object):
+
+    """
+    Stand-in of a carla.World
+    """
+
+    def __init__(self, actors, server):
+        self._actors = actors
+        self._server = server
+
+    def get_actors(self):
+        """
+        carla.World.get_actors
+        """
+        self._server.call()
+        return self._actors
+
+
+def measure(snapshot, server, ticks):
+    """
+    Returns the time per tick [ms] and the calls to the server per tick
+    """
+    server.calls = 0
+    start_time = time.perf_counter()
+    for _ in range(ticks):
+        CarlaDataProvider.on_carla_tick(snapshot)
+    elapsed = time.perf_counter() - start_time
+    return 1e3 * elapsed / ticks, server.calls / ticks
+
+
+def main():
+    """
+    Registers the fake actors and measures both updates
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--actors', default=[10, 100, 500], type=int, nargs='+',
+                        help='Amounts of registered actors (default: 10 100 500)')
+    parser.add_argument('--rpc-latency', default=[0.0], type=float, nargs='+',
+                        help='Simulated latency of each call to the server [us] (default: 0)')
+    parser.add_argument('--ticks', default=100, type=int, help='Ticks per measurement (default: 100)')
+    args = parser.parse_args()
+
+    print("{:>8}{:>14}{:>14}{:>16}{:>14}{:>16}{:>10}".format(
+        "actors", "latency [us]", "actors [ms]", "actor calls", "snapshot [ms]", "snapshot calls", "speedup"))
+    for amount in args.actors:
+        for latency in args.rpc_latency:
+            server = FakeServer(latency)
+            actors = [FakeActor(actor_id, server) for actor_id in range(1, amount + 1)]
+            CarlaDataProvider._actor_state_registry = {}  # pylint: disable=protected-access
+            CarlaDataProvider.register_actors(actors)
+            CarlaDataProvider._world = FakeWorld(actors, server)  # pylint: disable=protected-access
+
+            actors_time, actors_calls = measure(None, server, args.ticks)
+            snapshot_time, snapshot_calls = measure(FakeWorldSnapshot(actors), server, args.ticks)
+
+            print("{:>8}{:>14g}{:>14.3f}{:>16.2f}{:>14.3f}{:>16.2f}{:>9.1f}x".format(
+                amount, latency, actors_time, actors_calls, snapshot_time, snapshot_calls,
+                actors_time / snapshot_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Benchmark of the parsing of a CARLA recorder dump: the former string based parser,
+building one dictionary per actor and frame, against the columnar MetricsParser
+streaming the dump from a file.
+
+A synthetic dump is generated, so no CARLA server is needed, only its Python API.
+The parse time and the peak of the memory traced by tracemalloc are reported.
+
+    python -m srunner.tests.benchmarks.bench_metrics_parser --frames 20000 --vehicles 10
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from srunner.metrics.tools.metrics_parser import MetricsParser
+from srunner.tests import legacy_metrics_parser
+from srunner.tests.recorder_dump import write_recorder_dump
+
+
+def parse_legacy(path):
+    """
+    Former parsing, from the whole dump as a string
+    """
+    with open(path) as fd:
+        recorder_str = fd.read()
+    return legacy_metrics_parser.MetricsParser(recorder_str).parse_recorder_info()
+
+
+def parse_columnar(path):
+    """
+    Columnar parsing, streamed from the file
+    """
+    with open(path) as fd:
+        return MetricsParser(fd).parse()
+
+
+def measure(parse, path):
+    """
+    Returns the parse time [s] and the peak of traced memory [MB]
+    """
+    gc.collect()
+    start_time = time.perf_counter()
+    result = parse(path)
+    parse_time = time.perf_counter() - start_time
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = parse(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return parse_time, peak / 1e6
+
+
+def main():
+    """
+    Generates the dump and measures both parsers
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', default=20000, type=int, help='Frames of the dump (default: 20000)')
+    parser.add_argument('--vehicles', default=10, type=int, help='Vehicles of the dump (default: 10)')
+    parser.add_argument('--walkers', default=2, type=int, help='Walkers of the dump (default: 2)')
+    parser.add_argument('--skip-legacy', action='store_true', help="Don't run the former parser, for large dumps")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".log")
+    try:
+        with os.fdopen(fd, 'w') as dump_file:
+            write_recorder_dump(dump_file, args.frames, args.vehicles, args.walkers)
+        print("Recorder dump: {} frames, {} vehicles, {} walkers, {:.1f} MB".format(
+            args.frames, args.vehicles, args.walkers, os.path.getsize(path) / 1e6))
+
+        print("{:<10}{:>12}{:>18}".format("parser", "time [s]", "peak memory [MB]"))
+        parsers = [('columnar', parse_columnar)]
+        if not args.skip_legacy:
+            parsers.insert(0, ('legacy', parse_legacy))
+        for name, parse in parsers:
+            parse_time, peak = measure(parse, path)
+            print("{:<10}{:>12.2f}{:>18.1f}".format(name, parse_time, peak))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Benchmark of the scan of a route for scenarios: the former matching of each trigger
+against the whole route and all the previous triggers, against the TrajectoryIndex
+and the trigger cells of the RouteParser.
+
+A synthetic route and trigger set are generated, so no CARLA server is needed,
+only its Python API.
+
+    python -m srunner.tests.benchmarks.bench_route_parser --points 5000 --triggers 2000
+"""
+
+from __future__ import print_function
+
+import argparse
+import copy
+import time
+
+from srunner.tools.route_parser import RouteParser
+from srunner.tests import synthetic_route
+
+
+def measure(scan, route, annotations, repeat):
+    """
+    Returns the best scan time [s] and the amount of distinct triggers kept
+    """
+    best = None
+    for _ in range(repeat):
+        world_annotations = copy.deepcopy(annotations)
+        start_time = time.perf_counter()
+        possible_scenarios, _ = scan('Town01', route, world_annotations)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(possible_scenarios)
+
+
+def main():
+    """
+    Generates the route and triggers and measures both scans
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--points', default=[1000, 5000, 20000], type=int, nargs='+',
+                        help='Amounts of route points (default: 1000 5000 20000)')
+    parser.add_argument('--triggers', default=2000, type=int, help='Scenario triggers (default: 2000)')
+    parser.add_argument('--repeat', default=3, type=int, help='Repetitions, the best one is kept (default: 3)')
+    args = parser.parse_args()
+
+    print("{:>8}{:>10}{:>12}{:>14}{:>14}{:>10}".format(
+        "points", "triggers", "kept", "linear [s]", "indexed [s]", "speedup"))
+    for points in args.points:
+        route = synthetic_route.generate_route(points)
+        annotations = synthetic_route.generate_annotations('Town01', route, args.triggers)
+
+        linear_time, linear_matched = measure(
+            synthetic_route.scan_route_for_scenarios_linear, route, annotations, args.repeat)
+        indexed_time, indexed_matched = measure(
+            RouteParser.scan_route_for_scenarios, route, annotations, args.repeat)
+        assert linear_matched == indexed_matched
+
+        print("{:>8}{:>10}{:>12}{:>14.3f}{:>14.3f}{:>9.0f}x".format(
+            points, args.triggers, indexed_matched, linear_time, indexed_time, linear_time / indexed_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Benchmark of the parsing of camera and lidar data: the former allocation of a new
+array per frame against the copy into the preallocated buffers of a SensorBufferRing.
+
+Synthetic frames are generated, so no CARLA server is needed, only its Python API.
+Each frame goes through the SensorInterface and is handed to the agent with get_data(),
+which recycles the buffers of the previous step.
+
+    python -m srunner.tests.benchmarks.bench_sensor_buffers --frames 500
+"""
+
+from __future__ import print_function
+
+import argparse
+import copy
+import time
+
+import numpy as np
+
+from srunner.autoagents.sensor_interface import CallBack, SensorInterface
+
+TAG = 'sensor'
+
+
+class FakeMeasurement(object):
+
+    """
+    Stand-in of a carla.Image or carla.LidarMeasurement, with its raw data as bytes
+    """
+
+    def __init__(self, frame, raw_data, width=0, height=0):
+        self.frame = frame
+        self.raw_data = raw_data
+        self.width = width
+        self.height = height
+
+
+def generate_images(frames, width, height):
+    """
+    Returns synthetic BGRA camera frames
+    """
+    rng = np.random.default_rng(0)
+    raw_data = rng.integers(0, 256, width * height * 4, dtype=np.uint8).tobytes()
+    return [FakeMeasurement(frame, raw_data, width, height) for frame in range(1, frames + 1)]
+
+
+def generate_lidar(frames, points):
+    """
+    Returns synthetic lidar frames, whose amount of points changes every frame
+    """
+    rng = np.random.default_rng(0)
+    measurements = []
+    for frame in range(1, frames + 1):
+        amount = int(points * rng.uniform(0.95, 1.05))
+        measurements.append(FakeMeasurement(frame, rng.random(amount * 4, dtype=np.float32).tobytes()))
+    return measurements
+
+
+def parse_image_allocating(_, interface, image):
+    """
+    Former CallBack._parse_image_cb, allocating a new array per frame
+    """
+    array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
+    array = copy.deepcopy(array)
+    array = np.reshape(array, (image.height, image.width, 4))
+    interface.update_sensor(TAG, array, image.frame)
+
+
+def parse_lidar_allocating(_, interface, lidar_data):
+    """
+    Former CallBack._parse_lidar_cb, allocating a new array per frame
+    """
+    points = np.frombuffer(lidar_data.raw_data, dtype=np.dtype('f4'))
+    points = copy.deepcopy(points)
+    points = np.reshape(points, (int(points.shape[0] / 4), 4))
+    interface.update_sensor(TAG, points, lidar_data.frame)
+
+
+def parse_image_ring(callback, _, image):
+    """
+    CallBack._parse_image_cb, copying into the buffers of the ring
+    """
+    callback._parse_image_cb(image, TAG)  # pylint: disable=protected-access
+
+
+def parse_lidar_ring(callback, _, lidar_data):
+    """
+    CallBack._parse_lidar_cb, copying into the buffers of the ring
+    """
+    callback._parse_lidar_cb(lidar_data, TAG)  # pylint: disable=protected-access
+
+
+def measure(parse, measurements):
+    """
+    Returns the time per frame [ms], parsing each frame and handing it to the agent,
+    and the amount of buffers allocated by the ring
+    """
+    interface = SensorInterface()
+    callback = CallBack(TAG, object(), interface)
+
+    start_time = time.perf_counter()
+    for measurement in measurements:
+        parse(callback, interface, measurement)
+        interface.get_data(measurement.frame)
+    elapsed = time.perf_counter() - start_time
+
+    callback.stop()
+    return 1e3 * elapsed / len(measurements), callback._buffers.allocations  # pylint: disable=protected-access
+
+
+def main():
+    """
+    Generates the frames and measures both parsings
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', default=500, type=int, help='Frames per sensor (default: 500)')
+    parser.add_argument('--width', default=800, type=int, help='Camera width (default: 800)')
+    parser.add_argument('--height', default=600, type=int, help='Camera height (default: 600)')
+    parser.add_argument('--points', default=100000, type=int, help='Lidar points per frame (default: 100000)')
+    args = parser.parse_args()
+
+    sensors = [
+        ("camera {}x{}".format(args.width, args.height), generate_images(args.frames, args.width, args.height),
+         parse_image_allocating, parse_image_ring),
+        ("lidar {} points".format(args.points), generate_lidar(args.frames, args.points),
+         parse_lidar_allocating, parse_lidar_ring),
+    ]
+
+    print("{:<24}{:>16}{:>12}{:>14}{:>10}".format("sensor", "allocate [ms]", "ring [ms]", "allocations", "speedup"))
+    for name, measurements, parse_allocating, parse_ring in sensors:
+        allocating_time, _ = measure(parse_allocating, measurements)
+        ring_time, allocations = measure(parse_ring, measurements)
+        print("{:<24}{:>16.3f}{:>12.3f}{:>14}{:>9.1f}x".format(
+            name, allocating_time, ring_time, allocations, allocating_time / ring_time))
+
+
+if __name__ == '__main__':
+    main()
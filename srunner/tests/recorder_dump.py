@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Generator of synthetic CARLA recorder dumps, in the format returned by
+show_recorder_file_info, for the tests and benchmarks of the metrics parser
+"""
+
+
+def write_recorder_dump(fd, frames, vehicles, walkers=1):
+    """
+    Writes a recorder dump of the given amount of frames, with the given amount of
+    moving vehicles and walkers, a traffic light and a few events, to a file-like object.
+    The first vehicle is the ego one
+    """
+    write = fd.write
+    actors = vehicles + walkers
+    write("Version: 1\nMap: Town03\nDate: 01/01/21 10:00:00\n\n")
+
+    elapsed_time = 0.0
+    for frame in range(1, frames + 1):
+        write("Frame %d at %g seconds\n" % (frame, elapsed_time))
+        if frame == 1:
+            for actor in range(vehicles):
+                write(" Create %d: vehicle.tesla.model3 (1) at (%d, %d, 0)\n" % (100 + actor, actor * 100, actor * 50))
+                write("  role_name = %s\n" % ("hero" if actor == 0 else "scenario"))
+            for actor in range(vehicles, actors):
+                write(" Create %d: walker.pedestrian.0001 (2) at (%d, 10, 0)\n" % (100 + actor, actor * 100))
+                write("  role_name = walker\n")
+            write(" Create 900: traffic.traffic_light (3) at (10, 20, 0)\n")
+        if frame == 3 and vehicles > 1:
+            write(" Collision id 10 between 100 with 101\n")
+            write(" Parenting 101 with 100 (parent)\n")
+
+        write(" Positions: %d\n" % actors)
+        for actor in range(actors):
+            write("  Id: %d Location: (%.1f, %.1f, %.1f) Rotation (%.2f, %.2f, %.2f)\n" % (
+                100 + actor, frame * 10 + actor, actor * 2.0, 1.0, 0.0, 1.5, frame * 0.1))
+        write(" State traffic lights: 1\n")
+        write("  Id: 900 state: %d frozen: 0 elapsedTime: %.2f\n" % (frame % 3, elapsed_time))
+        write(" Vehicle animations: %d\n" % vehicles)
+        for actor in range(vehicles):
+            write("  Id: %d Steering: 0.1 Throttle: 0.5 Brake 0 Handbrake: 0 Gear: %d\n" % (
+                100 + actor, 1 if actor else -1))
+        write(" Walker animations: %d\n" % walkers)
+        for actor in range(vehicles, actors):
+            write("  Id: %d speed: %.2f\n" % (100 + actor, 1.0 + 0.01 * frame))
+        write(" Vehicle light animations: 1\n")
+        write("  Id: 100 Position LowBeam\n")
+        write(" Dynamic actors: %d\n" % actors)
+        for actor in range(actors):
+            write("  Id: %d linear_vel: (%.2f, 0, 0) angular_vel: (0, 0, %.2f)\n" % (100 + actor, frame * 0.5, 0.1))
+        if frame == 1:
+            write(" Actor bounding boxes: 1\n")
+            write("  Id: 100 Location: (0, 0, 50) Extent: (200, 100, 75)\n")
+            write(" Actor trigger volumes: 1\n")
+            write("  Id: 900 Location: (0, 0, 50) Extent: (200, 100, 75)\n")
+        write(" Current platform time: %.3f\n" % (elapsed_time * 1.1))
+        if frame == 2:
+            write(" Physics Control: 1\n")
+            write("  Id: 100\n")
+            write("   max_rpm = 5000\n")
+            write("   use_gear_auto_box = true\n")
+            write("   center_of_mass = (0.1, 0.2, 0.3)\n")
+            write("   torque_curve = (0, 400) (1000, 500)\n")
+            write("   forward_gears:\n")
+            write("    gear 0: ratio 1.5 down_ratio 0.5 up_ratio 0.6\n")
+            write("   wheels:\n")
+            write("    wheel 0: tire_friction 1 damping_rate 2 max_steer_angle 3 radius 4 max_brake_torque 5"
+                  " max_handbrake_torque 6\n")
+            write(" Traffic Light time events: 1\n")
+            write("  Id: 900 green_time: 10 yellow_time: 3 red_time: 2\n")
+        elapsed_time += 0.05
+
+    write("\nFrames: %d\nDuration: %g seconds\n" % (frames, elapsed_time))
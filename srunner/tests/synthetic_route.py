@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Generator of synthetic routes and scenario annotations, for the tests and benchmarks
+of the RouteParser, and the former scan of the route for scenarios as a reference
+"""
+
+import math
+import random
+
+import carla
+from agents.navigation.local_planner import RoadOption
+
+from srunner.tools.route_parser import RouteParser
+
+SCENARIO_TYPES = ['Scenario1', 'Scenario3', 'Scenario4', 'Scenario7', 'Scenario8', 'Scenario9']
+
+
+def generate_route(points, laps=2, seed=0):
+    """
+    Returns a winding route of the given amount of points, one meter apart, as a list of
+    (carla.Transform, RoadOption). The route drives the same path several laps, so that
+    a trigger point can match more than one of its positions
+    """
+    rng = random.Random(seed)
+    lap_points = max(1, points // laps)
+
+    lap = []
+    x, y, yaw = 0.0, 0.0, 0.0
+    for i in range(lap_points):
+        if i % 50 == 49:
+            option = rng.choice([RoadOption.LEFT, RoadOption.RIGHT, RoadOption.STRAIGHT])
+        elif i % 50 == 25 and rng.random() < 0.2:
+            option = rng.choice([RoadOption.CHANGELANELEFT, RoadOption.CHANGELANERIGHT])
+        else:
+            option = RoadOption.LANEFOLLOW
+        lap.append((x, y, yaw, option))
+
+        yaw = (yaw + rng.uniform(-6.0, 6.0)) % 360
+        x += math.cos(math.radians(yaw))
+        y += math.sin(math.radians(yaw))
+
+    route = []
+    for _ in range(laps):
+        for x, y, yaw, option in lap:
+            route.append((carla.Transform(carla.Location(x, y, 0.0), carla.Rotation(0.0, yaw, 0.0)), option))
+    return route[:points]
+
+
+def generate_annotations(route_name, route, triggers, seed=0):
+    """
+    Returns the world annotations of the given amount of scenario triggers. Most of them are
+    placed close to a position of the route, some are close enough to match it and some aren't
+    """
+    rng = random.Random(seed)
+
+    scenarios = {scenario_type: [] for scenario_type in SCENARIO_TYPES}
+    for _ in range(triggers):
+        transform = rng.choice(route)[0]
+        if rng.random() < 0.1:
+            # Far from the route
+            transform = carla.Transform(carla.Location(transform.location.x + 500, transform.location.y, 0.0),
+                                        transform.rotation)
+
+        event = {'transform': {
+            'x': str(transform.location.x + rng.uniform(-2.5, 2.5)),
+            'y': str(transform.location.y + rng.uniform(-2.5, 2.5)),
+            'z': str(transform.location.z + rng.uniform(-0.5, 0.5)),
+            'yaw': str((transform.rotation.yaw + rng.uniform(-15.0, 15.0)) % 360),
+            'pitch': '0'}}
+        scenarios[rng.choice(SCENARIO_TYPES)].append(event)
+
+    return {route_name: [{'scenario_type': scenario_type, 'available_event_configurations': events}
+                         for scenario_type, events in scenarios.items()]}
+
+
+def scan_route_for_scenarios_linear(route_name, trajectory, world_annotations):
+    """
+    Former RouteParser.scan_route_for_scenarios, matching each trigger against the whole
+    route and all the previous triggers
+    """
+    existent_triggers = {}
+    possible_scenarios = {}
+    latest_trigger_id = 0
+
+    for town_name in world_annotations.keys():
+        if town_name != route_name:
+            continue
+
+        scenarios = world_annotations[town_name]
+        for scenario in scenarios:
+            if "scenario_type" not in scenario:
+                break
+            scenario_name = scenario["scenario_type"]
+            for event in scenario["available_event_configurations"]:
+                waypoint = event['transform']
+                RouteParser.convert_waypoint_float(waypoint)
+                match_position = RouteParser.match_world_location_to_route(waypoint, trajectory)
+                if match_position is not None:
+                    if 'other_actors' in event:
+                        other_vehicles = event['other_actors']
+                    else:
+                        other_vehicles = None
+                    scenario_subtype = RouteParser.get_scenario_type(scenario_name, match_position, trajectory)
+                    if scenario_subtype is None:
+                        continue
+                    scenario_description = {
+                        'name': scenario_name,
+                        'other_actors': other_vehicles,
+                        'trigger_position': waypoint,
+                        'scenario_type': scenario_subtype,
+                    }
+
+                    trigger_id = RouteParser.check_trigger_position(waypoint, existent_triggers)
+                    if trigger_id is None:
+                        existent_triggers.update({latest_trigger_id: waypoint})
+                        possible_scenarios.update({latest_trigger_id: []})
+                        trigger_id = latest_trigger_id
+                        latest_trigger_id += 1
+
+                    possible_scenarios[trigger_id].append(scenario_description)
+
+    return possible_scenarios, existent_triggers
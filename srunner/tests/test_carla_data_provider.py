@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Tests of the actor spatial index of the CarlaDataProvider, with fake actors and
+world snapshots. They don't need a CARLA server, only its Python API
+"""
+
+import unittest
+
+try:
+    import carla
+    from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
+except ImportError:  # The CARLA Python API isn't available
+    CarlaDataProvider = None
+
+
+class FakeActor(object):
+
+    """
+    Stand-in of a carla.Actor
+    """
+
+    def __init__(self, actor_id, type_id, x):
+        self.id = actor_id
+        self.type_id = type_id
+        self.is_alive = True
+        self.transform = carla.Transform(carla.Location(x, 0.0, 0.0), carla.Rotation(0.0, 0.0, 0.0))
+        self.velocity = carla.Vector3D(0.0, 0.0, 0.0)
+
+    def get_transform(self):
+        return self.transform
+
+    def get_velocity(self):
+        return self.velocity
+
+
+class FakeWorldSnapshot(object):
+
+    """
+    Stand-in of a carla.WorldSnapshot, the actor snapshots being the actors themselves
+    """
+
+    def __init__(self, actors, frame=1):
+        self.frame = frame
+        self._actors = {actor.id: actor for actor in actors}
+
+    def __iter__(self):
+        return iter(self._actors.values())
+
+    def find(self, actor_id):
+        return self._actors.get(actor_id, None)
+
+
+class FakeWorld(object):
+
+    """
+    Stand-in of a carla.World, counting the queries of its actors
+    """
+
+    def __init__(self, actors):
+        self.actors = actors
+        self.queries = 0
+
+    def get_actors(self):
+        self.queries += 1
+        return self.actors
+
+
+@unittest.skipIf(CarlaDataProvider is None, "requires the CARLA Python API")
+class TestActorSpatialIndex(unittest.TestCase):
+
+    """
+    The actor spatial index sees the registered actors, and the vehicles and walkers
+    of the world that aren't registered, like an ego vehicle spawned by another client
+    """
+
+    def setUp(self):
+        self.registered = FakeActor(1, 'vehicle.audi.tt', 10.0)
+        self.ego = FakeActor(2, 'vehicle.tesla.model3', 20.0)
+        self.walker = FakeActor(3, 'walker.pedestrian.0001', 30.0)
+        self.light = FakeActor(4, 'traffic.traffic_light', 0.0)
+        self.world = FakeWorld([self.registered, self.ego, self.walker, self.light])
+
+        CarlaDataProvider._world = self.world  # pylint: disable=protected-access
+        CarlaDataProvider.register_actor(self.registered)
+
+    def tearDown(self):
+        CarlaDataProvider._world = None  # pylint: disable=protected-access
+        CarlaDataProvider._actor_state_registry.clear()  # pylint: disable=protected-access
+        CarlaDataProvider._world_actor_ids = frozenset()  # pylint: disable=protected-access
+        CarlaDataProvider._world_dynamic_actors = {}  # pylint: disable=protected-access
+        CarlaDataProvider._unregistered_actors = {}  # pylint: disable=protected-access
+
+    def _get_nearby_actors(self):
+        index = CarlaDataProvider.get_actor_spatial_index()
+        return [actor.id for _, actor in index.actors_within(carla.Location(0.0, 0.0, 0.0), 100)]
+
+    def test_unregistered_actors_with_snapshot(self):
+        snapshot = FakeWorldSnapshot(self.world.actors)
+        CarlaDataProvider.on_carla_tick(snapshot)
+        self.assertEqual(self._get_nearby_actors(), [1, 2, 3])
+        self.assertEqual(CarlaDataProvider.get_transform(self.ego), self.ego.transform)
+
+        # The world is only queried again once its actors change
+        CarlaDataProvider.on_carla_tick(snapshot)
+        self.assertEqual(self.world.queries, 1)
+
+        del self.world.actors[2]
+        CarlaDataProvider.on_carla_tick(FakeWorldSnapshot(self.world.actors, 2))
+        self.assertEqual(self.world.queries, 2)
+        self.assertEqual(self._get_nearby_actors(), [1, 2])
+
+    def test_unregistered_actors_without_snapshot(self):
+        CarlaDataProvider.on_carla_tick()
+        self.assertEqual(self._get_nearby_actors(), [1, 2, 3])
+
+    def test_registered_later(self):
+        CarlaDataProvider.on_carla_tick(FakeWorldSnapshot(self.world.actors))
+        CarlaDataProvider.register_actor(self.ego)
+        CarlaDataProvider.on_carla_tick(FakeWorldSnapshot(self.world.actors, 2))
+        self.assertEqual(self._get_nearby_actors(), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
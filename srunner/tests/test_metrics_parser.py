@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Tests of the columnar MetricsParser against the former string based one
+(legacy_metrics_parser), on a fixture recorder dump. They don't need a CARLA server,
+only its Python API
+"""
+
+import math
+import os
+import unittest
+
+try:
+    from srunner.metrics.tools.metrics_parser import MetricsParser
+    from srunner.tests import legacy_metrics_parser
+except ImportError:  # The CARLA Python API isn't available
+    MetricsParser = None
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "recorder_fixture.log")
+
+
+def get_values(value):
+    """
+    Returns the comparable values of a parsed value: the attributes of the carla types,
+    and the elements of the containers
+    """
+    if isinstance(value, dict):
+        return {key: get_values(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [get_values(item) for item in value]
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    if hasattr(value, '__dict__') and value.__dict__:
+        return get_values(vars(value))
+    return [get_values(getattr(value, name)) for name in ('x', 'y', 'z', 'pitch', 'yaw', 'roll',
+                                                          'location', 'rotation', 'extent',
+                                                          'throttle', 'steer', 'brake', 'hand_brake',
+                                                          'reverse', 'manual_gear_shift', 'gear')
+            if hasattr(value, name)] or repr(value)
+
+
+@unittest.skipIf(MetricsParser is None, "requires the CARLA Python API")
+class TestMetricsParser(unittest.TestCase):
+
+    """
+    The columnar parser gives the same information as the former one, except for:
+    - the states being stored as float32
+    - the walker speed being a float instead of a string
+    - the acceleration, which the former parser always returned as zero
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        with open(FIXTURE) as fd:
+            recorder_str = fd.read()
+        cls.legacy = legacy_metrics_parser.MetricsParser(recorder_str).parse_recorder_info()
+        with open(FIXTURE) as fd:
+            cls.columnar = MetricsParser(fd).parse_recorder_info()
+
+    def assert_close(self, expected, actual, path="info"):
+        """
+        Compares two parsed values, allowing for the float32 precision
+        """
+        if isinstance(expected, dict):
+            self.assertEqual(sorted(expected), sorted(actual), path)
+            for key in expected:
+                self.assert_close(expected[key], actual[key], "{}[{!r}]".format(path, key))
+        elif isinstance(expected, list):
+            self.assertEqual(len(expected), len(actual), path)
+            for i, (expected_item, actual_item) in enumerate(zip(expected, actual)):
+                self.assert_close(expected_item, actual_item, "{}[{}]".format(path, i))
+        elif isinstance(expected, float) and not isinstance(actual, bool):
+            self.assertTrue(math.isclose(expected, actual, rel_tol=1e-6, abs_tol=1e-6),
+                            "{}: {} != {}".format(path, expected, actual))
+        else:
+            self.assertEqual(expected, actual, path)
+
+    def test_simulation_info(self):
+        self.assertEqual(self.legacy[0], self.columnar[0])
+
+    def test_actors_info(self):
+        self.assert_close(get_values(self.legacy[1]), get_values(self.columnar[1]))
+
+    def test_frames(self):
+        legacy_frames = get_values(self.legacy[2])
+        columnar_frames = get_values(self.columnar[2])
+
+        for legacy_frame, columnar_frame in zip(legacy_frames, columnar_frames):
+            for actor in legacy_frame["actors"].values():
+                actor.pop("acceleration", None)
+                if "speed" in actor:
+                    actor["speed"] = float(actor["speed"])
+            for actor in columnar_frame["actors"].values():
+                actor.pop("acceleration", None)
+
+        self.assert_close(legacy_frames, columnar_frames, "frames")
+
+    def test_acceleration(self):
+        # Finite difference with the velocity of the previous frame
+        frames = self.columnar[2]
+        for previous, current in zip(frames[:-1], frames[1:]):
+            delta_time = current["frame"]["delta_time"]
+            velocity = current["actors"][100]["velocity"]
+            previous_velocity = previous["actors"][100]["velocity"]
+            acceleration = current["actors"][100]["acceleration"]
+            self.assertAlmostEqual(acceleration.x, (velocity.x - previous_velocity.x) / delta_time, places=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
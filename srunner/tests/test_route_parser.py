@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Tests of the indexed matching of scenario triggers to a route against the former
+scan of the whole route. They don't need a CARLA server, only its Python API
+"""
+
+import copy
+import unittest
+
+try:
+    from srunner.tools.route_parser import RouteParser, TrajectoryIndex
+    from srunner.tests import synthetic_route
+except ImportError:  # The CARLA Python API isn't available
+    RouteParser = None
+
+
+@unittest.skipIf(RouteParser is None, "requires the CARLA Python API")
+class TestRouteParserIndex(unittest.TestCase):
+
+    """
+    The TrajectoryIndex and the trigger cells must give exactly the same matches
+    as scanning the whole route and all the triggers
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.route = synthetic_route.generate_route(2000, laps=2, seed=1)
+        cls.annotations = synthetic_route.generate_annotations('Town01', cls.route, 500, seed=2)
+        cls.triggers = [event['transform'] for scenario in cls.annotations['Town01']
+                        for event in scenario['available_event_configurations']]
+        for trigger in cls.triggers:
+            RouteParser.convert_waypoint_float(trigger)
+
+    def test_match_world_location_to_route(self):
+        index = TrajectoryIndex(self.route)
+        matches = 0
+        for trigger in self.triggers:
+            expected = RouteParser.match_world_location_to_route(trigger, self.route)
+            self.assertEqual(expected, RouteParser.match_world_location_to_route(trigger, self.route, index))
+            matches += expected is not None
+
+        # Both the matching and the not matching cases are covered
+        self.assertGreater(matches, 0)
+        self.assertLess(matches, len(self.triggers))
+
+    def test_get_scenario_type(self):
+        index = TrajectoryIndex(self.route)
+        for match_position in range(0, len(self.route), 7):
+            for scenario_type in synthetic_route.SCENARIO_TYPES:
+                self.assertEqual(RouteParser.get_scenario_type(scenario_type, match_position, self.route),
+                                 RouteParser.get_scenario_type(scenario_type, match_position, self.route, index))
+
+    def test_check_trigger_position(self):
+        existing_triggers = {}
+        trigger_cells = {}
+        for trigger_id, trigger in enumerate(self.triggers):
+            expected = RouteParser.check_trigger_position(trigger, existing_triggers)
+            self.assertEqual(expected, RouteParser.check_trigger_position(trigger, existing_triggers, trigger_cells))
+            if expected is None:
+                existing_triggers[trigger_id] = trigger
+                RouteParser._add_trigger_to_cells(trigger_id, trigger, trigger_cells)  # pylint: disable=protected-access
+
+        self.assertLess(len(existing_triggers), len(self.triggers))
+
+    def test_scan_route_for_scenarios(self):
+        expected = synthetic_route.scan_route_for_scenarios_linear(
+            'Town01', self.route, copy.deepcopy(self.annotations))
+        actual = RouteParser.scan_route_for_scenarios('Town01', self.route, copy.deepcopy(self.annotations))
+        self.assertEqual(expected, actual)
+
+
+if __name__ == '__main__':
+    unittest.main()
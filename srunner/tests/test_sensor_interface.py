@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Tests of the SensorInterface and the SensorWorkers delivering its data.
+They don't need a CARLA server, only its Python API
+"""
+
+import threading
+import time
+import unittest
+
+try:
+    from srunner.autoagents.sensor_interface import CallBack, SensorInterface, SensorReceivedNoData
+    from srunner.autoagents.sensor_worker import SensorWorker
+except ImportError:  # The CARLA Python API isn't available
+    SensorInterface = None
+
+
+class FakeData(object):
+
+    """
+    Stand-in of the data of a CARLA sensor
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+
+
+@unittest.skipIf(SensorInterface is None, "requires the CARLA Python API")
+class TestSensorWorkerDrops(unittest.TestCase):
+
+    """
+    A frame dropped by a sensor worker must not make the agent wait for it
+    """
+
+    def setUp(self):
+        self.interface = SensorInterface()
+        self.interface.register_sensor('Center', object())
+        self.release_first = threading.Event()
+
+        def process(data):
+            if data.frame == 1:
+                self.release_first.wait()
+            self.interface.update_sensor('Center', data.frame, data.frame)
+
+        self.worker = SensorWorker(process, queue_size=1, drop_policy=SensorWorker.DROP_OLDEST,
+                                   on_drop=lambda data: self.interface.drop_sensor_frame('Center', data.frame))
+
+    def tearDown(self):
+        self.release_first.set()
+        self.worker.stop()
+
+    def test_dropped_frame_fails_fast(self):
+        # Frame 1 is being processed, 2 is queued and then dropped to make room for 3
+        self.worker.submit(FakeData(1))
+        time.sleep(0.1)
+        self.worker.submit(FakeData(2))
+        self.worker.submit(FakeData(3))
+        self.release_first.set()
+
+        self.assertEqual(self.interface.get_data(1)['Center'], (1, 1))
+
+        start_time = time.time()
+        with self.assertRaises(SensorReceivedNoData):
+            self.interface.get_data(2)
+        self.assertLess(time.time() - start_time, 1.0)
+
+        self.assertEqual(self.interface.get_data(3)['Center'], (3, 3))
+        self.assertEqual(self.worker.get_statistics()['dropped'], 1)
+
+
+@unittest.skipIf(SensorInterface is None, "requires the CARLA Python API")
+class TestCallBackWorker(unittest.TestCase):
+
+    """
+    The drop policy of the sensor workers depends on the synchronous mode
+    """
+
+    def _get_drop_policy(self, synchronous):
+        interface = SensorInterface()
+        callback = CallBack('Center', object(), interface, None,
+                            {'queue_size': 1, 'drop_policy': SensorWorker.DROP_OLDEST}, synchronous)
+        drop_policy = callback._worker._drop_policy  # pylint: disable=protected-access
+        callback.stop()
+        return drop_policy
+
+    def test_synchronous_mode_blocks(self):
+        self.assertEqual(self._get_drop_policy(True), SensorWorker.BLOCK)
+
+    def test_asynchronous_mode_drops(self):
+        self.assertEqual(self._get_drop_policy(False), SensorWorker.DROP_OLDEST)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Tests of the SensorRecorder streams and of reading them back with a SensorRecording
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from srunner.autoagents.sensor_recorder import SensorRecording, SensorStream
+
+
+class TestSensorRecording(unittest.TestCase):
+
+    """
+    The recorded frames are read back by frame, whatever the order they were recorded in
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _record(self, frames):
+        stream = SensorStream(os.path.join(self.path, "Center"), chunk_size=64)
+        for frame in frames:
+            stream.write(frame, frame * 0.05, np.full((2, 3), frame, dtype=np.float32))
+        stream.close()
+        return SensorRecording(self.path)
+
+    def test_frame_order(self):
+        recording = self._record([1, 2, 3])
+        self.assertEqual(recording.get_frames('Center').tolist(), [1, 2, 3])
+        self.assertIsNone(recording.get_data('Center', 4))
+
+    def test_out_of_order_frames(self):
+        recording = self._record([1, 4, 2, 3])
+        self.assertEqual(recording.get_frames('Center').tolist(), [1, 2, 3, 4])
+        for frame in (1, 2, 3, 4):
+            timestamp, data = recording.get_data('Center', frame)
+            self.assertAlmostEqual(timestamp, frame * 0.05)
+            self.assertTrue(np.all(data == frame))
+            self.assertEqual(data.shape, (2, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
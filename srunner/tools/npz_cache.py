@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides the NpzCache, the base of the on-disk caches storing each
+entry as a compressed .npz file (see RouteCache and RecorderCache).
+"""
+
+from __future__ import print_function
+
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+class NpzCache(object):
+
+    """
+    Base of the on-disk caches made of compressed .npz files, one per entry,
+    named "<PREFIX>_<key>.npz" after the hash of the cached content.
+
+    The subclasses define PREFIX and VERSION, compute their keys with _hash(),
+    and convert their entries from and to arrays with _read() and _write().
+
+    Args:
+        cache_dir (str): directory where the entries are stored
+    """
+
+    PREFIX = "entry"
+    VERSION = 1
+
+    def __init__(self, cache_dir):
+        self._cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        if not os.path.exists(self._cache_dir):
+            os.makedirs(self._cache_dir)
+
+    @classmethod
+    def _hash(cls, *content):
+        """
+        returns the key of the given JSON serializable content, for the current VERSION
+        """
+        content = json.dumps([cls.VERSION] + list(content))
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self._cache_dir, "{}_{}.npz".format(self.PREFIX, key))
+
+    def _read(self, key, decode):
+        """
+        returns the entry with the given key, decoded from its arrays by decode,
+        or None if it is not cached or corrupted
+        """
+        path = self._get_path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+
+        try:
+            with np.load(path) as data:
+                entry = decode(data)
+        except (IOError, KeyError, ValueError):
+            print("{}: Ignoring corrupted entry {}".format(self.__class__.__name__, path))
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry
+
+    def _write(self, key, arrays):
+        """
+        Store the given dictionary of arrays under the given key
+        """
+        # Write to a temporary file first, so that concurrent runs never read a partial entry
+        path = self._get_path(key)
+        temp_path = "{}.{}.tmp.npz".format(path[:-len(".npz")], os.getpid())
+        np.savez_compressed(temp_path, **arrays)
+        os.replace(temp_path, path)
+
+    def invalidate(self, key=None):
+        """
+        Remove the entry with the given key, or all of them if no key is given
+        """
+        if key is not None:
+            paths = [self._get_path(key)]
+        else:
+            paths = glob.glob(os.path.join(self._cache_dir, "{}_*.npz".format(self.PREFIX)))
+
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def get_stats(self):
+        """
+        returns the amount of cache hits and misses
+        """
+        return {'hits': self.hits, 'misses': self.misses}
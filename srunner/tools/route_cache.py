@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides an on-disk cache of the dense routes computed by
+route_manipulation.interpolate_trajectory, so that the same route does not
+have to be traced again on every run.
+"""
+
+from __future__ import print_function
+
+import numpy as np
+
+import carla
+from agents.navigation.local_planner import RoadOption
+
+from srunner.tools.npz_cache import NpzCache
+
+
+class RouteCache(NpzCache):
+
+    """
+    Content-addressed cache of interpolated routes.
+
+    Each entry is a compressed .npz file named after the hash of the map name,
+    the trajectory points and the hop resolution. It holds the route transforms
+    (x, y, z, pitch, yaw, roll), the RoadOption codes and the GPS reference of the map.
+
+    Args:
+        cache_dir (str): directory where the entries are stored
+    """
+
+    PREFIX = "route"
+    VERSION = 1
+
+    @classmethod
+    def get_key(cls, map_name, trajectory, hop_resolution):
+        """
+        returns the cache key of a route
+        """
+        points = [[round(point.x, 3), round(point.y, 3), round(point.z, 3)] for point in trajectory]
+        return cls._hash(map_name, points, float(hop_resolution))
+
+    def load(self, key):
+        """
+        returns the cached (route, lat_ref, lon_ref) for the given key, or None if not cached
+        """
+        return self._read(key, self._decode)
+
+    @staticmethod
+    def _decode(data):
+        transforms = data['transforms']
+        options = data['options']
+        lat_ref, lon_ref = data['gps_reference']
+
+        route = []
+        for (x, y, z, pitch, yaw, roll), option in zip(transforms.tolist(), options.tolist()):
+            transform = carla.Transform(carla.Location(x, y, z), carla.Rotation(pitch=pitch, yaw=yaw, roll=roll))
+            route.append((transform, RoadOption(option)))
+
+        return route, float(lat_ref), float(lon_ref)
+
+    def store(self, key, route, lat_ref, lon_ref):
+        """
+        Store a route, a list of (carla.Transform, RoadOption), under the given key
+        """
+        transforms = np.array([[t.location.x, t.location.y, t.location.z,
+                                t.rotation.pitch, t.rotation.yaw, t.rotation.roll] for t, _ in route],
+                              dtype=np.float64).reshape(-1, 6)
+        options = np.array([option.value for _, option in route], dtype=np.int8)
+
+        self._write(key, {'transforms': transforms, 'options': options,
+                          'gps_reference': np.array([lat_ref, lon_ref])})
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides the RouteIndex, a precomputed array representation of a route
+that the route criteria and trigger conditions use to locate an actor along it.
+"""
+
+import numpy as np
+
+
+def _to_array(vector):
+    """
+    Convert a carla.Location / carla.Vector3D to a numpy array
+    """
+    return np.array([vector.x, vector.y, vector.z], dtype=np.float64)
+
+
+class RouteIndex(object):
+
+    """
+    Array representation of a route, built once and queried every tick.
+
+    Attributes:
+        positions (np.ndarray): Nx3 array with the location of the route points
+        forward_vectors (np.ndarray): Nx3 array with the (unit) forward vector at each route point
+        cumulative_distance (np.ndarray): route length from the first point up to each point
+        planar_cumulative_distance (np.ndarray): same, only using the x and y coordinates
+    """
+
+    def __init__(self, positions, forward_vectors=None):
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+
+        segments = np.diff(self.positions, axis=0)
+        self.segment_lengths = np.linalg.norm(segments, axis=1)
+        self.cumulative_distance = np.concatenate(([0.0], np.cumsum(self.segment_lengths)))
+        self.planar_segment_lengths = np.linalg.norm(segments[:, :2], axis=1)
+        self.planar_cumulative_distance = np.concatenate(([0.0], np.cumsum(self.planar_segment_lengths)))
+
+        if forward_vectors is None:
+            # Use the direction towards the next point, and repeat the last one at the end
+            if len(segments) > 0:
+                forward_vectors = np.vstack((segments, segments[-1:]))
+            else:
+                forward_vectors = np.zeros_like(self.positions)
+            norms = np.linalg.norm(forward_vectors, axis=1)
+            norms[norms == 0] = 1.0
+            forward_vectors = forward_vectors / norms[:, np.newaxis]
+
+        self.forward_vectors = np.asarray(forward_vectors, dtype=np.float64).reshape(-1, 3)
+
+    @classmethod
+    def from_route(cls, route, forward_vectors=None):
+        """
+        Create the index from a route, a list of (carla.Transform or carla.Location, RoadOption) tuples.
+        If the route is made of transforms, their rotation is used as forward vector
+        """
+        positions = []
+        transform_forwards = []
+        for point, _ in route:
+            if hasattr(point, 'location'):
+                positions.append(_to_array(point.location))
+                transform_forwards.append(_to_array(point.get_forward_vector()))
+            else:
+                positions.append(_to_array(point))
+
+        if forward_vectors is None and route and len(transform_forwards) == len(positions):
+            forward_vectors = transform_forwards
+
+        return cls(positions, forward_vectors)
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def length(self):
+        """
+        returns the total length of the route
+        """
+        return float(self.cumulative_distance[-1]) if len(self.positions) else 0.0
+
+    def _window(self, start, end):
+        start = max(start, 0)
+        end = len(self.positions) if end is None else min(end, len(self.positions))
+        return start, end
+
+    def closest_index(self, location, start=0, end=None, planar=False):
+        """
+        returns the index of the route point in [start, end) closest to the location
+        and the distance to it. On ties, the highest index is returned.
+        If the window is empty, (-1, inf) is returned
+
+        Args:
+            location (carla.Location): location to be checked
+            start (int): first index checked
+            end (int): index after the last one checked. Defaults to the end of the route
+            planar (bool): if True, only the x and y coordinates are used
+        """
+        start, end = self._window(start, end)
+        if start >= end:
+            return -1, float('inf')
+
+        dims = 2 if planar else 3
+        difference = self.positions[start:end, :dims] - _to_array(location)[:dims]
+        distances = np.linalg.norm(difference, axis=1)
+
+        reverse_index = int(np.argmin(distances[::-1]))
+        index = end - 1 - reverse_index
+        return index, float(distances[index - start])
+
+    def passed_indices(self, location, start=0, end=None):
+        """
+        returns the indices of the route points in [start, end) that the location
+        has already passed, i.e. the location is in front of the point
+        """
+        start, end = self._window(start, end)
+        if start >= end:
+            return np.zeros(0, dtype=np.int64)
+
+        difference = _to_array(location) - self.positions[start:end]
+        dot = np.einsum('ij,ij->i', difference, self.forward_vectors[start:end])
+        return np.flatnonzero(dot > 0) + start
+
+    def segments_near(self, location, window=20.0):
+        """
+        returns the segments to be checked, in route order, when locating the given
+        location along the route (see get_distance_along_route), together with the
+        planar squared distances [m^2] between the location and the start of each segment.
+
+        A segment is returned if the location is closer to its start than its length,
+        or than window [m], where a neighbouring lane might be closer. The search stops at
+        the first route point the location is on top of, whose index is returned, or None
+        """
+        if len(self.positions) < 2:
+            return np.zeros(0, dtype=np.int64), np.zeros(0), None
+
+        difference = self.positions[:-1, :2] - _to_array(location)[:2]
+        distances_squared = np.einsum('ij,ij->i', difference, difference)
+
+        stop = None
+        end = len(distances_squared)
+        on_point = np.flatnonzero(distances_squared < 0.01)
+        if len(on_point):
+            stop = end = int(on_point[0])
+
+        near = ((distances_squared[:end] < self.planar_segment_lengths[:end] ** 2)
+                | (distances_squared[:end] < window ** 2))
+        return np.flatnonzero(near), distances_squared, stop
@@ -13,10 +13,12 @@ It also contains functions to convert the CARLA world location do GPS coordinate
 import math
 import xml.etree.ElementTree as ET
 
-from agents.navigation.global_route_planner import GlobalRoutePlanner
-
 from agents.navigation.local_planner import RoadOption
 
+from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
+
+_route_cache = None  # pylint: disable=invalid-name
+
 
 def _location_to_gps(lat_ref, lon_ref, location):
     """
@@ -129,16 +131,40 @@ def downsample_route(route, sample_factor):
     return ids_to_sample
 
 
+def set_route_cache(route_cache):
+    """
+    Set the RouteCache used by interpolate_trajectory. None disables the cache
+    """
+    global _route_cache  # pylint: disable=global-statement
+    _route_cache = route_cache
+
+
+def get_route_cache():
+    """
+    returns the RouteCache used by interpolate_trajectory (can be None)
+    """
+    return _route_cache
+
+
 def interpolate_trajectory(world, waypoints_trajectory, hop_resolution=1.0):
     """
         Given some raw keypoints interpolate a full dense trajectory to be used by the user.
+        If a RouteCache is set, already interpolated trajectories are loaded from it.
     :param world: an reference to the CARLA world so we can use the planner
     :param waypoints_trajectory: the current coarse trajectory
     :param hop_resolution: is the resolution, how dense is the provided trajectory going to be made
     :return: the full interpolated route both in GPS coordinates and also in its original form.
     """
 
-    grp = GlobalRoutePlanner(world.get_map(), hop_resolution)
+    cache_key = None
+    if _route_cache is not None:
+        cache_key = _route_cache.get_key(world.get_map().name, waypoints_trajectory, hop_resolution)
+        cached_route = _route_cache.load(cache_key)
+        if cached_route is not None:
+            route, lat_ref, lon_ref = cached_route
+            return location_route_to_gps(route, lat_ref, lon_ref), route
+
+    grp = CarlaDataProvider.get_global_route_planner(hop_resolution, world.get_map())
     # Obtain route plan
     route = []
     for i in range(len(waypoints_trajectory) - 1):   # Goes until the one before the last.
@@ -153,4 +179,7 @@ def interpolate_trajectory(world, waypoints_trajectory, hop_resolution=1.0):
 
     lat_ref, lon_ref = _get_latlon_ref(world)
 
+    if cache_key is not None:
+        _route_cache.store(cache_key, route, lat_ref, lon_ref)
+
     return location_route_to_gps(route, lat_ref, lon_ref), route
@@ -12,9 +12,12 @@ import math
 from typing import Tuple
 import xml.etree.ElementTree as ET
 
+import numpy as np
+
 import carla
 from agents.navigation.local_planner import RoadOption
 from srunner.scenarioconfigs.route_scenario_configuration import RouteScenarioConfiguration
+from srunner.tools.spatial_grid import SpatialGrid
 from srunner.tools.vehicle import Vehicle
 
 # TODO  check this threshold, it could be a bit larger but not so large that we cluster scenarios.
@@ -22,6 +25,47 @@ TRIGGER_THRESHOLD = 2.0  # Threshold to say if a trigger position is new or repe
 TRIGGER_ANGLE_THRESHOLD = 10  # Threshold to say if two angles can be considering matching when matching transforms.
 
 
+class TrajectoryIndex(object):
+
+    """
+    Precomputed data of a route trajectory, used to match many scenario trigger
+    points to the route without scanning it for each one of them.
+
+    Args:
+        trajectory (list): route, as a list of (carla.Transform, RoadOption)
+    """
+
+    def __init__(self, trajectory):
+        positions = [(t.location.x, t.location.y, t.location.z) for t, _ in trajectory]
+        self.grid = SpatialGrid(np.array(positions).reshape(-1, 3), 2 * TRIGGER_THRESHOLD)
+        self.yaws = np.array([t.rotation.yaw for t, _ in trajectory])
+
+        # For each position, the first option from there on that defines the scenario behavior
+        self.next_turn_options = [None] * len(trajectory)
+        next_turn_option = None
+        for i in range(len(trajectory) - 1, -1, -1):
+            if trajectory[i][1] not in (RoadOption.LANEFOLLOW, RoadOption.CHANGELANELEFT,
+                                        RoadOption.CHANGELANERIGHT):
+                next_turn_option = trajectory[i][1]
+            self.next_turn_options[i] = next_turn_option
+
+    def match(self, world_location):
+        """
+        returns the first position of the trajectory matching the world location, or None
+        """
+        point = (world_location['x'], world_location['y'], world_location['z'])
+        indices, _ = self.grid.query_radius(point, TRIGGER_THRESHOLD)
+        if len(indices) == 0:
+            return None
+
+        dyaw = (float(world_location['yaw']) - self.yaws[indices]) % 360
+        matching = indices[(dyaw < TRIGGER_ANGLE_THRESHOLD) | (dyaw > (360 - TRIGGER_ANGLE_THRESHOLD))]
+        if len(matching) == 0:
+            return None
+
+        return int(matching.min())
+
+
 class RouteParser(object):
 
     """
@@ -150,15 +194,40 @@ class RouteParser(object):
         return weather
 
     @staticmethod
-    def check_trigger_position(new_trigger, existing_triggers):
+    def _get_trigger_cell(trigger):
+        """
+        Get the grid cell of a trigger position, used to only compare nearby triggers
+        """
+        return (int(math.floor(trigger['x'] / TRIGGER_THRESHOLD)),
+                int(math.floor(trigger['y'] / TRIGGER_THRESHOLD)))
+
+    @staticmethod
+    def _add_trigger_to_cells(trigger_id, trigger, trigger_cells):
+        """
+        Register a trigger position at the trigger grid
+        """
+        trigger_cells.setdefault(RouteParser._get_trigger_cell(trigger), []).append(trigger_id)
+
+    @staticmethod
+    def check_trigger_position(new_trigger, existing_triggers, trigger_cells=None):
         """
         Check if this trigger position already exists or if it is a new one.
         :param new_trigger:
         :param existing_triggers:
+        :param trigger_cells: optional grid of the existing triggers, to only check the nearby ones
         :return:
         """
 
-        for trigger_id in existing_triggers.keys():
+        trigger_ids = existing_triggers.keys()
+        if trigger_cells is not None:
+            cell_x, cell_y = RouteParser._get_trigger_cell(new_trigger)
+            trigger_ids = []
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    trigger_ids.extend(trigger_cells.get((cell_x + dx, cell_y + dy), []))
+            trigger_ids.sort()
+
+        for trigger_id in trigger_ids:
             trigger = existing_triggers[trigger_id]
             dx = trigger['x'] - new_trigger['x']
             dy = trigger['y'] - new_trigger['y']
@@ -182,12 +251,16 @@ class RouteParser(object):
         waypoint['yaw'] = float(waypoint['yaw'])
 
     @staticmethod
-    def match_world_location_to_route(world_location, route_description):
+    def match_world_location_to_route(world_location, route_description, trajectory_index=None):
         """
         We match this location to a given route.
             world_location:
             route_description:
+            trajectory_index: optional TrajectoryIndex of the route, to avoid scanning all of it
         """
+        if trajectory_index is not None:
+            return trajectory_index.match(world_location)
+
         def get_dpos(waypoint1, wtransform):
             dx = float(waypoint1['x']) - wtransform.location.x
             dy = float(waypoint1['y']) - wtransform.location.y
@@ -218,7 +291,6 @@ class RouteParser(object):
             "dyaw": 360,
             "match_position": -1
         }
-        # TODO this function can be optimized to run on Log(N) time
         for route_waypoint in route_description:
             # DEBUGGING PURPOSE
             dpos = get_dpos(world_location, route_waypoint[0])
@@ -247,12 +319,13 @@ class RouteParser(object):
         return None
 
     @staticmethod
-    def get_scenario_type(scenario, match_position, trajectory):
+    def get_scenario_type(scenario, match_position, trajectory, trajectory_index=None):
         """
         Some scenarios have different types depending on the route.
         :param scenario: the scenario name
         :param match_position: the matching position for the scenarion
         :param trajectory: the route trajectory the ego is following
+        :param trajectory_index: optional TrajectoryIndex of the route, to avoid scanning it
         :return: tag representing this subtype
 
         Also used to check which are not viable (Such as an scenario
@@ -279,6 +352,21 @@ class RouteParser(object):
         # can't be None as they are still valid scenarios
         subtype = 'valid'
 
+        if trajectory_index is not None:
+            if scenario not in ('Scenario4', 'Scenario7', 'Scenario8', 'Scenario9'):
+                return subtype
+
+            # Only the next option defining the scenario behavior is relevant
+            next_turn_option = trajectory_index.next_turn_options[match_position]
+            subtypes = {
+                'Scenario4': {RoadOption.LEFT: 'S4left', RoadOption.RIGHT: 'S4right'},
+                'Scenario7': {RoadOption.LEFT: 'S7left', RoadOption.RIGHT: 'S7right',
+                              RoadOption.STRAIGHT: 'S7opposite'},
+                'Scenario8': {RoadOption.LEFT: 'S8left'},
+                'Scenario9': {RoadOption.RIGHT: 'S9right'},
+            }
+            return subtypes[scenario].get(next_turn_option, None)
+
         if scenario == 'Scenario4':
             for tuple_wp_turn in trajectory[match_position:]:
                 if check_this_waypoint(tuple_wp_turn):
@@ -338,6 +426,8 @@ class RouteParser(object):
 
         # the triggers dictionaries:
         existent_triggers = {}
+        trigger_cells = {}
+        trajectory_index = None
         # We have a table of IDs and trigger positions associated
         possible_scenarios = {}
 
@@ -348,6 +438,9 @@ class RouteParser(object):
             if town_name != route_name:
                 continue
 
+            if trajectory_index is None:
+                trajectory_index = TrajectoryIndex(trajectory)
+
             scenarios = world_annotations[town_name]
             for scenario in scenarios:  # For each existent scenario
                 if "scenario_type" not in scenario:
@@ -358,7 +451,7 @@ class RouteParser(object):
                     RouteParser.convert_waypoint_float(waypoint)
                     # We match trigger point to the route, now we need to check if the route affects
                     match_position = RouteParser.match_world_location_to_route(
-                        waypoint, trajectory)
+                        waypoint, trajectory, trajectory_index)
                     if match_position is not None:
                         # We match a location for this scenario, create a scenario object so this scenario
                         # can be instantiated later
@@ -368,7 +461,7 @@ class RouteParser(object):
                         else:
                             other_vehicles = None
                         scenario_subtype = RouteParser.get_scenario_type(scenario_name, match_position,
-                                                                         trajectory)
+                                                                         trajectory, trajectory_index)
                         if scenario_subtype is None:
                             continue
                         scenario_description = {
@@ -378,10 +471,11 @@ class RouteParser(object):
                             'scenario_type': scenario_subtype,  # some scenarios have route dependent configs
                         }
 
-                        trigger_id = RouteParser.check_trigger_position(waypoint, existent_triggers)
+                        trigger_id = RouteParser.check_trigger_position(waypoint, existent_triggers, trigger_cells)
                         if trigger_id is None:
                             # This trigger does not exist create a new reference on existent triggers
                             existent_triggers.update({latest_trigger_id: waypoint})
+                            RouteParser._add_trigger_to_cells(latest_trigger_id, waypoint, trigger_cells)
                             # Update a reference for this trigger on the possible scenarios
                             possible_scenarios.update({latest_trigger_id: []})
                             trigger_id = latest_trigger_id
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides a GlobalRoutePlanner that memoizes its traced routes
+"""
+
+from collections import OrderedDict
+
+from agents.navigation.global_route_planner import GlobalRoutePlanner
+
+
+class MemoizedGlobalRoutePlanner(GlobalRoutePlanner):
+
+    """
+    GlobalRoutePlanner keeping the most recently traced routes in a LRU cache.
+    Origin and destination are quantized to location_resolution, so that routes
+    between (almost) the same locations are only traced once.
+
+    Args:
+        wmap (carla.Map): map used to build the planner graph
+        sampling_resolution (float): distance between the route waypoints
+        cache_size (int): maximum amount of memoized routes
+        location_resolution (float): quantization of the origin and destination [m]
+    """
+
+    def __init__(self, wmap, sampling_resolution, cache_size=256, location_resolution=0.1):
+        super(MemoizedGlobalRoutePlanner, self).__init__(wmap, sampling_resolution)
+        self._trace_cache = OrderedDict()
+        self._cache_size = cache_size
+        self._location_resolution = location_resolution
+        self.hits = 0
+        self.misses = 0
+
+    def _quantize(self, location):
+        resolution = self._location_resolution
+        return (int(round(location.x / resolution)),
+                int(round(location.y / resolution)),
+                int(round(location.z / resolution)))
+
+    def trace_route(self, origin, destination):
+        """
+        Same as GlobalRoutePlanner.trace_route, but served from the cache if possible
+        """
+        key = (self._quantize(origin), self._quantize(destination))
+        if key in self._trace_cache:
+            self._trace_cache.move_to_end(key)
+            self.hits += 1
+            return list(self._trace_cache[key])
+
+        self.misses += 1
+        route = super(MemoizedGlobalRoutePlanner, self).trace_route(origin, destination)
+        self._trace_cache[key] = route
+        if len(self._trace_cache) > self._cache_size:
+            self._trace_cache.popitem(last=False)
+
+        return list(route)
@@ -22,85 +22,66 @@ from agents.navigation.local_planner import RoadOption
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
 
 
-def get_distance_along_route(route, target_location):
+def _get_neighbor_lane_locations(waypoint, get_next_lane):
+    """
+    returns the locations of the consecutive neighbor lanes of the waypoint, in the same direction
+    """
+    locations = []
+    wp = get_next_lane(waypoint)
+    while wp is not None and np.sign(wp.lane_id) == np.sign(waypoint.lane_id):
+        locations.append(wp.transform.location)
+        wp = get_next_lane(wp)
+    return locations
+
+
+def get_distance_along_route(route, target_location, route_index=None, lane_window=20.0):
     """
     Calculate the distance of the given location along the route
 
+    The route is walked in order, and the location is assigned to the first route interval
+    it lies within, matching its road and lane direction. Within lane_window [m] of the start
+    of an interval, the neighbor lanes in the same direction are checked as well.
+    The route can be given as a precomputed RouteIndex to avoid recreating it.
+
     Note: If the location is not along the route, the route length will be returned
     """
-
-    wmap = CarlaDataProvider.get_map()
-    covered_distance = 0
-    prev_position = None
-    found = False
+    if route_index is None:
+        route_index = CarlaDataProvider.get_route_index(route)
 
     # Don't use the input location, use the corresponding wp as location
-    target_location_from_wp = wmap.get_waypoint(target_location).transform.location
+    starting_wp = CarlaDataProvider.get_waypoint(target_location)
+    target_location_from_wp = starting_wp.transform.location
 
-    for position, _ in route:
+    # Only the intervals close enough to the location are checked, in route order
+    segments, distances_squared, stop = route_index.segments_near(target_location_from_wp, lane_window)
+    neighbor_lanes = None
 
+    for segment in segments:
         location = target_location_from_wp
+        distance_squared = distances_squared[segment]
+        interval_length_squared = route_index.planar_segment_lengths[segment] ** 2
+        prev_x, prev_y = route_index.positions[segment, :2]
 
-        # Don't perform any calculations for the first route point
-        if not prev_position:
-            prev_position = position
-            continue
-
-        # Calculate distance between previous and current route point
-        interval_length_squared = ((prev_position.x - position.x) ** 2) + ((prev_position.y - position.y) ** 2)
-        distance_squared = ((location.x - prev_position.x) ** 2) + ((location.y - prev_position.y) ** 2)
-
-        # Close to the current position? Stop calculation
-        if distance_squared < 0.01:
-            break
-
-        if distance_squared < 400 and not distance_squared < interval_length_squared:
+        if distance_squared < lane_window ** 2 and not distance_squared < interval_length_squared:
             # Check if a neighbor lane is closer to the route
-            # Do this only in a close distance to correct route interval, otherwise the computation load is too high
-            starting_wp = wmap.get_waypoint(location)
-            wp = starting_wp.get_left_lane()
-            while wp is not None:
-                new_location = wp.transform.location
-                new_distance_squared = ((new_location.x - prev_position.x) ** 2) + (
-                    (new_location.y - prev_position.y) ** 2)
-
-                if np.sign(starting_wp.lane_id) != np.sign(wp.lane_id):
-                    break
-
-                if new_distance_squared < distance_squared:
-                    distance_squared = new_distance_squared
-                    location = new_location
-                else:
-                    break
-
-                wp = wp.get_left_lane()
-
-            wp = starting_wp.get_right_lane()
-            while wp is not None:
-                new_location = wp.transform.location
-                new_distance_squared = ((new_location.x - prev_position.x) ** 2) + (
-                    (new_location.y - prev_position.y) ** 2)
-
-                if np.sign(starting_wp.lane_id) != np.sign(wp.lane_id):
-                    break
-
-                if new_distance_squared < distance_squared:
-                    distance_squared = new_distance_squared
-                    location = new_location
-                else:
-                    break
-
-                wp = wp.get_right_lane()
+            if neighbor_lanes is None:
+                neighbor_lanes = (_get_neighbor_lane_locations(starting_wp, lambda wp: wp.get_left_lane()),
+                                  _get_neighbor_lane_locations(starting_wp, lambda wp: wp.get_right_lane()))
+            for lane_locations in neighbor_lanes:
+                for new_location in lane_locations:
+                    new_distance_squared = (new_location.x - prev_x) ** 2 + (new_location.y - prev_y) ** 2
+                    if new_distance_squared < distance_squared:
+                        distance_squared = new_distance_squared
+                        location = new_location
+                    else:
+                        break
 
         if distance_squared < interval_length_squared:
             # The location could be inside the current route interval, if route/lane ids match
             # Note: This assumes a sufficiently small route interval
-            # An alternative is to compare orientations, however, this also does not work for
-            # long route intervals
-
-            curr_wp = wmap.get_waypoint(position)
-            prev_wp = wmap.get_waypoint(prev_position)
-            wp = wmap.get_waypoint(location)
+            prev_wp = CarlaDataProvider.get_waypoint(_get_route_location(route[segment][0]))
+            curr_wp = CarlaDataProvider.get_waypoint(_get_route_location(route[segment + 1][0]))
+            wp = CarlaDataProvider.get_waypoint(location)
 
             if prev_wp and curr_wp and wp:
                 if wp.road_id == prev_wp.road_id or wp.road_id == curr_wp.road_id:
@@ -108,14 +89,21 @@ def get_distance_along_route(route, target_location):
                     if (np.sign(wp.lane_id) == np.sign(prev_wp.lane_id) or
                             np.sign(wp.lane_id) == np.sign(curr_wp.lane_id)):
                         # The location is within the current route interval
-                        covered_distance += math.sqrt(distance_squared)
-                        found = True
-                        break
+                        covered_distance = route_index.planar_cumulative_distance[segment]
+                        return float(covered_distance + math.sqrt(distance_squared)), True
 
-        covered_distance += math.sqrt(interval_length_squared)
-        prev_position = position
+    if stop is not None:
+        # The location is on top of a route point
+        return float(route_index.planar_cumulative_distance[stop]), False
 
-    return covered_distance, found
+    return float(route_index.planar_cumulative_distance[-1]) if len(route_index) else 0.0, False
+
+
+def _get_route_location(point):
+    """
+    returns the location of a route point, given as a carla.Transform or carla.Location
+    """
+    return point.location if hasattr(point, 'location') else point
 
 
 def get_crossing_point(actor):
@@ -467,10 +455,10 @@ def get_intersection(ego_actor, other_actor):
 
 def detect_lane_obstacle(actor, extension_factor=3, margin=1.02):
     """
-    This function identifies if an obstacle is present in front of the reference actor
+    This function identifies if an obstacle is present in front of the reference actor.
+    Obstacles are the vehicles found at the actor spatial index of the CarlaDataProvider,
+    registered or not
     """
-    world = CarlaDataProvider.get_world()
-    world_actors = world.get_actors().filter('vehicle.*')
     actor_bbox = actor.bounding_box
     actor_transform = actor.get_transform()
     actor_location = actor_transform.location
@@ -482,11 +470,14 @@ def detect_lane_obstacle(actor, extension_factor=3, margin=1.02):
     actor_yaw = actor_transform.rotation.yaw
 
     is_hazard = False
-    for adversary in world_actors:
-        if adversary.id != actor.id and \
-                actor_transform.location.distance(adversary.get_location()) < 50:
+    nearby_actors = CarlaDataProvider.get_actor_spatial_index().actors_within(
+        actor_transform.location, 50, 'vehicle.*')
+    for _, adversary in nearby_actors:
+        if adversary.id != actor.id:
             adversary_bbox = adversary.bounding_box
-            adversary_transform = adversary.get_transform()
+            adversary_transform = CarlaDataProvider.get_transform(adversary)
+            if adversary_transform is None:
+                continue
             adversary_loc = adversary_transform.location
             adversary_yaw = adversary_transform.rotation.yaw
             overlap_adversary = RotatedRectangle(
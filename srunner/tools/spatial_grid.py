@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides a uniform grid over a set of points, used to answer
+radius and nearest-neighbour queries without checking every point.
+"""
+
+import math
+
+import numpy as np
+
+
+class SpatialGrid(object):
+
+    """
+    Uniform grid spatial index over a static set of points.
+
+    Points are bucketed by their x and y coordinates. Distances are computed
+    with all the dimensions of the points (2D or 3D), so queries give the same
+    results as a brute-force check would.
+
+    Args:
+        points (array-like): Nx2 or Nx3 array with the point coordinates
+        cell_size (float): side length of each grid cell [m]
+    """
+
+    def __init__(self, points, cell_size=10.0):
+        self._points = np.asarray(points, dtype=np.float64)
+        if self._points.ndim != 2:
+            self._points = self._points.reshape(0, 2)
+        self._cell_size = float(cell_size)
+        self._cells = {}
+        self._min_cell = None
+        self._max_cell = None
+
+        if len(self._points) == 0:
+            return
+
+        keys = np.floor(self._points[:, :2] / self._cell_size).astype(np.int64)
+        self._min_cell = keys.min(axis=0)
+        self._max_cell = keys.max(axis=0)
+
+        # Group the point indices by cell
+        order = np.lexsort((keys[:, 1], keys[:, 0]))
+        sorted_keys = keys[order]
+        boundaries = np.flatnonzero(np.any(np.diff(sorted_keys, axis=0) != 0, axis=1)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(order)]))
+        for start, end in zip(starts, ends):
+            self._cells[(int(sorted_keys[start][0]), int(sorted_keys[start][1]))] = order[start:end]
+
+    def __len__(self):
+        return len(self._points)
+
+    @property
+    def points(self):
+        """
+        returns the indexed points
+        """
+        return self._points
+
+    def _as_point(self, point):
+        """
+        Convert the given point (array-like or carla.Location) to an array
+        with the same dimension as the indexed points
+        """
+        if hasattr(point, 'x'):
+            point = (point.x, point.y, point.z)
+        point = np.asarray(point, dtype=np.float64)
+        return point[:self._points.shape[1]]
+
+    def _candidates(self, point, radius):
+        """
+        returns the indices of the points in the cells overlapping the square
+        around the point, and whether these are all the indexed points
+        """
+        reach = int(math.ceil(radius / self._cell_size))
+        center = np.floor(point[:2] / self._cell_size).astype(np.int64)
+        low = np.maximum(center - reach, self._min_cell)
+        high = np.minimum(center + reach, self._max_cell)
+
+        covers_all = bool(np.all(center - reach <= self._min_cell) and np.all(center + reach >= self._max_cell))
+        if covers_all:
+            return np.arange(len(self._points)), True
+        if np.any(low > high):
+            return np.zeros(0, dtype=np.int64), False
+
+        if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > len(self._cells):
+            buckets = [indices for key, indices in self._cells.items()
+                       if low[0] <= key[0] <= high[0] and low[1] <= key[1] <= high[1]]
+        else:
+            buckets = []
+            for cell_x in range(low[0], high[0] + 1):
+                for cell_y in range(low[1], high[1] + 1):
+                    indices = self._cells.get((cell_x, cell_y), None)
+                    if indices is not None:
+                        buckets.append(indices)
+
+        if not buckets:
+            return np.zeros(0, dtype=np.int64), False
+        return np.concatenate(buckets), False
+
+    def _sorted_by_distance(self, point, indices):
+        """
+        returns the given indices and their distances to the point, sorted by distance
+        """
+        distances = np.linalg.norm(self._points[indices] - point, axis=1)
+        order = np.argsort(distances, kind='stable')
+        return indices[order], distances[order]
+
+    def query_radius(self, point, radius):
+        """
+        returns the indices of all points closer than radius to the given point,
+        and their distances, both sorted by increasing distance
+        """
+        if len(self._points) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        point = self._as_point(point)
+        indices, _ = self._candidates(point, radius)
+        indices, distances = self._sorted_by_distance(point, indices)
+        mask = distances < radius
+        return indices[mask], distances[mask]
+
+    def query_nearest(self, point, k=1):
+        """
+        returns the indices of the k points closest to the given point,
+        and their distances, both sorted by increasing distance
+        """
+        if len(self._points) == 0 or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        point = self._as_point(point)
+        k = min(k, len(self._points))
+        radius = self._cell_size
+        while True:
+            indices, covers_all = self._candidates(point, radius)
+            indices, distances = self._sorted_by_distance(point, indices)
+            if covers_all:
+                return indices[:k], distances[:k]
+
+            # Only points inside the radius are guaranteed to be the closest ones
+            inside = np.count_nonzero(distances <= radius)
+            if inside >= k:
+                return indices[:k], distances[:k]
+            radius *= 2.0